@@ -0,0 +1,13 @@
+"""Suíte de benchmarks reproduzível da API e do caminho de dados do front-end.
+
+Uso (a partir da raiz do repositório, com as mesmas variáveis DB_* da API):
+
+    python -m bench seed --rows 100000            # popula tasks com linhas 'bench-*' (determinístico por --seed)
+    python -m bench load --concurrency 1,8,32     # GET/POST/PUT /tasks em paralelo: p50/p95/p99 e RPS
+    python -m bench frontend --rows 1000,10000    # conversão em DataFrame, fetch_data_from_api e render do dashboard
+    python -m bench compare antes.json depois.json
+    python -m bench cleanup                       # remove as linhas e eventos 'bench-*'
+
+Os resultados são gravados em JSON em bench/results/ (um arquivo por execução) para comparação.
+Use um Postgres local ou de homologação: POST/PUT geram eventos na outbox como qualquer escrita.
+"""
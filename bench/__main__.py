@@ -0,0 +1,111 @@
+import os
+import argparse
+
+from .report import run_metadata, save_results, compare, RESULTS_DIR
+
+DEFAULT_API_URL = os.getenv("API_BASE_URL", "http://localhost:8000/api/v1")
+BENCH_EMAIL = os.getenv("BENCH_EMAIL", "benchmark@ablicitacoes.com.br")
+BENCH_PASSWORD = os.getenv("BENCH_PASSWORD", "benchmark-senha")
+
+
+def int_list(text):
+    return [int(value) for value in text.split(",") if value.strip()]
+
+
+def cmd_seed(args):
+    from .seed import seed_tasks
+    print(f"Inserindo {args.rows} tarefas (seed={args.seed})...")
+    return {"seed": seed_tasks(args.rows, seed=args.seed, chunk_size=args.chunk_size)}
+
+
+def cmd_cleanup(args):
+    from .seed import cleanup
+    removed = cleanup()
+    print(f"Removidas: {removed}")
+    return None
+
+
+def cmd_load(args):
+    from .load import LoadTest, authenticate, parse_mix, DEFAULT_MIX
+    headers = authenticate(args.base_url, args.email, args.password)
+    test = LoadTest(args.base_url, headers, mix=parse_mix(args.mix) if args.mix else DEFAULT_MIX,
+                    page_size=args.page_size, seed=args.seed)
+    test.prepare()
+    levels = []
+    for concurrency in args.concurrency:
+        level = test.run(concurrency, args.duration, args.warmup)
+        level["server"] = test.server_stats()
+        levels.append(level)
+        print(f"c={concurrency:<4} rps={level['rps']:<8} p50={level['p50_ms']}ms p95={level['p95_ms']}ms "
+              f"p99={level['p99_ms']}ms erros={level['errors']}")
+    return {"load": levels}
+
+
+def cmd_frontend(args):
+    from . import frontend
+    from .load import authenticate
+    results = {"conversion": frontend.bench_conversion(args.rows, args.repeats, args.seed)}
+    if not args.skip_api:
+        token = authenticate(args.base_url, args.email, args.password)["Authorization"].split(" ", 1)[1]
+        results["fetch"] = frontend.bench_fetch(args.modules, token, args.repeats)
+        results["render"] = frontend.bench_render(args.modules, token, args.repeats)
+    for section, entries in results.items():
+        for entry in entries:
+            label = " ".join(f"{k}={entry[k]}" for k in ("module", "layout", "rows", "case") if k in entry)
+            print(f"{section:<10} {label:<45} mediana={entry['median_ms']}ms")
+    return {"frontend": results}
+
+
+def cmd_compare(args):
+    compare(args.before, args.after)
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Benchmarks da API e do front-end ABzinho.")
+    parser.add_argument("--base-url", default=DEFAULT_API_URL, help="URL base da API (mesma do API_BASE_URL do front-end).")
+    parser.add_argument("--email", default=BENCH_EMAIL)
+    parser.add_argument("--password", default=BENCH_PASSWORD)
+    parser.add_argument("--seed", type=int, default=42, help="Semente dos dados e da sequência de operações.")
+    parser.add_argument("--out-dir", default=RESULTS_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed = commands.add_parser("seed", help="Popula tasks com linhas 'bench-*'.")
+    seed.add_argument("--rows", type=int, default=10000)
+    seed.add_argument("--chunk-size", type=int, default=50000)
+    seed.set_defaults(func=cmd_seed)
+
+    cleanup = commands.add_parser("cleanup", help="Remove as linhas 'bench-*' e seus eventos da outbox.")
+    cleanup.set_defaults(func=cmd_cleanup)
+
+    load = commands.add_parser("load", help="Carga em GET/POST/PUT /tasks por nível de concorrência.")
+    load.add_argument("--concurrency", type=int_list, default=[1, 8, 32], help="Níveis, ex.: 1,8,32")
+    load.add_argument("--duration", type=float, default=30, help="Segundos medidos por nível.")
+    load.add_argument("--warmup", type=float, default=3, help="Segundos descartados no início de cada nível.")
+    load.add_argument("--mix", default=None, help="Pesos das operações, ex.: list=70,list_filtered=10,post=10,put=10")
+    load.add_argument("--page-size", type=int, default=100)
+    load.set_defaults(func=cmd_load)
+
+    front = commands.add_parser("frontend", help="Conversão em DataFrame, fetch_data_from_api e render do dashboard.")
+    front.add_argument("--rows", type=int_list, default=[1000, 10000, 100000], help="Tamanhos do payload sintético.")
+    front.add_argument("--modules", type=lambda text: text.split(","), default=["Tarefas"])
+    front.add_argument("--repeats", type=int, default=5)
+    front.add_argument("--skip-api", action="store_true", help="Só a conversão sintética (sem API).")
+    front.set_defaults(func=cmd_frontend)
+
+    comparison = commands.add_parser("compare", help="Compara dois arquivos de resultado.")
+    comparison.add_argument("before")
+    comparison.add_argument("after")
+    comparison.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    # The front-end modules read API_BASE_URL at import time
+    os.environ["API_BASE_URL"] = args.base_url
+    results = args.func(args)
+    if results is not None:
+        path = save_results({"meta": run_metadata(args.command, args), **results}, args.out_dir)
+        print(f"Resultados: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import json
+import time
+import uuid
+import random
+import statistics
+from datetime import date, datetime, timedelta, timezone
+
+import streamlit as st
+
+from frontend.config import TEAM_MEMBERS, STATUS_TAREFAS, PRIORIDADES
+from frontend.data_cache import get_shared_cache
+from frontend.data_manager import to_dataframe, fetch_data_from_api, initialize_session_state
+
+
+def timings(fn, repeats):
+    """Executa ``fn`` ``repeats`` vezes; retorna mediana/mín/máx em ms."""
+    values = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        values.append(time.perf_counter() - start)
+    return {
+        "repeats": repeats,
+        "median_ms": round(statistics.median(values) * 1000, 2),
+        "min_ms": round(min(values) * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2),
+    }
+
+
+def synthetic_task_payloads(rows, seed=42):
+    """Corpo JSON de GET /tasks com ``rows`` linhas nos três layouts (registros, colunar e arrays)."""
+    rng = random.Random(seed)
+    today = date.today()
+    created = datetime.now(timezone.utc)
+    columns = {
+        "task_id": [str(uuid.UUID(int=rng.getrandbits(128))) for _ in range(rows)],
+        "descricao": [f"Tarefa {i}" for i in range(rows)],
+        "responsavel": [rng.choice(TEAM_MEMBERS) for _ in range(rows)],
+        "data_limite": [(today + timedelta(days=rng.randint(-180, 180))).isoformat() for _ in range(rows)],
+        "status": [rng.choice(STATUS_TAREFAS) for _ in range(rows)],
+        "prioridade": [rng.choice(PRIORIDADES) for _ in range(rows)],
+        "observacoes": [f"Observação {i}" if rng.random() < 0.3 else None for i in range(rows)],
+        "data_criacao": [(created - timedelta(minutes=i)).isoformat() for i in range(rows)],
+    }
+    records = [dict(zip(columns, values)) for values in zip(*columns.values())]
+    return {
+        "rows": json.dumps(records).encode(),
+        "columns": json.dumps({"format": "columns", "columns": columns}).encode(),
+        "arrays": json.dumps({"format": "arrays", "columns": list(columns), "rows": [list(values) for values in zip(*columns.values())]}).encode(),
+    }
+
+
+def bench_conversion(row_counts, repeats=5, seed=42):
+    """json.loads + to_dataframe (o trabalho de fetch_data_from_api após a resposta) por layout e tamanho."""
+    results = []
+    for rows in row_counts:
+        for layout, body in synthetic_task_payloads(rows, seed).items():
+            result = timings(lambda: to_dataframe('Tarefas', json.loads(body)), repeats)
+            result.update({"module": "Tarefas", "layout": layout, "rows": rows, "payload_bytes": len(body)})
+            result["rows_per_s"] = round(rows / (result["median_ms"] / 1000)) if result["median_ms"] else None
+            results.append(result)
+    return results
+
+
+def bench_fetch(modules, token, repeats=5):
+    """fetch_data_from_api contra a API real: sem cache, revalidação após o TTL (304/delta) e cache quente."""
+    initialize_session_state()
+    st.session_state['auth_token'] = token
+    results = []
+    for module in modules:
+        def cold():
+            # Drops the process-wide cache resource: the next call builds an empty one
+            get_shared_cache.clear()
+            fetch_data_from_api(module)
+
+        def revalidate():
+            get_shared_cache().expire_module(module)
+            fetch_data_from_api(module)
+
+        cases = (("cold", cold), ("revalidate", revalidate), ("hit", lambda: fetch_data_from_api(module)))
+        for case, fn in cases:
+            result = timings(fn, repeats)
+            result.update({"module": module, "case": case, "rows": len(fetch_data_from_api(module))})
+            results.append(result)
+    return results
+
+
+def _dashboard_script():
+    # Runs inside AppTest: same process, so the shared DataFrame cache is the benchmark's
+    from frontend.ui_components import render_dashboard_content
+    render_dashboard_content()
+
+
+def bench_render(modules, token, repeats=5, timeout=120):
+    """Tempo de uma execução do script com render_dashboard_content (AppTest), com o cache frio e quente."""
+    from streamlit.testing.v1 import AppTest
+
+    results = []
+    for module in modules:
+        def run(clear):
+            if clear:
+                get_shared_cache.clear()
+            app = AppTest.from_function(_dashboard_script, default_timeout=timeout)
+            app.session_state['logged_in'] = True
+            app.session_state['active_module'] = module
+            app.session_state['auth_token'] = token
+            app.run()
+            if app.exception:
+                raise RuntimeError(app.exception[0].message)
+
+        for case, clear in (("cold", True), ("warm", False)):
+            result = timings(lambda: run(clear), repeats)
+            result.update({"module": module, "case": case})
+            results.append(result)
+    return results
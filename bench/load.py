@@ -0,0 +1,146 @@
+import time
+import uuid
+import random
+import threading
+from datetime import date, timedelta
+
+import requests
+
+from frontend.config import TEAM_MEMBERS, STATUS_TAREFAS, PRIORIDADES
+from .report import summarize
+from .seed import BENCH_PREFIX
+
+# Operation mix (weights) of a closed-loop virtual user
+DEFAULT_MIX = {"list": 70, "list_filtered": 10, "post": 10, "put": 10}
+
+
+def parse_mix(text):
+    """'list=70,post=10' -> {'list': 70, 'post': 10}."""
+    mix = {}
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Operação desconhecida: {name} (use {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def authenticate(base_url, email, password, register=True):
+    """Cabeçalhos Bearer do usuário de benchmark (cadastra o usuário na primeira execução, se permitido)."""
+    response = requests.post(f"{base_url}/auth/login", json={"email": email, "password": password}, timeout=30)
+    if response.status_code == 401 and register:
+        response = requests.post(f"{base_url}/auth/register", json={"nome": "Benchmark", "email": email, "password": password}, timeout=30)
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def random_task(rng):
+    return {
+        "descricao": f"{BENCH_PREFIX}load {uuid.UUID(int=rng.getrandbits(128))}",
+        "responsavel": rng.choice(TEAM_MEMBERS),
+        "data_limite": (date.today() + timedelta(days=rng.randint(-30, 90))).isoformat(),
+        "status": rng.choice(STATUS_TAREFAS),
+        "prioridade": rng.choice(PRIORIDADES),
+        "observacoes": None,
+    }
+
+
+class LoadTest:
+    """Usuários virtuais em loop fechado (uma thread e uma sessão keep-alive cada) contra /tasks.
+
+    As amostras do aquecimento são descartadas; o RPS é medido só na janela de ``duration`` segundos.
+    """
+
+    def __init__(self, base_url, headers, mix=DEFAULT_MIX, page_size=100, seed=42, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.headers = headers
+        self.mix = mix
+        self.page_size = page_size
+        self.seed = seed
+        self.timeout = timeout
+        self.task_ids = []
+
+    def prepare(self):
+        """Ids existentes para os PUTs (primeira página da listagem)."""
+        response = requests.get(f"{self.base_url}/tasks", headers=self.headers, timeout=self.timeout,
+                                params={"limit": 1000, "fields": "task_id"})
+        response.raise_for_status()
+        self.task_ids = [row["task_id"] for row in response.json()]
+
+    def _request(self, session, rng, op):
+        url = f"{self.base_url}/tasks"
+        if op == "list":
+            return session.get(url, params={"limit": self.page_size, "layout": "columns"}, timeout=self.timeout)
+        if op == "list_filtered":
+            params = {"status": rng.choice(STATUS_TAREFAS), "responsavel": rng.choice(TEAM_MEMBERS),
+                      "limit": self.page_size, "layout": "columns"}
+            return session.get(url, params=params, timeout=self.timeout)
+        if op == "post":
+            response = session.post(url, json=random_task(rng), timeout=self.timeout)
+            if response.status_code == 201:
+                self.task_ids.append(response.json()["task_id"])
+            return response
+        if not self.task_ids:
+            return session.post(url, json=random_task(rng), timeout=self.timeout)
+        return session.put(f"{url}/{rng.choice(self.task_ids)}", json=random_task(rng), timeout=self.timeout)
+
+    def _user(self, index, measure_from, stop_at, samples, errors, lock):
+        rng = random.Random(self.seed * 1000 + index)
+        ops, weights = list(self.mix), list(self.mix.values())
+        session = requests.Session()
+        session.headers.update(self.headers)
+        local, local_errors = {op: [] for op in ops}, {op: 0 for op in ops}
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at:
+                break
+            op = rng.choices(ops, weights)[0]
+            start = time.perf_counter()
+            try:
+                ok = self._request(session, rng, op).status_code < 400
+            except requests.exceptions.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            if start < measure_from:
+                continue
+            if ok:
+                local[op].append(elapsed)
+            else:
+                local_errors[op] += 1
+        session.close()
+        with lock:
+            for op in ops:
+                samples[op].extend(local[op])
+                errors[op] += local_errors[op]
+
+    def run(self, concurrency, duration, warmup=2.0):
+        """Uma rodada com ``concurrency`` usuários; retorna o resumo geral e por operação."""
+        samples, errors, lock = {op: [] for op in self.mix}, {op: 0 for op in self.mix}, threading.Lock()
+        measure_from = time.perf_counter() + warmup
+        stop_at = measure_from + duration
+        threads = [
+            threading.Thread(target=self._user, args=(i, measure_from, stop_at, samples, errors, lock), daemon=True)
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        every = [value for values in samples.values() for value in values]
+        return {
+            "concurrency": concurrency,
+            "duration_s": duration,
+            **summarize(every, duration, sum(errors.values())),
+            "ops": {op: summarize(samples[op], duration, errors[op]) for op in self.mix},
+        }
+
+    def server_stats(self):
+        """Pool e cache do worker que atendeu (GET /monitor/...), para contextualizar os números."""
+        stats = {}
+        for name in ("pool", "cache"):
+            try:
+                stats[name] = requests.get(f"{self.base_url}/monitor/{name}", headers=self.headers, timeout=self.timeout).json()
+            except (requests.exceptions.RequestException, ValueError):
+                stats[name] = None
+        return stats
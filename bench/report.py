@@ -0,0 +1,95 @@
+import os
+import sys
+import json
+import math
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+# Where `python -m bench ...` writes one JSON file per run
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def percentile(sorted_values, p):
+    """Percentil por nearest-rank de uma lista já ordenada (None se vazia)."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies_s, duration_s=None, errors=0):
+    """Latências (segundos) -> contagem, RPS e p50/p95/p99/máx em ms."""
+    values = sorted(latencies_s)
+    summary = {"count": len(values), "errors": errors}
+    if duration_s:
+        summary["rps"] = round(len(values) / duration_s, 1)
+    for name, p in (("p50_ms", 50), ("p95_ms", 95), ("p99_ms", 99), ("max_ms", 100)):
+        value = percentile(values, p)
+        summary[name] = round(value * 1000, 2) if value is not None else None
+    if values:
+        summary["mean_ms"] = round(sum(values) / len(values) * 1000, 2)
+    return summary
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_metadata(command, args):
+    return {
+        "command": command,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": {key: value for key, value in vars(args).items() if key not in ("func", "password")},
+    }
+
+
+def save_results(results, out_dir=RESULTS_DIR, name=None):
+    """Grava o resultado em ``<out_dir>/<timestamp>-<comando>-<revisão>.json`` e retorna o caminho."""
+    os.makedirs(out_dir, exist_ok=True)
+    meta = results["meta"]
+    if name is None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        name = f"{stamp}-{meta['command']}-{meta['git_revision'] or 'local'}.json"
+    path = os.path.join(out_dir, name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2, default=str)
+    return path
+
+
+def flatten(results):
+    """{métrica: valor} comparável entre execuções (ex.: 'load.c8.list.p95_ms')."""
+    metrics = {}
+    for level in results.get("load", []):
+        prefix = f"load.c{level['concurrency']}"
+        metrics[f"{prefix}.rps"] = level["rps"]
+        for op, summary in level["ops"].items():
+            for key in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+                metrics[f"{prefix}.{op}.{key}"] = summary.get(key)
+    for section, entries in results.get("frontend", {}).items():
+        for entry in entries:
+            label = ".".join(str(entry[k]) for k in ("module", "layout", "rows", "case") if k in entry)
+            metrics[f"frontend.{section}.{label}.median_ms"] = entry.get("median_ms")
+    return metrics
+
+
+def compare(before_path, after_path, out=sys.stdout):
+    """Imprime as métricas das duas execuções lado a lado com a variação percentual."""
+    with open(before_path, encoding="utf-8") as f:
+        before = flatten(json.load(f))
+    with open(after_path, encoding="utf-8") as f:
+        after = flatten(json.load(f))
+
+    width = max((len(key) for key in {**before, **after}), default=10)
+    print(f"{'métrica':<{width}}  {'antes':>12}  {'depois':>12}  {'variação':>9}", file=out)
+    for key in sorted({**before, **after}):
+        a, b = before.get(key), after.get(key)
+        delta = f"{(b - a) / a * 100:+.1f}%" if a and b is not None else ""
+        print(f"{key:<{width}}  {a if a is not None else '-':>12}  {b if b is not None else '-':>12}  {delta:>9}", file=out)
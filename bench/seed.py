@@ -0,0 +1,70 @@
+import time
+
+import psycopg2
+
+from src.config.database import DATABASE_URL
+from frontend.config import TEAM_MEMBERS, STATUS_TAREFAS, PRIORIDADES
+
+# Every benchmark row starts with this prefix, so cleanup never touches real data
+BENCH_PREFIX = "bench-"
+
+# Deterministic for a given setseed(): same rows (except task_id/data_criacao) on every run
+SEED_SQL = """
+    INSERT INTO tasks (descricao, responsavel, data_limite, status, prioridade, observacoes)
+    SELECT
+        %(prefix)s || g || ' ' || md5(random()::text),
+        (%(members)s::text[])[1 + floor(random() * cardinality(%(members)s::text[]))::int],
+        current_date + (floor(random() * 365) - 180)::int,
+        (%(statuses)s::text[])[1 + floor(random() * cardinality(%(statuses)s::text[]))::int],
+        (%(priorities)s::text[])[1 + floor(random() * cardinality(%(priorities)s::text[]))::int],
+        CASE WHEN random() < 0.3 THEN 'Observação ' || g END
+    FROM generate_series(%(start)s, %(stop)s) AS g;
+"""
+
+CLEANUP_SQL = [
+    "DELETE FROM outbox_events WHERE payload->>'descricao' LIKE %s;",
+    "DELETE FROM tasks WHERE descricao LIKE %s;",
+]
+
+COUNT_SQL = "SELECT count(*) FILTER (WHERE descricao LIKE %s), count(*) FROM tasks;"
+
+
+def seed_tasks(rows, seed=42, chunk_size=50000, dsn=DATABASE_URL):
+    """Insere ``rows`` tarefas 'bench-*' em blocos (um commit por bloco) e roda ANALYZE."""
+    conn = psycopg2.connect(dsn)
+    try:
+        start = time.perf_counter()
+        with conn.cursor() as cur:
+            # random() is per session: seeding once makes every chunk reproducible
+            cur.execute("SELECT setseed(%s);", ((seed % 1000) / 1000,))
+            for first in range(1, rows + 1, chunk_size):
+                last = min(rows, first + chunk_size - 1)
+                cur.execute(SEED_SQL, {
+                    "prefix": BENCH_PREFIX, "members": TEAM_MEMBERS, "statuses": STATUS_TAREFAS,
+                    "priorities": PRIORIDADES, "start": first, "stop": last,
+                })
+                conn.commit()
+                print(f"  {last}/{rows} tarefas inseridas")
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE tasks;")
+            cur.execute(COUNT_SQL, (BENCH_PREFIX + "%",))
+            bench_rows, total_rows = cur.fetchone()
+        return {"inserted": rows, "seconds": round(time.perf_counter() - start, 2), "bench_rows": bench_rows, "total_rows": total_rows}
+    finally:
+        conn.close()
+
+
+def cleanup(dsn=DATABASE_URL):
+    """Remove as tarefas 'bench-*' (seed e carga) e os eventos da outbox gerados por elas."""
+    conn = psycopg2.connect(dsn)
+    try:
+        removed = []
+        with conn.cursor() as cur:
+            for sql in CLEANUP_SQL:
+                cur.execute(sql, (BENCH_PREFIX + "%",))
+                removed.append(cur.rowcount)
+        conn.commit()
+        return {"outbox_events": removed[0], "tasks": removed[1]}
+    finally:
+        conn.close()
@@ -0,0 +1,4 @@
+#!/bin/sh
+# Init script of the primary in docker-compose.replicas.yml: lets the replica connect for streaming replication
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
@@ -0,0 +1,506 @@
+-- Schema do banco ABzinho (PostgreSQL 14+)
+
+-- =========================================
+-- Versões das tabelas (ETag / Last-Modified / cache de respostas da API)
+-- =========================================
+-- Counters bumped by every write are split in slots: concurrent transactions land on different rows
+-- instead of queueing on one row lock until commit. The slot comes from the transaction id, so every
+-- statement of a transaction uses the same slot (no lock-order deadlocks between its own statements).
+-- Readers sum the slots.
+CREATE OR REPLACE FUNCTION counter_slot() RETURNS SMALLINT AS $$
+    SELECT (pg_current_xact_id()::text::bigint % 16)::smallint;
+$$ LANGUAGE sql VOLATILE;
+
+-- version da tabela = sum(version) dos slots; updated_at = max(updated_at)
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name  TEXT NOT NULL,
+    slot        SMALLINT NOT NULL DEFAULT 0,
+    version     BIGINT NOT NULL DEFAULT 0,
+    updated_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (table_name, slot)
+);
+
+-- Bancos criados antes dos slots: as linhas existentes ficam no slot 0
+ALTER TABLE table_versions ADD COLUMN IF NOT EXISTS slot SMALLINT NOT NULL DEFAULT 0;
+DO $$
+BEGIN
+    IF (SELECT cardinality(conkey) FROM pg_constraint WHERE conname = 'table_versions_pkey') = 1 THEN
+        ALTER TABLE table_versions DROP CONSTRAINT table_versions_pkey, ADD PRIMARY KEY (table_name, slot);
+    END IF;
+END;
+$$;
+
+-- Statement-level: one bump per INSERT/UPDATE/DELETE, even for multi-row batches.
+-- Also wakes the API change feed (LISTEN table_changes); NOTIFY is delivered on commit, deduplicated per transaction.
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO table_versions AS v (table_name, slot, version, updated_at)
+    VALUES (TG_TABLE_NAME, counter_slot(), 1, now())
+    ON CONFLICT (table_name, slot) DO UPDATE SET version = v.version + 1, updated_at = now();
+    PERFORM pg_notify('table_changes', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- =========================================
+-- Usuários da API (login / JWT)
+-- =========================================
+CREATE TABLE IF NOT EXISTS users (
+    user_id        UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    nome           TEXT NOT NULL,
+    email          TEXT NOT NULL UNIQUE,          -- sempre em minúsculas
+    password_hash  TEXT NOT NULL,                 -- pbkdf2_sha256$iterações$salt$hash
+    ativo          BOOLEAN NOT NULL DEFAULT true,
+    criado_em      TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- =========================================
+-- Tarefas
+-- =========================================
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id       UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    descricao     TEXT NOT NULL,
+    responsavel   TEXT NOT NULL,
+    data_limite   DATE NOT NULL,
+    status        TEXT NOT NULL,
+    prioridade    TEXT NOT NULL,
+    observacoes   TEXT,
+    data_criacao  TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- Keyset pagination: ORDER BY data_limite DESC, task_id DESC / WHERE (data_limite, task_id) < (...)
+CREATE INDEX IF NOT EXISTS tasks_data_limite_task_id_idx ON tasks (data_limite DESC, task_id DESC);
+
+-- Filtros da listagem, já na ordem do cursor para evitar sort
+CREATE INDEX IF NOT EXISTS tasks_status_data_limite_idx ON tasks (status, data_limite DESC, task_id DESC);
+CREATE INDEX IF NOT EXISTS tasks_responsavel_data_limite_idx ON tasks (responsavel, data_limite DESC, task_id DESC);
+CREATE INDEX IF NOT EXISTS tasks_prioridade_data_limite_idx ON tasks (prioridade, data_limite DESC, task_id DESC);
+
+-- Filtro por período de criação (criado_de / criado_ate)
+CREATE INDEX IF NOT EXISTS tasks_data_criacao_idx ON tasks (data_criacao);
+
+-- Versão usada pela ETag de GET /api/v1/tasks
+CREATE OR REPLACE TRIGGER tasks_bump_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tasks
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+-- =========================================
+-- Contatos (/api/v1/contacts)
+-- =========================================
+CREATE TABLE IF NOT EXISTS contacts (
+    contact_id      UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    pessoa_orgao    TEXT NOT NULL,
+    motivo          TEXT NOT NULL,
+    data_follow_up  DATE NOT NULL,
+    responsavel     TEXT NOT NULL,
+    status          TEXT NOT NULL,
+    prioridade      TEXT NOT NULL,
+    observacoes     TEXT,
+    data_criacao    TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS contacts_data_follow_up_contact_id_idx ON contacts (data_follow_up DESC, contact_id DESC);
+CREATE INDEX IF NOT EXISTS contacts_status_data_follow_up_idx ON contacts (status, data_follow_up DESC, contact_id DESC);
+CREATE INDEX IF NOT EXISTS contacts_responsavel_data_follow_up_idx ON contacts (responsavel, data_follow_up DESC, contact_id DESC);
+
+CREATE OR REPLACE TRIGGER contacts_bump_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON contacts
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+-- =========================================
+-- Atas de registro de preço (/api/v1/minutes)
+-- =========================================
+CREATE TABLE IF NOT EXISTS minutes (
+    minute_id        UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    orgao            TEXT NOT NULL,
+    objeto           TEXT NOT NULL,
+    valor_utilizado  NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    vigencia_final   DATE NOT NULL,
+    status           TEXT NOT NULL,
+    prioridade       TEXT NOT NULL,
+    data_criacao     TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS minutes_vigencia_final_minute_id_idx ON minutes (vigencia_final DESC, minute_id DESC);
+CREATE INDEX IF NOT EXISTS minutes_status_vigencia_final_idx ON minutes (status, vigencia_final DESC, minute_id DESC);
+
+CREATE OR REPLACE TRIGGER minutes_bump_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON minutes
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+-- =========================================
+-- Vendas (/api/v1/sales)
+-- =========================================
+CREATE TABLE IF NOT EXISTS sales (
+    sale_id       UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    tipo          TEXT NOT NULL,
+    cliente       TEXT NOT NULL,
+    valor_total   NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    data_venda    DATE NOT NULL,
+    responsavel   TEXT NOT NULL,
+    status        TEXT NOT NULL,
+    data_criacao  TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS sales_data_venda_sale_id_idx ON sales (data_venda DESC, sale_id DESC);
+CREATE INDEX IF NOT EXISTS sales_status_data_venda_idx ON sales (status, data_venda DESC, sale_id DESC);
+CREATE INDEX IF NOT EXISTS sales_responsavel_data_venda_idx ON sales (responsavel, data_venda DESC, sale_id DESC);
+
+CREATE OR REPLACE TRIGGER sales_bump_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON sales
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+-- =========================================
+-- Change feed de tarefas (GET /api/v1/tasks/changes e /tasks/changes/stream)
+-- =========================================
+-- Transaction that last wrote the row. The feed cursor is the xmin of a snapshot: every row with
+-- change_xid >= cursor may have changed since, and rows of transactions still running are not lost.
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS change_xid xid8 NOT NULL DEFAULT pg_current_xact_id();
+
+CREATE OR REPLACE FUNCTION touch_change_xid() RETURNS trigger AS $$
+BEGIN
+    NEW.change_xid := pg_current_xact_id();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER tasks_touch_change_xid
+    BEFORE UPDATE ON tasks
+    FOR EACH ROW EXECUTE FUNCTION touch_change_xid();
+
+CREATE INDEX IF NOT EXISTS tasks_change_xid_idx ON tasks (change_xid);
+
+-- =========================================
+-- Versão por linha (PATCH /api/v1/tasks/{task_id} com If-Match)
+-- =========================================
+-- Optimistic concurrency: every UPDATE (API, batch upsert, scheduler) bumps it, so a PATCH sent with
+-- an older version matches no row and the API answers 412 instead of overwriting the other change.
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS row_version BIGINT NOT NULL DEFAULT 1;
+
+CREATE OR REPLACE FUNCTION bump_row_version() RETURNS trigger AS $$
+BEGIN
+    NEW.row_version := OLD.row_version + 1;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER tasks_bump_row_version
+    BEFORE UPDATE ON tasks
+    FOR EACH ROW EXECUTE FUNCTION bump_row_version();
+
+-- =========================================
+-- Busca de tarefas (GET /api/v1/tasks/search)
+-- =========================================
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- unaccent() is only STABLE (dictionary looked up via search_path); index expressions need IMMUTABLE
+CREATE OR REPLACE FUNCTION search_normalize(value TEXT) RETURNS TEXT AS $$
+    SELECT lower(public.unaccent('public.unaccent'::regdictionary, coalesce(value, '')));
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+-- Portuguese stemming without accents: "licitação" and "licitacao" become the same lexeme
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'portuguese_unaccent') THEN
+        CREATE TEXT SEARCH CONFIGURATION portuguese_unaccent (COPY = portuguese);
+        ALTER TEXT SEARCH CONFIGURATION portuguese_unaccent
+            ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+    END IF;
+END
+$$;
+
+-- Stored so the ranking reads it instead of re-parsing the text; weights: descrição > responsável > observações.
+-- Not part of the API payload (explicit column lists; removed from the outbox payload).
+ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('portuguese_unaccent', coalesce(descricao, '')), 'A') ||
+    setweight(to_tsvector('portuguese_unaccent', coalesce(responsavel, '')), 'B') ||
+    setweight(to_tsvector('portuguese_unaccent', coalesce(observacoes, '')), 'C')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS tasks_search_vector_idx ON tasks USING gin (search_vector);
+
+-- Typos in names of public bodies ("prefeitra de sao paolo"): trigram word similarity (<%) on the description
+CREATE INDEX IF NOT EXISTS tasks_descricao_trgm_idx ON tasks USING gin (search_normalize(descricao) gin_trgm_ops);
+
+-- =========================================
+-- Histórico de tarefas (GET /api/v1/tasks/{task_id}/history)
+-- =========================================
+-- Append-only, one row per created/updated task with only the fields that changed, written by a statement
+-- trigger in the same transaction as the write (API, batch import, scheduler). Monthly range partitions on
+-- changed_at: the task_id index exists inside each partition, and old months are detached without touching
+-- the recent ones.
+CREATE TABLE IF NOT EXISTS task_history (
+    history_id   BIGSERIAL NOT NULL,
+    task_id      UUID NOT NULL,
+    changed_at   TIMESTAMPTZ NOT NULL DEFAULT now(),   -- início da transação que gravou
+    operation    TEXT NOT NULL,                        -- created / updated
+    row_version  BIGINT NOT NULL,                      -- versão da tarefa após a escrita
+    changed_by   TEXT,                                 -- e-mail do usuário da API, 'agendador' ou NULL (SQL direto)
+    changes      JSONB NOT NULL                        -- {"coluna": [antes, depois]}; no created, antes = null
+) PARTITION BY RANGE (changed_at);
+
+CREATE INDEX IF NOT EXISTS task_history_task_id_idx ON task_history (task_id, changed_at DESC, history_id DESC);
+
+-- Safety net while a month's partition is missing (scheduler stopped); maintenance moves its rows out
+CREATE TABLE IF NOT EXISTS task_history_default PARTITION OF task_history DEFAULT;
+
+-- Columns kept out of the diff: key, internal columns and the ones stored in their own history columns
+CREATE OR REPLACE FUNCTION record_task_history() RETURNS trigger AS $$
+DECLARE
+    skipped TEXT[] := ARRAY['task_id', 'data_criacao', 'row_version', 'change_xid', 'search_vector'];
+    actor TEXT := nullif(current_setting('abz.actor', true), '');
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO task_history (task_id, operation, row_version, changed_by, changes)
+        SELECT n.task_id, 'created', n.row_version, actor, d.changes
+        FROM new_rows n
+        CROSS JOIN LATERAL (
+            SELECT coalesce(jsonb_object_agg(f.key, jsonb_build_array(NULL, f.value)), '{}') AS changes
+            FROM jsonb_each(to_jsonb(n) - skipped) AS f
+            WHERE f.value <> 'null'
+        ) AS d;
+    ELSE
+        -- Updates that change nothing (same values re-saved, upsert of an identical row) write no history
+        INSERT INTO task_history (task_id, operation, row_version, changed_by, changes)
+        SELECT n.task_id, 'updated', n.row_version, actor, d.changes
+        FROM new_rows n JOIN old_rows o ON o.task_id = n.task_id
+        CROSS JOIN LATERAL (
+            SELECT jsonb_object_agg(f.key, jsonb_build_array(b.value, f.value)) AS changes
+            FROM jsonb_each(to_jsonb(n) - skipped) AS f
+            JOIN jsonb_each(to_jsonb(o) - skipped) AS b ON b.key = f.key
+            WHERE f.value IS DISTINCT FROM b.value
+        ) AS d
+        WHERE d.changes IS NOT NULL;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER tasks_history_insert AFTER INSERT ON tasks REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION record_task_history();
+CREATE OR REPLACE TRIGGER tasks_history_update AFTER UPDATE ON tasks REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION record_task_history();
+
+-- Creates the current month and the next months_ahead (task_history_YYYY_MM, UTC months) and detaches the
+-- partitions older than retention_months (0 = keep all). Detached months stay as plain tables for archiving
+-- (pg_dump -t) or DROP. Run by the scheduler leader (src/services/history.py); idempotent.
+CREATE OR REPLACE FUNCTION maintain_task_history_partitions(months_ahead INT, retention_months INT)
+RETURNS TABLE (action TEXT, partition_name TEXT) AS $$
+DECLARE
+    current_month TIMESTAMP := date_trunc('month', now() AT TIME ZONE 'UTC');
+    lower_bound TIMESTAMPTZ;
+    upper_bound TIMESTAMPTZ;
+    part_name TEXT;
+BEGIN
+    FOR i IN 0 .. months_ahead LOOP
+        lower_bound := (current_month + make_interval(months => i)) AT TIME ZONE 'UTC';
+        upper_bound := (current_month + make_interval(months => i + 1)) AT TIME ZONE 'UTC';
+        part_name := 'task_history_' || to_char(current_month + make_interval(months => i), 'YYYY_MM');
+        CONTINUE WHEN to_regclass(part_name) IS NOT NULL;
+
+        -- Built standalone so rows that fell into the default partition can move in before the attach
+        EXECUTE format('CREATE TABLE %I (LIKE task_history INCLUDING DEFAULTS)', part_name);
+        EXECUTE format(
+            'WITH moved AS (DELETE FROM task_history_default WHERE changed_at >= %L AND changed_at < %L RETURNING *) '
+            'INSERT INTO %I SELECT * FROM moved',
+            lower_bound, upper_bound, part_name);
+        EXECUTE format('ALTER TABLE task_history ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+            part_name, lower_bound, upper_bound);
+        action := 'created';
+        partition_name := part_name;
+        RETURN NEXT;
+    END LOOP;
+
+    IF retention_months > 0 THEN
+        FOR part_name IN
+            SELECT c.relname FROM pg_inherits inh JOIN pg_class c ON c.oid = inh.inhrelid
+            WHERE inh.inhparent = 'task_history'::regclass
+              AND c.relname ~ '^task_history_[0-9]{4}_[0-9]{2}$'
+              AND to_date(substr(c.relname, 14), 'YYYY_MM')::timestamp < current_month - make_interval(months => retention_months)
+            ORDER BY c.relname
+        LOOP
+            EXECUTE format('ALTER TABLE task_history DETACH PARTITION %I', part_name);
+            action := 'detached';
+            partition_name := part_name;
+            RETURN NEXT;
+        END LOOP;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Partições iniciais: mês atual e os 3 seguintes
+SELECT * FROM maintain_task_history_partitions(3, 0);
+
+-- =========================================
+-- Indicadores do dashboard (GET /api/v1/stats)
+-- =========================================
+-- Contagens por dimensão, mantidas incrementalmente pelas escritas: cada statement soma +1/-1 (e o valor)
+-- a partir das transition tables, então a leitura do /stats não varre as tabelas.
+-- dimension = 'total' (bucket '') ou o nome da coluna agrupada (status, prioridade, responsavel, tipo).
+-- Cada contador é dividido em slots (counter_slot(), como table_versions): o valor é a soma dos slots.
+CREATE TABLE IF NOT EXISTS stats_counters (
+    table_name  TEXT NOT NULL,
+    dimension   TEXT NOT NULL,
+    bucket      TEXT NOT NULL,
+    slot        SMALLINT NOT NULL DEFAULT 0,
+    total       BIGINT NOT NULL DEFAULT 0,
+    amount      NUMERIC(16, 2) NOT NULL DEFAULT 0,   -- soma da coluna de valor (Atas/Vendas)
+    PRIMARY KEY (table_name, dimension, bucket, slot)
+);
+
+-- Bancos criados antes dos slots: os contadores existentes ficam no slot 0
+ALTER TABLE stats_counters ADD COLUMN IF NOT EXISTS slot SMALLINT NOT NULL DEFAULT 0;
+DO $$
+BEGIN
+    IF (SELECT cardinality(conkey) FROM pg_constraint WHERE conname = 'stats_counters_pkey') = 3 THEN
+        ALTER TABLE stats_counters DROP CONSTRAINT stats_counters_pkey, ADD PRIMARY KEY (table_name, dimension, bucket, slot);
+    END IF;
+END;
+$$;
+
+-- TG_ARGV[0]: coluna somada em amount ('' = nenhuma); TG_ARGV[1..]: colunas agrupadas.
+-- Trigger names sort after *_bump_version, so writers always lock table_versions first (no deadlocks).
+CREATE OR REPLACE FUNCTION maintain_stats_counters() RETURNS trigger AS $$
+DECLARE
+    amount_expr TEXT := CASE WHEN TG_ARGV[0] = '' THEN '0' ELSE format('%I', TG_ARGV[0]) END;
+    dimensions TEXT := '(''total'', '''')';
+    source TEXT;
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM stats_counters WHERE table_name = TG_TABLE_NAME;
+        RETURN NULL;
+    END IF;
+
+    FOR i IN 1 .. TG_NARGS - 1 LOOP
+        dimensions := dimensions || format(', (%L, r.%I::text)', TG_ARGV[i], TG_ARGV[i]);
+    END LOOP;
+
+    -- Only the transition tables of the current event exist
+    source := CASE TG_OP
+        WHEN 'INSERT' THEN format('SELECT 1 AS sign, %s AS amount, * FROM new_rows', amount_expr)
+        WHEN 'DELETE' THEN format('SELECT -1 AS sign, %s AS amount, * FROM old_rows', amount_expr)
+        ELSE format('SELECT 1 AS sign, %1$s AS amount, * FROM new_rows UNION ALL SELECT -1, %1$s, * FROM old_rows', amount_expr)
+    END;
+
+    -- Updates that do not touch a grouped column net out to zero and write nothing
+    EXECUTE format($sql$
+        INSERT INTO stats_counters AS c (table_name, dimension, bucket, slot, total, amount)
+        SELECT %L, d.dimension, coalesce(d.bucket, ''), counter_slot(), sum(r.sign), sum(r.sign * r.amount)
+        FROM (%s) AS r CROSS JOIN LATERAL (VALUES %s) AS d(dimension, bucket)
+        GROUP BY d.dimension, d.bucket
+        HAVING sum(r.sign) <> 0 OR sum(r.sign * r.amount) <> 0
+        ORDER BY d.dimension, d.bucket
+        ON CONFLICT (table_name, dimension, bucket, slot)
+        DO UPDATE SET total = c.total + EXCLUDED.total, amount = c.amount + EXCLUDED.amount
+    $sql$, TG_TABLE_NAME, source, dimensions);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recalcula os contadores de uma tabela do zero, todos no slot 0 (carga inicial, conferência ou compactação)
+CREATE OR REPLACE FUNCTION rebuild_stats_counters(target TEXT, amount_column TEXT, VARIADIC grouped TEXT[]) RETURNS void AS $$
+DECLARE
+    amount_expr TEXT := CASE WHEN amount_column = '' THEN '0' ELSE format('%I', amount_column) END;
+    dimensions TEXT := '(''total'', '''')';
+    column_name TEXT;
+BEGIN
+    FOREACH column_name IN ARRAY grouped LOOP
+        dimensions := dimensions || format(', (%L, r.%I::text)', column_name, column_name);
+    END LOOP;
+
+    DELETE FROM stats_counters WHERE table_name = target;
+    EXECUTE format($sql$
+        INSERT INTO stats_counters (table_name, dimension, bucket, total, amount)
+        SELECT %L, d.dimension, coalesce(d.bucket, ''), count(*), coalesce(sum(r.amount), 0)
+        FROM (SELECT %s AS amount, * FROM %I) AS r CROSS JOIN LATERAL (VALUES %s) AS d(dimension, bucket)
+        GROUP BY d.dimension, d.bucket
+    $sql$, target, amount_expr, target, dimensions);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables need one trigger per event
+CREATE OR REPLACE TRIGGER tasks_stats_insert AFTER INSERT ON tasks REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_stats_counters('', 'status', 'prioridade', 'responsavel');
+CREATE OR REPLACE TRIGGER tasks_stats_update AFTER UPDATE ON tasks REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_stats_counters('', 'status', 'prioridade', 'responsavel');
+CREATE OR REPLACE TRIGGER tasks_stats_delete AFTER DELETE ON tasks REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_stats_counters('', 'status', 'prioridade', 'responsavel');
+CREATE OR REPLACE TRIGGER tasks_stats_truncate AFTER TRUNCATE ON tasks
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_stats_counters('');
+
+CREATE OR REPLACE TRIGGER contacts_stats_insert AFTER INSERT ON contacts REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_stats_counters('', 'status', 'prioridade');
+CREATE OR REPLACE TRIGGER contacts_stats_update AFTER UPDATE ON contacts REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_stats_counters('', 'status', 'prioridade');
+CREATE OR REPLACE TRIGGER contacts_stats_delete AFTER DELETE ON contacts REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_stats_counters('', 'status', 'prioridade');
+CREATE OR REPLACE TRIGGER contacts_stats_truncate AFTER TRUNCATE ON contacts
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_stats_counters('');
+
+CREATE OR REPLACE TRIGGER minutes_stats_insert AFTER INSERT ON minutes REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_stats_counters('valor_utilizado', 'status');
+CREATE OR REPLACE TRIGGER minutes_stats_update AFTER UPDATE ON minutes REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_stats_counters('valor_utilizado', 'status');
+CREATE OR REPLACE TRIGGER minutes_stats_delete AFTER DELETE ON minutes REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_stats_counters('valor_utilizado', 'status');
+CREATE OR REPLACE TRIGGER minutes_stats_truncate AFTER TRUNCATE ON minutes
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_stats_counters('');
+
+CREATE OR REPLACE TRIGGER sales_stats_insert AFTER INSERT ON sales REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_stats_counters('valor_total', 'status', 'tipo');
+CREATE OR REPLACE TRIGGER sales_stats_update AFTER UPDATE ON sales REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_stats_counters('valor_total', 'status', 'tipo');
+CREATE OR REPLACE TRIGGER sales_stats_delete AFTER DELETE ON sales REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_stats_counters('valor_total', 'status', 'tipo');
+CREATE OR REPLACE TRIGGER sales_stats_truncate AFTER TRUNCATE ON sales
+    FOR EACH STATEMENT EXECUTE FUNCTION maintain_stats_counters('');
+
+-- Carga inicial dos contadores (idempotente: mesmas colunas dos triggers acima)
+SELECT rebuild_stats_counters('tasks', '', 'status', 'prioridade', 'responsavel');
+SELECT rebuild_stats_counters('contacts', '', 'status', 'prioridade');
+SELECT rebuild_stats_counters('minutes', 'valor_utilizado', 'status');
+SELECT rebuild_stats_counters('sales', 'valor_total', 'status', 'tipo');
+
+-- Indicadores dependentes da data (calculados na leitura): tarefas em aberto vencidas, por responsável
+CREATE INDEX IF NOT EXISTS tasks_open_data_limite_idx ON tasks (data_limite, responsavel) WHERE status <> 'Concluída';
+
+-- =========================================
+-- Agendador de status por data (src/services/scheduler.py)
+-- =========================================
+-- Only rows the set-based UPDATEs can still change: open tasks/contacts and Atas not yet expired
+CREATE INDEX IF NOT EXISTS contacts_open_data_follow_up_idx ON contacts (data_follow_up) WHERE status <> 'Concluído';
+CREATE INDEX IF NOT EXISTS minutes_open_vigencia_final_idx ON minutes (vigencia_final) WHERE status <> 'Expirada';
+
+-- Uma linha por execução do líder: linhas alteradas por regra e tempo total
+CREATE TABLE IF NOT EXISTS scheduler_runs (
+    run_id        BIGSERIAL PRIMARY KEY,
+    worker_pid    INT NOT NULL,
+    started_at    TIMESTAMPTZ NOT NULL,
+    duration_ms   NUMERIC(10, 1) NOT NULL,
+    rows_touched  JSONB NOT NULL                  -- {"tasks_overdue": 3, ...}
+);
+
+CREATE INDEX IF NOT EXISTS scheduler_runs_started_at_idx ON scheduler_runs (started_at);
+
+-- =========================================
+-- Outbox de eventos para o n8n (gravada na mesma transação da tarefa)
+-- =========================================
+CREATE TABLE IF NOT EXISTS outbox_events (
+    event_id         BIGSERIAL PRIMARY KEY,
+    event_key        UUID NOT NULL UNIQUE DEFAULT gen_random_uuid(),  -- chave de idempotência enviada ao webhook
+    event_type       TEXT NOT NULL,                                   -- task.created / task.updated
+    aggregate_id     UUID NOT NULL,
+    payload          JSONB NOT NULL,
+    status           TEXT NOT NULL DEFAULT 'pending',                 -- pending / delivered / superseded / dead
+    attempts         INT NOT NULL DEFAULT 0,
+    next_attempt_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+    last_error       TEXT,
+    created_at       TIMESTAMPTZ NOT NULL DEFAULT now(),
+    delivered_at     TIMESTAMPTZ
+);
+
+-- Claim do dispatcher: só as pendentes, na ordem de vencimento
+CREATE INDEX IF NOT EXISTS outbox_events_pending_idx ON outbox_events (next_attempt_at, event_id) WHERE status = 'pending';
+-- Dead-letter para inspeção/reenvio manual
+CREATE INDEX IF NOT EXISTS outbox_events_dead_idx ON outbox_events (created_at) WHERE status = 'dead';
@@ -0,0 +1,200 @@
+import re
+import time
+import threading
+from collections import deque
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.util.request import ACCEPT_ENCODING
+
+from .config import (
+    API_BASE_URL, API_CONNECT_TIMEOUT, API_READ_TIMEOUT, API_GET_RETRIES, API_RETRY_BACKOFF,
+    API_POOL_MAXSIZE, API_BREAKER_THRESHOLD, API_BREAKER_COOLDOWN,
+)
+
+# Shared HTTP client for every front-end -> API call
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """A API falhou repetidamente: as chamadas falham imediatamente até o fim do cooldown."""
+
+
+class CircuitBreaker:
+    """Abre após ``threshold`` falhas seguidas; depois de ``cooldown`` segundos deixa uma chamada de teste passar."""
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half-open" if time.monotonic() - self._opened_at >= self.cooldown else "open"
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.cooldown or self._trial_in_flight:
+                raise CircuitOpenError("API indisponível (circuit breaker aberto). Tentando novamente em instantes.")
+            self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class LatencyStats:
+    """Contagem, erros e latências (média, máx. e p95 das últimas chamadas) por rota."""
+
+    WINDOW = 200
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, route, elapsed, ok):
+        with self._lock:
+            stats = self._routes.setdefault(route, {"count": 0, "errors": 0, "total": 0.0, "max": 0.0, "recent": deque(maxlen=self.WINDOW)})
+            stats["count"] += 1
+            stats["errors"] += 0 if ok else 1
+            stats["total"] += elapsed
+            stats["max"] = max(stats["max"], elapsed)
+            stats["recent"].append(elapsed)
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for route, stats in self._routes.items():
+                recent = sorted(stats["recent"])
+                p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0
+                result[route] = {
+                    "count": stats["count"],
+                    "errors": stats["errors"],
+                    "avg_ms": round(stats["total"] * 1000 / stats["count"], 1),
+                    "p95_ms": round(p95 * 1000, 1),
+                    "max_ms": round(stats["max"] * 1000, 1),
+                }
+            return result
+
+
+class EncodingStats:
+    """Respostas por Content-Encoding recebido e bytes trafegados (comprimidos) x decodificados."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._encodings = {}
+
+    def record(self, response):
+        encoding = response.headers.get("Content-Encoding", "identity")
+        wire = response.headers.get("Content-Length")
+        with self._lock:
+            stats = self._encodings.setdefault(encoding, {"responses": 0, "wire_bytes": 0, "decoded_bytes": 0})
+            stats["responses"] += 1
+            # Content-Length is the encoded size; response.content is already decoded by urllib3
+            stats["wire_bytes"] += int(wire) if wire and wire.isdigit() else len(response.content)
+            stats["decoded_bytes"] += len(response.content)
+
+    def snapshot(self):
+        with self._lock:
+            return {encoding: dict(stats) for encoding, stats in self._encodings.items()}
+
+
+class ApiClient:
+    """Sessão HTTP keep-alive com pool de conexões, timeouts, retry com backoff (só GET) e circuit breaker."""
+
+    def __init__(self, base_url=API_BASE_URL):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (API_CONNECT_TIMEOUT, API_READ_TIMEOUT)
+        self.breaker = CircuitBreaker(API_BREAKER_THRESHOLD, API_BREAKER_COOLDOWN)
+        self.latency = LatencyStats()
+        self.encodings = EncodingStats()
+
+        # Only idempotent GETs are retried; POST/PUT go out exactly once
+        retry = Retry(
+            total=API_GET_RETRIES,
+            backoff_factor=API_RETRY_BACKOFF,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False,
+        )
+        self.session = requests.Session()
+        # gzip/deflate always; br and zstd only when the decoders (brotli, zstandard) are installed
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        # One session serves every Streamlit user: it must never keep cookies (e.g. the API's last-write LSN);
+        # per-user state goes in headers built from st.session_state
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=API_POOL_MAXSIZE, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @staticmethod
+    def route_name(method, path):
+        # Collapse ids so PUT tasks/<uuid> is reported as a single route
+        return f"{method} /{re.sub(r'[0-9a-fA-F-]{32,36}', '{id}', path.strip('/'))}"
+
+    def request(self, method, path, **kwargs):
+        self.breaker.before_call()
+        kwargs.setdefault("timeout", self.timeout)
+        route = self.route_name(method, path)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, f"{self.base_url}/{path.lstrip('/')}", **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            self.latency.record(route, time.perf_counter() - start, ok=False)
+            self.breaker.record_failure()
+            raise
+        ok = response.status_code < 500
+        self.latency.record(route, time.perf_counter() - start, ok=ok)
+        if not kwargs.get("stream"):
+            # Streamed bodies are not read here
+            self.encodings.record(response)
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def patch(self, path, **kwargs):
+        return self.request("PATCH", path, **kwargs)
+
+    def metrics(self):
+        return {
+            "circuit_breaker": self.breaker.state,
+            "accept_encoding": self.session.headers["Accept-Encoding"],
+            "encodings": self.encodings.snapshot(),
+            "routes": self.latency.snapshot(),
+        }
+
+
+@st.cache_resource
+def get_api_client():
+    """Cliente único por processo do Streamlit: as conexões keep-alive são reaproveitadas entre sessões."""
+    return ApiClient()
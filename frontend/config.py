@@ -1,3 +1,4 @@
+import os
 import streamlit as st
 from datetime import datetime
 
@@ -15,13 +16,45 @@ STATUS_CONTATOS = ['Aberto', 'Concluído', 'Atrasado', 'Follow-up Pendente']
 STATUS_ATAS = ['Vigente', 'Vencendo (60d)', 'Uso Crítico', 'Expirada']
 STATUS_VENDAS = ['Ganha', 'Perdida', 'Em Negociação']
 PRIORIDADES = ['Alta', 'Média', 'Baixa']
+TIPOS_VENDA = ['Licitação', 'Entrega Direta', 'Assessoria']
 
 # Modules and endpoints mapping
 MODULES = ['Tarefas', 'Contatos', 'Atas', 'Vendas']
 MODULE_ICONS = {'Tarefas': '📋', 'Contatos': '👥', 'Atas': '⚖️', 'Vendas': '📈'}
 
-# Endpoint da API (Ajuste para o endereço real da sua VPS)
-API_BASE_URL = "http://localhost:8000/api/v1" 
+# Listagem: tabela única paginada (padrão) ou o layout antigo com st.columns por linha
+TABLE_RENDER_MODES = ['Tabela', 'Linhas (legado)']
+TABLE_PAGE_SIZES = [50, 100, 250, 500]
+# Cores de fundo por prioridade na tabela (mesmas das faixas .priority-* do CSS)
+PRIORITY_ROW_COLORS = {'Alta': '#fee2e2', 'Média': '#fffbe6', 'Baixa': '#eff6ff'}
+
+# Módulos com change feed na API (GET <endpoint>/changes): após o TTL só as linhas alteradas são buscadas
+CHANGE_FEED_MODULES = ['Tarefas']
+
+# Módulos com PATCH + If-Match na API: a edição envia só os campos alterados e detecta conflitos
+PATCH_MODULES = ['Tarefas']
+
+# Busca ranqueada no servidor (GET <endpoint>/search): mínimo de caracteres e linhas por página
+SEARCH_MODULES = ['Tarefas']
+SEARCH_MIN_CHARS = 3
+SEARCH_PAGE_SIZE = 50
+
+# Endpoint da API (Ajuste para o endereço real da sua VPS, ou defina API_BASE_URL no ambiente)
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000/api/v1")
+
+# Cliente HTTP da API: timeouts (s), retry com backoff só para GET e circuit breaker
+API_CONNECT_TIMEOUT = 3.05
+API_READ_TIMEOUT = 15
+API_GET_RETRIES = 2
+API_RETRY_BACKOFF = 0.3
+API_POOL_MAXSIZE = 20
+API_BREAKER_THRESHOLD = 5
+API_BREAKER_COOLDOWN = 30
+
+# Segundos em que o DataFrame em cache é usado sem consultar a API; depois revalida com If-None-Match (ETag)
+DATA_CACHE_TTL = 30
+# Teto de memória do cache de DataFrames compartilhado entre as sessões (LRU acima disso)
+SHARED_CACHE_MAX_MB = 256
 
 # CSS Style injections for streamlit
 CSS_INJECTIONS = """
@@ -0,0 +1,196 @@
+import time
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+
+from .config import DATA_CACHE_TTL, SHARED_CACHE_MAX_MB
+from .schema import align_categories
+
+# Process-wide DataFrame cache shared by every Streamlit session
+
+
+def parse_lsn(text):
+    """``'16/B374D848'`` -> posição no WAL em bytes; 0 se vazio ou inválido."""
+    try:
+        high, low = text.strip().split("/")
+        return (int(high, 16) << 32) | int(low, 16)
+    except (AttributeError, ValueError):
+        return 0
+
+
+class CacheEntry:
+    """DataFrame de um módulo/consulta com seus validadores HTTP (ETag), a posição no change feed
+    e o tamanho em memória."""
+
+    __slots__ = ("df", "etag", "last_modified", "change_cursor", "fetched_at", "nbytes")
+
+    def __init__(self, df, etag=None, last_modified=None, fetched_at=None, change_cursor=None):
+        self.df = df
+        self.etag = etag
+        self.last_modified = last_modified
+        self.change_cursor = change_cursor
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+        self.nbytes = int(df.memory_usage(deep=True).sum()) if not df.empty else 0
+
+    def fresh(self, ttl):
+        return time.time() - self.fetched_at < ttl
+
+
+class SharedDataCache:
+    """Cache LRU thread-safe de DataFrames por (módulo, consulta), com TTL e teto de memória.
+
+    Os DataFrames guardados são tratados como imutáveis: atualizações criam uma cópia e trocam a
+    entrada, então sessões que já estão renderizando a versão anterior não são afetadas.
+    """
+
+    def __init__(self, ttl=DATA_CACHE_TTL, max_bytes=SHARED_CACHE_MAX_MB * 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._fetch_locks = {}
+        self._bytes = 0
+        # Highest X-Last-Write-LSN returned to any session: entries are shared, so every refresh must
+        # read a replica that already has the newest write patched into them
+        self._write_lsn = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(module_name, params=None):
+        return (module_name, tuple(sorted((params or {}).items())))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return entry
+
+    def fetch_lock(self, key):
+        """Lock por chave: só uma sessão busca/revalida um módulo por vez, as demais reaproveitam."""
+        with self._lock:
+            return self._fetch_locks.setdefault(key, threading.Lock())
+
+    def put(self, key, entry: CacheEntry):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = entry
+            self._bytes += entry.nbytes
+            # LRU eviction, but never drop the entry just stored
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def note_write_lsn(self, lsn):
+        """Registra o LSN de uma escrita (de qualquer sessão); mantém só o maior."""
+        with self._lock:
+            if parse_lsn(lsn) > parse_lsn(self._write_lsn):
+                self._write_lsn = lsn
+
+    @property
+    def write_lsn(self):
+        return self._write_lsn
+
+    def touch(self, key):
+        """Marca a entrada como recém-validada (resposta 304)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.fetched_at = time.time()
+
+    def expire_module(self, module_name):
+        """Força a revalidação de todas as consultas do módulo na próxima leitura."""
+        with self._lock:
+            for key, entry in self._entries.items():
+                if key[0] == module_name:
+                    entry.fetched_at = 0
+
+    def patch_row(self, module_name, row_df, id_column='ID'):
+        """Aplica uma linha criada/atualizada (já convertida para o formato do front) em todas as
+        consultas em cache do módulo, sem nova busca à API. Retorna False se não havia o que atualizar."""
+        patched = False
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == module_name]
+        for key in keys:
+            if key[1]:
+                # Filtered queries may or may not include the row: just revalidate them
+                with self._lock:
+                    if key in self._entries:
+                        self._entries[key].fetched_at = 0
+                continue
+            with self.fetch_lock(key):
+                patched = self._patch_entry(key, row_df, id_column) or patched
+        return patched
+
+    def _patch_entry(self, key, row_df, id_column):
+        entry = self.get(key)
+        if entry is None or entry.df.empty or id_column not in entry.df.columns:
+            return False
+        df = merge_rows(entry.df, row_df, id_column)
+        self.put(key, CacheEntry(df, entry.etag, entry.last_modified, entry.fetched_at, entry.change_cursor))
+        return True
+
+    def apply_changes(self, key, rows_df, change_cursor, id_column='ID'):
+        """Aplica as linhas vindas do change feed na entrada e avança o cursor (chamar com o fetch_lock).
+
+        A ETag deixa de valer (o DataFrame não corresponde mais a uma resposta inteira da API).
+        Retorna False se a entrada não existe mais."""
+        entry = self.get(key)
+        if entry is None:
+            return False
+        df = entry.df
+        if not rows_df.empty:
+            df = merge_rows(df, rows_df, id_column) if not df.empty else rows_df.reset_index(drop=True)
+        self.put(key, CacheEntry(df, None if not rows_df.empty else entry.etag, entry.last_modified, change_cursor=change_cursor))
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def merge_rows(df, rows_df, id_column='ID'):
+    """Upsert de ``rows_df`` em ``df`` pela coluna de ID (retorna um novo DataFrame).
+
+    Linhas existentes são atualizadas nas colunas presentes em ``rows_df`` e as novas vão para o
+    final; se o mesmo ID vier repetido, vale a última ocorrência."""
+    # Grow categorical columns first so new values (e.g. a new status) are not lost
+    df = align_categories(df, rows_df)
+    incoming = rows_df[id_column].astype(str)
+    rows_df = rows_df[~incoming.duplicated(keep='last').to_numpy()]
+    incoming = rows_df[id_column].astype(str)
+    positions = pd.Series(df.index, index=df[id_column].astype(str))
+    matched = incoming.isin(positions.index).to_numpy()
+    columns = rows_df.columns.intersection(df.columns)
+    if matched.any():
+        # Columns absent from the API payload are left untouched
+        target = positions.loc[incoming[matched]].to_numpy()
+        for col in columns:
+            df.loc[target, col] = rows_df.loc[matched, col].to_numpy()
+    if not matched.all():
+        new_rows = rows_df.loc[~matched, columns].astype({col: df[col].dtype for col in columns})
+        df = pd.concat([df, new_rows], ignore_index=True)
+    return df
+
+
+@st.cache_resource
+def get_shared_cache():
+    """Instância única do cache no processo do Streamlit (compartilhada entre sessões)."""
+    return SharedDataCache()
@@ -1,8 +1,12 @@
 import pandas as pd
 import streamlit as st
 import requests
+import time
 from datetime import datetime
-from .config import API_BASE_URL, TEAM_MEMBERS, STATUS_TAREFAS, STATUS_CONTATOS, STATUS_ATAS, STATUS_VENDAS
+from .config import TEAM_MEMBERS, STATUS_TAREFAS, STATUS_CONTATOS, STATUS_ATAS, STATUS_VENDAS, CHANGE_FEED_MODULES, DATA_CACHE_TTL, SEARCH_PAGE_SIZE, PATCH_MODULES
+from .data_cache import get_shared_cache, CacheEntry, parse_lsn
+from .api_client import get_api_client
+from .schema import apply_schema, to_payload, changed_payload
 
 # Complementary functions for data management in Streamlit
 
@@ -28,95 +32,234 @@ def initialize_session_state():
         st.session_state['auth_token'] = None
     if 'current_user' not in st.session_state:
         st.session_state['current_user'] = None
-    if 'data_cache' not in st.session_state:
-        st.session_state['data_cache'] = {}
 
 # Comunication functions with the API
 
 def get_api_headers():
-    """Retorna cabeçalhos com o token JWT."""
+    """Retorna cabeçalhos com o token JWT e o LSN da escrita mais recente (X-Last-Write-LSN)."""
+    headers = {"Content-Type": "application/json"}
     token = st.session_state.get('auth_token')
     if token:
-        return {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-    return {"Content-Type": "application/json"}
+        headers["Authorization"] = f"Bearer {token}"
+    # The API client is shared by every user, so the LSN travels as a header, never a cookie. Reads feed
+    # caches shared by every session: the newest write of any session counts, not only this one's
+    last_write_lsn = max(
+        (lsn for lsn in (st.session_state.get('last_write_lsn'), get_shared_cache().write_lsn) if lsn),
+        key=parse_lsn, default=None,
+    )
+    if last_write_lsn:
+        headers["X-Last-Write-LSN"] = last_write_lsn
+    return headers
+
+def remember_write_lsn(response):
+    """Guarda o LSN devolvido por uma escrita (na sessão e no cache compartilhado): as leituras
+    seguintes só vão a réplicas em dia com ele."""
+    lsn = response.headers.get("X-Last-Write-LSN")
+    if lsn:
+        st.session_state['last_write_lsn'] = lsn
+        get_shared_cache().note_write_lsn(lsn)
+
+def expire_session():
+    """Token expirado ou inválido (401): volta para o login."""
+    st.session_state.update({'logged_in': False, 'page': 'login', 'auth_token': None})
+    st.warning("Sua sessão expirou. Faça login novamente.")
 
 def get_endpoint(module_name):
     """Mapeia o nome do módulo para o endpoint da API."""
     return {'Tarefas': 'tasks', 'Contatos': 'contacts', 'Atas': 'minutes', 'Vendas': 'sales'}.get(module_name, module_name.lower())
 
 
-def fetch_data_from_api(module_name):
-    """Busca dados do módulo da API e armazena em cache."""
-    if module_name in st.session_state['data_cache']:
-        return st.session_state['data_cache'][module_name]
+def to_dataframe(module_name, payload):
+    """Converte a resposta da API no DataFrame tipado da UI (schema declarado em schema.py).
 
-    endpoint = get_endpoint(module_name)
-    url = f"{API_BASE_URL}/{endpoint}"
-    
+    Aceita o layout colunar ({"format": "columns", "columns": {...}}), que vira DataFrame sem
+    parsing linha a linha, o layout arrays ({"format": "arrays", "columns": [...], "rows": [[...]]})
+    ou a lista de registros tradicional.
+    """
+    if isinstance(payload, dict) and payload.get('format') == 'columns':
+        df = pd.DataFrame(payload['columns'])
+    elif isinstance(payload, dict) and payload.get('format') == 'arrays':
+        df = pd.DataFrame(payload['rows'], columns=payload['columns'])
+    else:
+        df = pd.DataFrame(payload)
+    return apply_schema(module_name, df)
+
+def invalidate_module_cache(module_name):
+    """Força a revalidação do módulo na próxima leitura (mantém o DataFrame para reaproveitar em 304)."""
+    get_shared_cache().expire_module(module_name)
+
+
+def fetch_changes(module_name, key, cached, headers):
+    """Aplica no DataFrame em cache só as linhas alteradas desde o último cursor do change feed.
+
+    Retorna None quando é preciso recarregar a lista inteira (erro, cursor rejeitado ou alterações demais)."""
+    cache = get_shared_cache()
     try:
-        response = requests.get(url, headers=get_api_headers())
-        response.raise_for_status() 
-        raw_data = response.json()
-        df = pd.DataFrame(raw_data)
-
-        # Rename column database (snake_case) for front-end (Title Case)
-        if module_name == 'Tarefas':
-            df = df.rename(columns={'task_id': 'ID', 'descricao': 'Descrição', 'data_limite': 'Data Limite', 'data_criacao': 'Data Criação'})
-        # Data conversion for date fields
-        for col in df.columns:
-            if 'data' in col.lower() and df[col].dtype == 'object':
-                 try:
-                    df[col] = pd.to_datetime(df[col]).dt.date
-                 except ValueError:
-                    pass
-        
-        st.session_state['data_cache'][module_name] = df
-        return df
-        
-    except requests.exceptions.ConnectionError:
-        st.error("Erro de Conexão: O Back-end da API não está rodando ou está inacessível.")
-        return pd.DataFrame()
-    except requests.exceptions.RequestException as e:
-        error_detail = response.json().get('detail', str(e)) if 'response' in locals() and response.content else str(e)
-        st.error(f"Erro na API (Status {response.status_code if 'response' in locals() else 'N/A'}): {error_detail}")
-        return pd.DataFrame()
+        response = get_api_client().get(f"{get_endpoint(module_name)}/changes", headers=headers, params={'since': cached.change_cursor})
+    except requests.exceptions.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+    payload = response.json()
+    if payload.get('reset'):
+        return None
+    changes = to_dataframe(module_name, payload['changes']) if payload['changes'] else pd.DataFrame()
+    if not cache.apply_changes(key, changes, payload['cursor']):
+        return None
+    return cache.get(key).df
+
+
+def fetch_data_from_api(module_name, params=None):
+    """Busca dados do módulo da API via cache compartilhado entre sessões; após o TTL aplica só as
+    alterações do change feed (quando disponível) ou revalida via ETag."""
+    cache = get_shared_cache()
+    key = cache.make_key(module_name, params)
+    cached = cache.get(key)
+    if cached is not None and cached.fresh(cache.ttl):
+        return cached.df
+
+    # One session (re)fetches a given key at a time; the others wait and reuse its result
+    with cache.fetch_lock(key):
+        cached = cache.get(key)
+        if cached is not None and cached.fresh(cache.ttl):
+            return cached.df
+
+        endpoint = get_endpoint(module_name)
+        headers = get_api_headers()
+        # Unfiltered list with a change feed: O(changes) refresh instead of reloading the whole module
+        if cached is not None and cached.change_cursor and not params and module_name in CHANGE_FEED_MODULES:
+            df = fetch_changes(module_name, key, cached, headers)
+            if df is not None:
+                return df
+        if cached is not None and cached.etag:
+            headers['If-None-Match'] = cached.etag
 
+        try:
+            # Columnar payload: loads straight into a DataFrame (ignored by endpoints without it)
+            request_params = {**(params or {}), 'layout': 'columns'}
+            response = get_api_client().get(endpoint, headers=headers, params=request_params)
+            if response.status_code == 304 and cached is not None:
+                # Nothing changed on the server: reuse the cached DataFrame
+                cache.touch(key)
+                return cached.df
+            if response.status_code == 401:
+                expire_session()
+                return pd.DataFrame()
+            response.raise_for_status() 
+            df = to_dataframe(module_name, response.json())
 
-def handle_save_api(data, is_editing, item_id):
-    """Lógica para salvar e atualizar via API."""
+            cache.put(key, CacheEntry(df, response.headers.get('ETag'), response.headers.get('Last-Modified'), change_cursor=response.headers.get('X-Change-Cursor')))
+            return df
+
+        except requests.exceptions.ConnectionError:
+            st.error("Erro de Conexão: O Back-end da API não está rodando ou está inacessível.")
+            return pd.DataFrame()
+        except requests.exceptions.RequestException as e:
+            error_detail = response.json().get('detail', str(e)) if 'response' in locals() and response.content else str(e)
+            st.error(f"Erro na API (Status {response.status_code if 'response' in locals() else 'N/A'}): {error_detail}")
+            return pd.DataFrame()
+
+
+@st.cache_data(ttl=DATA_CACHE_TTL, show_spinner=False)
+def _load_stats(_headers):
+    # No hashed arguments: one cached copy shared by every session (the API side is cached by ETag too)
+    response = get_api_client().get("stats", headers=_headers)
+    response.raise_for_status()
+    return response.json()
+
+def fetch_stats():
+    """Indicadores do cabeçalho (GET /stats), calculados no servidor. Retorna None se a API falhar."""
+    try:
+        return _load_stats(get_api_headers())
+    except requests.exceptions.HTTPError as e:
+        if e.response is not None and e.response.status_code == 401:
+            expire_session()
+        return None
+    except requests.exceptions.RequestException:
+        return None
+
+
+@st.cache_data(ttl=DATA_CACHE_TTL, show_spinner=False)
+def _load_search_page(_headers, endpoint, query, cursor):
+    # Keyed by (endpoint, query, cursor): re-running the script with the same search costs no API call
+    params = {'q': query, 'limit': SEARCH_PAGE_SIZE}
+    if cursor:
+        params['cursor'] = cursor
+    response = get_api_client().get(f"{endpoint}/search", headers=_headers, params=params)
+    response.raise_for_status()
+    return response.json(), response.headers.get('X-Next-Cursor')
+
+def search_module(module_name, query, pages=1):
+    """Busca ranqueada no servidor (GET <endpoint>/search), ``pages`` páginas de SEARCH_PAGE_SIZE.
+
+    Retorna (DataFrame na ordem de relevância, há mais resultados) ou (None, False) se a API falhar."""
+    rows, cursor = [], None
+    try:
+        for _ in range(pages):
+            page, cursor = _load_search_page(get_api_headers(), get_endpoint(module_name), query, cursor)
+            rows.extend(page)
+            if not cursor:
+                break
+    except requests.exceptions.HTTPError as e:
+        if e.response is not None and e.response.status_code == 401:
+            expire_session()
+        return None, False
+    except requests.exceptions.RequestException:
+        return None, False
+    return to_dataframe(module_name, rows), cursor is not None
+
+
+def handle_save_api(data, is_editing, item_id, original=None):
+    """Lógica para salvar e atualizar via API.
+
+    ``original``: registro aberto no formulário (nomes da UI); nos módulos de PATCH_MODULES a edição
+    envia só a diferença, condicionada à versão lida (If-Match)."""
     module = st.session_state['active_module']
     endpoint = get_endpoint(module)
-    url = f"{API_BASE_URL}/{endpoint}"
     
-    # Data front-end mapping for API payload (snake_case)
-    payload = {}
-    if module == 'Tarefas':
-        payload = {
-            'descricao': data.get('Descrição'),
-            'responsavel': data.get('Responsável'),
-            # Data convert for ISO 8601 (String)
-            'data_limite': data.get('Data Limite').isoformat(), 
-            'status': data.get('Status'),
-            'prioridade': data.get('Prioridade'),
-            'observacoes': data.get('Observações', '')
-        }
-    # Adicionar lógica de payload para Contatos, Atas e Vendas aqui...
+    # Data front-end mapping for API payload (snake_case, dates as ISO 8601), declared in schema.py
+    payload = to_payload(module, data)
 
     try:
-        if is_editing:
+        if is_editing and module in PATCH_MODULES and original is not None:
+            payload = changed_payload(module, data, original)
+            if not payload:
+                st.info("Nenhuma alteração para salvar.")
+                return
+            version = original.get('Versão')
+            if version is None or pd.isna(version):
+                # The API requires If-Match: a row cached without its version must be reloaded first
+                st.toast("Não foi possível identificar a versão deste registro. Os dados foram recarregados; salve novamente.", icon="⚠️")
+                invalidate_module_cache(module)
+                st.rerun()
+            headers = get_api_headers()
+            headers['If-Match'] = f'"{int(version)}"'
+            response = get_api_client().patch(f"{endpoint}/{item_id}", headers=headers, json=payload)
+            if response.status_code in (412, 428):
+                # Someone else saved first: reload so the form shows their version
+                st.toast("Este registro foi alterado por outra pessoa. Os dados foram recarregados; revise e salve novamente.", icon="⚠️")
+                invalidate_module_cache(module)
+                st.rerun()
+            success_msg = f"{module.rstrip('s')} atualizada via API com sucesso!"
+        elif is_editing:
             # PUT for update
-            url = f"{url}/{item_id}"
-            response = requests.put(url, headers=get_api_headers(), json=payload)
+            response = get_api_client().put(f"{endpoint}/{item_id}", headers=get_api_headers(), json=payload)
             success_msg = f"{module.rstrip('s')} atualizada via API com sucesso!"
         else:
             # POST for create
-            response = requests.post(url, headers=get_api_headers(), json=payload)
+            response = get_api_client().post(endpoint, headers=get_api_headers(), json=payload)
             success_msg = f"Nova {module.rstrip('s')} criada. n8n acionado!"
-            
+
+        if response.status_code == 401:
+            expire_session()
+            return
         response.raise_for_status()
+        remember_write_lsn(response)
         
         st.toast(success_msg, icon="👍")
-        del st.session_state['data_cache'][module]  # Clear cache to refetch updated data
+        # Patch the saved row into the shared cache instead of refetching the whole module
+        if not get_shared_cache().patch_row(module, to_dataframe(module, [response.json()])):
+            invalidate_module_cache(module)
         st.rerun()
 
     except requests.exceptions.RequestException as e:
@@ -0,0 +1,138 @@
+import pandas as pd
+from datetime import datetime
+from pandas.api.types import CategoricalDtype
+
+from .config import TEAM_MEMBERS, STATUS_TAREFAS, STATUS_CONTATOS, STATUS_ATAS, STATUS_VENDAS, PRIORIDADES, TIPOS_VENDA
+
+# Read-only columns (filled by the database), never sent back to the API
+READ_ONLY_COLUMNS = ('ID', 'Data Criação', 'Versão')
+
+# Declared per-module schema: API column -> (UI column, dtype)
+# dtype: 'string', 'int', 'float', 'date' (datetime64), 'datetime' (datetime64, UTC) or a list of known categories.
+# Categories not in the list (e.g. a new team member) are appended instead of becoming NaN.
+MODULE_SCHEMAS = {
+    'Tarefas': {
+        'task_id': ('ID', 'string'),
+        'descricao': ('Descrição', 'string'),
+        'responsavel': ('Responsável', TEAM_MEMBERS),
+        'data_limite': ('Data Limite', 'date'),
+        'status': ('Status', STATUS_TAREFAS),
+        'prioridade': ('Prioridade', PRIORIDADES),
+        'observacoes': ('Observações', 'string'),
+        'data_criacao': ('Data Criação', 'datetime'),
+        'row_version': ('Versão', 'int'),
+    },
+    'Contatos': {
+        'contact_id': ('ID', 'string'),
+        'pessoa_orgao': ('Pessoa/Órgão', 'string'),
+        'motivo': ('Motivo', 'string'),
+        'data_follow_up': ('Data Follow-up', 'date'),
+        'responsavel': ('Responsável', TEAM_MEMBERS),
+        'status': ('Status', STATUS_CONTATOS),
+        'prioridade': ('Prioridade', PRIORIDADES),
+        'observacoes': ('Observações', 'string'),
+        'data_criacao': ('Data Criação', 'datetime'),
+    },
+    'Atas': {
+        'minute_id': ('ID', 'string'),
+        'orgao': ('Órgão/Entidade', 'string'),
+        'objeto': ('Objeto/Itens', 'string'),
+        'valor_utilizado': ('Valor Utilizado (R$)', 'float'),
+        'vigencia_final': ('Vigência Final', 'date'),
+        'status': ('Status', STATUS_ATAS),
+        'prioridade': ('Prioridade', PRIORIDADES),
+        'data_criacao': ('Data Criação', 'datetime'),
+    },
+    'Vendas': {
+        'sale_id': ('ID', 'string'),
+        'tipo': ('Tipo', TIPOS_VENDA),
+        'cliente': ('Cliente/Órgão', 'string'),
+        'valor_total': ('Valor Total (R$)', 'float'),
+        'data_venda': ('Data da Venda', 'date'),
+        'responsavel': ('Responsável', TEAM_MEMBERS),
+        'status': ('Status', STATUS_VENDAS),
+        'data_criacao': ('Data Criação', 'datetime'),
+    },
+}
+
+
+def _categorical(series, known):
+    values = series.astype('string')
+    extra = [value for value in pd.unique(values.dropna()) if value not in known]
+    return values.astype(CategoricalDtype(list(known) + sorted(extra)))
+
+
+def convert_column(series, dtype):
+    """Converte uma coluna inteira de uma vez (sem loop por linha)."""
+    if dtype == 'date':
+        return pd.to_datetime(series, format='ISO8601', errors='coerce')
+    if dtype == 'datetime':
+        return pd.to_datetime(series, format='ISO8601', errors='coerce', utc=True)
+    if dtype == 'string':
+        return series.astype('string')
+    if dtype == 'int':
+        return pd.to_numeric(series, errors='coerce').astype('Int64')
+    if dtype == 'float':
+        return pd.to_numeric(series, errors='coerce').astype('Float64')
+    return _categorical(series, dtype)
+
+
+def apply_schema(module_name, df):
+    """Renomeia e tipa todas as colunas declaradas do módulo em uma única passada."""
+    schema = MODULE_SCHEMAS.get(module_name)
+    if schema is None:
+        return df
+    present = {col: spec for col, spec in schema.items() if col in df.columns}
+    converted = {ui_name: convert_column(df[col], dtype) for col, (ui_name, dtype) in present.items()}
+    # Undeclared columns are kept as they came
+    others = {col: df[col] for col in df.columns if col not in present}
+    return pd.DataFrame({**converted, **others}, index=df.index)
+
+
+def align_categories(df, other):
+    """Une as categorias de ``df`` e ``other`` coluna a coluna (para concat/atualização sem virar object)."""
+    df = df.copy()
+    for col in df.columns:
+        if isinstance(df[col].dtype, CategoricalDtype) and col in other.columns:
+            new = [value for value in pd.unique(other[col].dropna().astype('string')) if value not in df[col].cat.categories]
+            if new:
+                df[col] = df[col].cat.add_categories(new)
+    return df
+
+
+def to_payload(module_name, form_data):
+    """Converte os campos do formulário (nomes da UI) no corpo JSON da API (nomes das colunas)."""
+    payload = {}
+    for col, (ui_name, dtype) in MODULE_SCHEMAS.get(module_name, {}).items():
+        if ui_name not in form_data or ui_name in READ_ONLY_COLUMNS:
+            continue
+        value = form_data[ui_name]
+        # Dates go out as ISO 8601 strings
+        if dtype in ('date', 'datetime') and value is not None:
+            value = value.isoformat()
+        payload[col] = value
+    return payload
+
+
+
+def _comparable(value, dtype):
+    """Valor do formulário ou do DataFrame normalizado para comparação (vazio = None, datas como date)."""
+    if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+        return None
+    if dtype == 'date' and isinstance(value, datetime):
+        return value.date()
+    if dtype == 'float':
+        return float(value)
+    if isinstance(value, str):
+        return value or None
+    return value
+
+
+def changed_payload(module_name, form_data, original):
+    """Corpo do PATCH: só os campos do formulário que diferem do registro original (nomes da UI -> colunas)."""
+    schema = MODULE_SCHEMAS.get(module_name, {})
+    payload = to_payload(module_name, form_data)
+    return {
+        col: value for col, value in payload.items()
+        if _comparable(form_data[schema[col][0]], schema[col][1]) != _comparable(original.get(schema[col][0]), schema[col][1])
+    }
@@ -1,7 +1,11 @@
+import math
+import pandas as pd
 import streamlit as st
-from datetime import datetime
-from .config import TEAM_MEMBERS, STATUS_TAREFAS, STATUS_CONTATOS, STATUS_ATAS, STATUS_VENDAS, PRIORIDADES, MODULES, MODULE_ICONS
-from .data_manager import handle_save_api, clean_currency, fetch_data_from_api 
+from datetime import date, datetime
+from .config import TEAM_MEMBERS, STATUS_TAREFAS, STATUS_CONTATOS, STATUS_ATAS, STATUS_VENDAS, PRIORIDADES, TIPOS_VENDA, MODULES, MODULE_ICONS, TABLE_RENDER_MODES, TABLE_PAGE_SIZES, PRIORITY_ROW_COLORS, SEARCH_MODULES, SEARCH_MIN_CHARS
+from .data_manager import handle_save_api, clean_currency, fetch_data_from_api, fetch_stats, format_currency, search_module
+from .api_client import get_api_client
+from .schema import MODULE_SCHEMAS
 
 # --- Funções de Renderização de Páginas de Autenticação ---
 
@@ -19,25 +23,25 @@ def render_login():
             login_button = st.form_submit_button("Entrar", use_container_width=True)
 
             if login_button:
-                # SIMULAÇÃO DA CHAMADA À API
+                # Login na API: devolve o JWT usado nas demais chamadas
                 import requests
-                from .config import API_BASE_URL 
                 
-                login_url = f"{API_BASE_URL}/auth/login"
                 try:
-                    response = requests.post(login_url, json={"email": email, "password": password})
+                    response = get_api_client().post("auth/login", json={"email": email, "password": password})
                     if response.status_code == 200:
                         token_data = response.json()
                         st.session_state['auth_token'] = token_data.get('access_token')
                         st.session_state['logged_in'] = True
                         st.session_state['page'] = 'dashboard'
-                        st.session_state['current_user'] = email.split('@')[0].capitalize()
+                        st.session_state['current_user'] = (token_data.get('user') or {}).get('nome') or email.split('@')[0].capitalize()
                         st.toast("Login realizado com sucesso!", icon="✅")
                         st.rerun()
                     else:
                         st.error(response.json().get('detail', 'Credenciais inválidas ou erro desconhecido.'))
                 except requests.exceptions.ConnectionError:
                     st.error("Erro de conexão com o Back-end da API.")
+                except requests.exceptions.Timeout:
+                    st.error("O Back-end da API não respondeu a tempo.")
                 
         st.markdown("""
             <p style="text-align: center; margin-top: 15px; font-size: 14px; color: #4b5563;">
@@ -71,10 +75,20 @@ def render_cadastro():
                 elif len(password) < 8:
                     st.warning("A senha deve ter no mínimo 8 caracteres.")
                 else:
-                    # Em produção: POST para /api/v1/users
-                    st.toast("Conta criada! Faça login agora.", icon="🎉")
-                    st.session_state['page'] = 'login'
-                    st.rerun()
+                    import requests
+
+                    try:
+                        response = get_api_client().post("auth/register", json={"nome": name, "email": email, "password": password})
+                        if response.status_code == 201:
+                            st.toast("Conta criada! Faça login agora.", icon="🎉")
+                            st.session_state['page'] = 'login'
+                            st.rerun()
+                        else:
+                            st.error(response.json().get('detail', 'Não foi possível criar a conta.'))
+                    except requests.exceptions.ConnectionError:
+                        st.error("Erro de conexão com o Back-end da API.")
+                    except requests.exceptions.Timeout:
+                        st.error("O Back-end da API não respondeu a tempo.")
         
         st.markdown(f"""
             <p style="text-align: center; margin-top: 15px; font-size: 14px; color: #4b5563;">
@@ -102,6 +116,8 @@ def render_sidebar():
                 st.rerun()
         
     st.sidebar.markdown("---")
+    with st.sidebar.expander("Diagnóstico da API"):
+        st.json(get_api_client().metrics())
     st.sidebar.button("Sair", key="logout_btn", on_click=lambda: (st.session_state.update({'logged_in': False, 'page': 'login', 'auth_token': None}), st.toast("Sessão encerrada.", icon="👋"), st.rerun()), use_container_width=True)
 
 
@@ -110,12 +126,12 @@ def render_crud_form(is_editing=False, item_to_edit=None):
     module = st.session_state['active_module']
     title = f"{'Editar' if is_editing else 'Criar Nova'} {module.rstrip('s')}"
     
-    # Mapeamento de campos (apenas o de Tarefas está mapeado para a API de exemplo)
+    # Mapeamento de campos (rótulos = colunas da UI declaradas em schema.py)
     field_map = {
         'Tarefas': [('Descrição', st.text_area, None), ('Responsável', st.selectbox, TEAM_MEMBERS), ('Data Limite', st.date_input, None), ('Status', st.selectbox, STATUS_TAREFAS), ('Prioridade', st.selectbox, PRIORIDADES), ('Observações', st.text_area, None)],
         'Contatos': [('Pessoa/Órgão', st.text_input, None), ('Motivo', st.text_input, None), ('Data Follow-up', st.date_input, None), ('Responsável', st.selectbox, TEAM_MEMBERS), ('Status', st.selectbox, STATUS_CONTATOS), ('Prioridade', st.selectbox, PRIORIDADES)],
         'Atas': [('Órgão/Entidade', st.text_input, None), ('Objeto/Itens', st.text_input, None), ('Valor Utilizado (R$)', st.number_input, None), ('Vigência Final', st.date_input, None), ('Status', st.selectbox, STATUS_ATAS), ('Prioridade', st.selectbox, PRIORIDADES)],
-        'Vendas': [('Tipo', st.selectbox, ['Licitação', 'Entrega Direta', 'Assessoria']), ('Cliente/Órgão', st.text_input, None), ('Valor Total (R$)', st.number_input, None), ('Data da Venda', st.date_input, None), ('Responsável', st.selectbox, TEAM_MEMBERS), ('Status', st.selectbox, STATUS_VENDAS)],
+        'Vendas': [('Tipo', st.selectbox, TIPOS_VENDA), ('Cliente/Órgão', st.text_input, None), ('Valor Total (R$)', st.number_input, None), ('Data da Venda', st.date_input, None), ('Responsável', st.selectbox, TEAM_MEMBERS), ('Status', st.selectbox, STATUS_VENDAS)],
     }
     form_fields = field_map.get(module, [])
     
@@ -136,7 +152,9 @@ def render_crud_form(is_editing=False, item_to_edit=None):
                     form_data[label] = widget(label, options=options, index=index)
                 elif widget == st.date_input:
                     # Converte string/datetime para date
-                    if is_editing and isinstance(cleaned_value, (str, datetime)):
+                    if is_editing and isinstance(cleaned_value, pd.Timestamp):
+                        value = cleaned_value.date()
+                    elif is_editing and isinstance(cleaned_value, (str, datetime)):
                         try:
                             value = datetime.fromisoformat(cleaned_value).date()
                         except ValueError:
@@ -147,9 +165,10 @@ def render_crud_form(is_editing=False, item_to_edit=None):
                         value = datetime.today().date()
                     form_data[label] = widget(label, value=value)
                 elif widget == st.number_input:
-                    form_data[label] = widget(label, min_value=0.0, value=cleaned_value if cleaned_value is not None else 0.0, format="%.2f")
+                    form_data[label] = widget(label, min_value=0.0, value=float(cleaned_value) if pd.notna(cleaned_value) else 0.0, format="%.2f")
                 else: 
-                    form_data[label] = widget(label, value=cleaned_value if cleaned_value else "")
+                    # Missing strings arrive as pd.NA from the typed DataFrame
+                    form_data[label] = widget(label, value=cleaned_value if isinstance(cleaned_value, str) and cleaned_value else "")
 
             col_save, col_cancel = st.columns([1, 1])
             with col_save:
@@ -159,7 +178,8 @@ def render_crud_form(is_editing=False, item_to_edit=None):
 
             if save_button:
                 item_id = item_to_edit['ID'].iloc[0] if is_editing and item_to_edit is not None else None
-                handle_save_api(form_data, is_editing, item_id)
+                original = item_to_edit.iloc[0].to_dict() if is_editing and item_to_edit is not None else None
+                handle_save_api(form_data, is_editing, item_id, original)
             
             if cancel_button:
                 st.session_state['edit_mode'] = False
@@ -167,6 +187,93 @@ def render_crud_form(is_editing=False, item_to_edit=None):
                 st.rerun()
 
 
+def render_stats_header(module):
+    """Linha de indicadores do módulo ativo, a partir de GET /stats (sem carregar as tabelas)."""
+    stats = fetch_stats()
+    if not stats:
+        return
+
+    if module == 'Tarefas':
+        data = stats['tasks']
+        by_status = data.get('by_status', {})
+        metrics = [
+            ("Total", data['total']),
+            ("Pendentes", by_status.get('Pendente', 0)),
+            ("Em Andamento", by_status.get('Em Andamento', 0)),
+            ("Vencidas", data['overdue']),
+        ]
+    elif module == 'Contatos':
+        data = stats['contacts']
+        by_status = data.get('by_status', {})
+        metrics = [
+            ("Total", data['total']),
+            ("Abertos", by_status.get('Aberto', 0)),
+            ("Follow-up Pendente", by_status.get('Follow-up Pendente', 0)),
+            ("Atrasados", by_status.get('Atrasado', 0)),
+        ]
+    elif module == 'Atas':
+        data = stats['minutes']
+        by_status = data.get('by_status', {})
+        metrics = [
+            ("Total", data['total']),
+            ("Vigentes", by_status.get('Vigente', {}).get('count', 0)),
+            (f"Vencendo ({data['expiring']['days']}d)", data['expiring']['count']),
+            ("Valor Utilizado", format_currency(data.get('valor_utilizado', 0))),
+        ]
+    elif module == 'Vendas':
+        data = stats['sales']
+        won = data.get('by_status', {}).get('Ganha', {})
+        metrics = [
+            ("Total", data['total']),
+            ("Ganhas", won.get('count', 0)),
+            ("Valor Ganho", format_currency(won.get('amount', 0))),
+            ("Valor Total", format_currency(data.get('valor_total', 0))),
+        ]
+    else:
+        return
+
+    for column, (label, value) in zip(st.columns(len(metrics)), metrics):
+        column.metric(label, value)
+
+    overdue = stats['tasks'].get('overdue_by_responsavel', {})
+    if module == 'Tarefas' and overdue:
+        with st.expander("Tarefas vencidas por responsável"):
+            st.dataframe(
+                pd.DataFrame(
+                    [(name, item['count'], item['alta']) for name, item in overdue.items()],
+                    columns=['Responsável', 'Vencidas', 'Prioridade Alta'],
+                ),
+                hide_index=True,
+                use_container_width=True,
+            )
+
+
+def render_search_box(module):
+    """Campo de busca do módulo; retorna o termo normalizado quando há uma busca a fazer, senão None.
+
+    O st.text_input só envia o valor no Enter ou ao sair do campo, então digitar não causa rerun nem
+    chamada à API; termos curtos não consultam o servidor e termos repetidos vêm do cache.
+    """
+    if module not in SEARCH_MODULES:
+        return None
+    text = st.text_input(
+        "Buscar",
+        key=f"search_{module}",
+        placeholder="Buscar por descrição, órgão, responsável ou observações (Enter)",
+        label_visibility="collapsed",
+    )
+    query = " ".join(text.split())
+    if len(query) < SEARCH_MIN_CHARS:
+        if query:
+            st.caption(f"Digite ao menos {SEARCH_MIN_CHARS} caracteres para buscar.")
+        return None
+    # New search: back to the first page of results
+    if st.session_state.get(f"search_query_{module}") != query:
+        st.session_state[f"search_query_{module}"] = query
+        st.session_state[f"search_pages_{module}"] = 1
+    return query
+
+
 def render_dashboard_content():
     """Renderiza a área principal de listagem (CRUD List)."""
     module = st.session_state['active_module']
@@ -175,6 +282,7 @@ def render_dashboard_content():
     df = fetch_data_from_api(module) 
 
     st.header(f"Gestão de {module}")
+    render_stats_header(module)
     st.markdown("---")
     
     # Lógica de Edição/Criação
@@ -187,9 +295,20 @@ def render_dashboard_content():
 
     # --- 1. Botões de Ação e Busca ---
     col_search, col_action = st.columns([3, 1])
-    
-    # ... (Lógica de busca e botão de Nova Tarefa) ...
-    # Simplicidade para não repetir código
+    with col_search:
+        query = render_search_box(module)
+    if query:
+        pages = st.session_state.get(f"search_pages_{module}", 1)
+        results, has_more = search_module(module, query, pages)
+        if results is None:
+            st.warning("Busca indisponível no momento; exibindo todos os registros.")
+        else:
+            # Server-ranked results replace the full list (most relevant first)
+            df = results
+            st.caption(f"{len(df)} resultado(s) para “{query}”, por relevância.")
+            if has_more and st.button("Mais resultados", key="search_more_btn"):
+                st.session_state[f"search_pages_{module}"] = pages + 1
+                st.rerun()
     
     # --- 2. Listagem de Dados ---
     st.subheader("Lista de Registros")
@@ -210,18 +329,103 @@ def render_dashboard_content():
     if module == 'Tarefas':
         cols_to_display = ['Descrição', 'Responsável', 'Data Limite', 'Status', 'Prioridade']
         col_ratios = [4, 2, 2, 2, 1]
-    # ... (Mapeamento para Contatos, Atas, Vendas) ...
+    elif module == 'Contatos':
+        cols_to_display = ['Pessoa/Órgão', 'Motivo', 'Data Follow-up', 'Responsável', 'Status', 'Prioridade']
+        col_ratios = [3, 3, 2, 2, 2, 1]
+    elif module == 'Atas':
+        cols_to_display = ['Órgão/Entidade', 'Objeto/Itens', 'Valor Utilizado (R$)', 'Vigência Final', 'Status', 'Prioridade']
+        col_ratios = [3, 3, 2, 2, 2, 1]
+    elif module == 'Vendas':
+        cols_to_display = ['Cliente/Órgão', 'Tipo', 'Valor Total (R$)', 'Data da Venda', 'Responsável', 'Status']
+        col_ratios = [3, 2, 2, 2, 2, 2]
     else:
         cols_to_display = df.columns.drop('ID', errors='ignore').tolist()
         col_ratios = [len(cols_to_display)] * len(cols_to_display)
         
+    # Modo de visualização: tabela única paginada (padrão) ou o layout antigo linha a linha
+    view_mode = st.radio("Visualização", TABLE_RENDER_MODES, horizontal=True, key="table_render_mode")
+    if view_mode == TABLE_RENDER_MODES[0]:
+        render_table_view(df, cols_to_display)
+    else:
+        render_rows_legacy(df, cols_to_display, col_ratios)
+
+    # Botão Nova Tarefa (simulado)
+    with col_action:
+         if st.button(f"➕ Nova {module.rstrip('s')}", use_container_width=True, key="new_item_btn_bottom"):
+            st.session_state['show_modal'] = True 
+            st.rerun()
+    if st.session_state.get('show_modal', False):
+        st.markdown("---")
+        render_crud_form(is_editing=False)
+
+
+def priority_row_styles(data):
+    """Estilo de fundo por prioridade para todas as células da linha (vetorizado, sem loop por linha)."""
+    if 'Prioridade' not in data.columns:
+        return pd.DataFrame('', index=data.index, columns=data.columns)
+    colors = data['Prioridade'].astype(object).map(PRIORITY_ROW_COLORS)
+    css = ('background-color: ' + colors).fillna('')
+    return pd.DataFrame({col: css for col in data.columns}, index=data.index)
+
+
+def schema_column_config(module):
+    """Formatação das colunas de data e valor no st.dataframe, a partir do schema do módulo."""
+    config = {}
+    for ui_name, dtype in MODULE_SCHEMAS.get(module, {}).values():
+        if dtype == 'date':
+            config[ui_name] = st.column_config.DateColumn(format="DD/MM/YYYY")
+        elif dtype == 'float':
+            config[ui_name] = st.column_config.NumberColumn(format="R$ %.2f")
+    return config
+
+
+def render_table_view(df, cols_to_display):
+    """Lista os registros em um único st.dataframe paginado; a edição é escolhida pela seleção de linha."""
+    module = st.session_state['active_module']
+
+    col_size, col_page, col_info = st.columns([1, 1, 2])
+    with col_size:
+        page_size = st.selectbox("Itens por página", TABLE_PAGE_SIZES, key=f"page_size_{module}")
+    total_pages = max(1, math.ceil(len(df) / page_size))
+    with col_page:
+        page = st.number_input("Página", min_value=1, max_value=total_pages, value=1, step=1, key=f"page_{module}")
+    start = (int(page) - 1) * page_size
+    page_df = df.iloc[start:start + page_size]
+    with col_info:
+        st.caption(f"Exibindo {start + 1 if len(df) else 0}–{start + len(page_df)} de {len(df)} registros")
+
+    columns = [col for col in ['ID'] + cols_to_display if col in page_df.columns]
+    styled = page_df[columns].style.apply(priority_row_styles, axis=None)
+    event = st.dataframe(
+        styled,
+        hide_index=True,
+        use_container_width=True,
+        column_config={'ID': None, **schema_column_config(module)},
+        on_select="rerun",
+        selection_mode="single-row",
+        key=f"table_{module}_{page}",
+    )
+
+    selected_rows = event.selection.rows if event is not None else []
+    if selected_rows:
+        row = page_df.iloc[selected_rows[0]]
+        if st.button(f"✏️ Editar {str(row[cols_to_display[0]])[:60]}", key="edit_selected_btn"):
+            st.session_state['edit_item'] = row
+            st.session_state['edit_mode'] = True
+            st.rerun()
+
+
+def render_rows_legacy(df, cols_to_display, col_ratios):
+    """Layout antigo: uma linha de st.columns com botão de edição por registro (lento em listas grandes)."""
     final_col_ratios = [0.1] + col_ratios + [0.5]
     
     # Renderiza o cabeçalho (omitido por brevidade no código, mas existe no original)
 
     # Renderiza Linhas de Dados
     for index, row in df.iterrows():
-        priority_class = f"priority-{row.get('Prioridade', 'low').lower()}"
+        # Typed categorical column: a row without priority holds pd.NA, not a missing key
+        priority = row.get('Prioridade')
+        priority_class = f"priority-{str(priority).lower() if pd.notna(priority) else 'low'}"
         
         st.markdown(f'<div class="{priority_class}">', unsafe_allow_html=True)
         cols = st.columns(final_col_ratios, gap="small") 
@@ -236,8 +440,12 @@ def render_dashboard_content():
         for i, col_name in enumerate(cols_to_display):
             if i > 0:
                 value = row[col_name]
+                if isinstance(value, pd.Timestamp):
+                    value = value.strftime('%d/%m/%Y')
                 if col_name == 'Prioridade':
-                    value = f'<span class="priority-strip-{str(value).lower()}">{value}</span>'
+                    value = f'<span class="priority-strip-{str(value).lower()}">{value}</span>' if pd.notna(value) else ''
+                elif pd.isna(value):
+                    value = ''
                 
                 cols[i+1].markdown(f'<div style="width: 100%; text-align: center;">{value}</div>', unsafe_allow_html=True)
 
@@ -251,12 +459,3 @@ def render_dashboard_content():
             st.session_state['edit_item'] = row
             st.session_state['edit_mode'] = True
             st.rerun()
-
-    # Botão Nova Tarefa (simulado)
-    with col_action:
-         if st.button(f"➕ Nova {module.rstrip('s')}", use_container_width=True, key="new_item_btn_bottom"):
-            st.session_state['show_modal'] = True 
-            st.rerun()
-    if st.session_state.get('show_modal', False):
-        st.markdown("---")
-        render_crud_form(is_editing=False)
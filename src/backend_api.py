@@ -1,9 +1,23 @@
 import os
 from fastapi import FastAPI, Request
-from .routers import auth, task 
+from starlette.concurrency import run_in_threadpool
+from .routers import auth, task, task_export, task_changes, task_search, task_history, modules, stats, monitor
 
 # Import environment variables
-from .config.database import get_db_connection, N8N_WEBHOOK_URL
+from .config.database import get_db_connection, close_pool, N8N_WEBHOOK_URL, DB_DRIVER
+from .config.replicas import replica_router, primary_lsn_text, track_committed_writes, LSN_COOKIE, LSN_HEADER, DB_REPLICA_STICKY_SECONDS
+from .services import outbox
+from .services.change_feed import change_listener
+from .services.scheduler import scheduler, SCHEDULER_ENABLED
+from .services import metrics, compression
+from .services.auth import check_signing_config
+from .services.profiler import profiler, PROFILER_ENABLED
+
+# DB_DRIVER picks the /tasks implementation (sync psycopg2 or async psycopg 3) for A/B load tests
+if DB_DRIVER == "async":
+    from .routers import task_async as task_impl
+else:
+    task_impl = task
 
 API_PREFIX = "/api/v1"
 app = FastAPI(title="ABzinho API de Gestão", version="1.0", openapi_prefix=API_PREFIX)
@@ -16,8 +30,119 @@ async def secure_headers_middleware(request: Request, call_next):
     response.headers["X-Frame-Options"] = "DENY"
     return response
 
+# Read-your-writes: after a committed data write, hand the client the primary's WAL position so its next
+# GETs only go to replicas that have replayed past it (cookie for browsers, header for API clients).
+# Only requests whose module flagged a commit (ModuleSpec.committed) pay for the LSN lookup.
+@app.middleware("http")
+async def read_your_writes_middleware(request: Request, call_next):
+    tracker = None
+    if replica_router.enabled and request.method not in ("GET", "HEAD", "OPTIONS"):
+        tracker = track_committed_writes()
+    response = await call_next(request)
+    if tracker is not None and tracker["committed"] and response.status_code < 400:
+        try:
+            lsn = await run_in_threadpool(primary_lsn_text)
+        except Exception as e:
+            print(f"Não foi possível obter o LSN da escrita: {e}")
+            return response
+        response.headers[LSN_HEADER] = lsn
+        response.set_cookie(LSN_COOKIE, lsn, max_age=DB_REPLICA_STICKY_SECONDS, httponly=True, samesite="lax")
+    return response
+
+# gzip/br/zstd for responses with a known length above COMPRESSION_MIN_SIZE; cached bodies arrive already
+# encoded (see services/compression.py). Inside the timing middleware so the compression time is measured.
+@app.middleware("http")
+async def compression_middleware(request: Request, call_next):
+    response = await call_next(request)
+    return await compression.compress_response(request, response)
+
+# Per-request timing: Server-Timing header, /metrics histograms and (opt-in) profiles of the slowest requests.
+# Streaming responses are timed up to their first byte.
+@app.middleware("http")
+async def instrumentation_middleware(request: Request, call_next):
+    timing = metrics.start_request(request.method, request.url.path)
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        # Route template (not the raw path) keeps the label cardinality bounded
+        route = request.scope.get("route")
+        total = metrics.finish_request(timing, route.path if route is not None else "unmatched", status)
+    if metrics.SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = timing.server_timing(total)
+    if PROFILER_ENABLED:
+        profiler.request_finished(timing, total)
+    return response
+
+# No fallback signing key: a worker without SECRET_KEY (or the RS/ES key files) does not start
+@app.on_event("startup")
+def check_auth_config():
+    check_signing_config()
+
+# Background delivery of outbox events to n8n (OUTBOX_DISPATCHER=false to run it elsewhere)
+@app.on_event("startup")
+def start_outbox_dispatcher():
+    if outbox.OUTBOX_ENABLED and os.getenv("OUTBOX_DISPATCHER", "true").lower() == "true":
+        outbox.dispatcher.start()
+
+# Date-driven statuses (Atrasada/Atrasado/Expirada); all workers start it, only the advisory-lock holder runs the jobs
+@app.on_event("startup")
+def start_status_scheduler():
+    if SCHEDULER_ENABLED:
+        scheduler.start()
+
+# Sampling profiler for the slowest requests (PROFILER_ENABLED=true; adds overhead, for diagnosis only)
+@app.on_event("startup")
+def start_profiler():
+    if PROFILER_ENABLED:
+        profiler.start()
+
+# Replica health/lag monitor (DB_REPLICA_DSNS empty = every read goes to the primary)
+@app.on_event("startup")
+def start_replica_router():
+    replica_router.start()
+
+# Return pooled connections to Postgres when the worker stops
+@app.on_event("shutdown")
+async def shutdown_db_pool():
+    outbox.dispatcher.stop()
+    scheduler.stop()
+    profiler.stop()
+    change_listener.stop()
+    replica_router.stop()
+    close_pool()
+    if DB_DRIVER == "async":
+        from .config.async_database import close_async_pool
+        await close_async_pool()
+
 # Incluir o router de autenticação: Caminho final: /api/v1/auth/...
 app.include_router(auth.router, prefix=API_PREFIX)
 
+# Change feed (delta + SSE), antes das rotas /tasks/{task_id}: Caminho final: /api/v1/tasks/changes
+app.include_router(task_changes.router, prefix=API_PREFIX)
+
+# Busca ranqueada (full-text + trigramas): Caminho final: /api/v1/tasks/search
+app.include_router(task_search.router, prefix=API_PREFIX)
+
+# Histórico de alterações (auditoria): Caminho final: /api/v1/tasks/{task_id}/history
+app.include_router(task_history.router, prefix=API_PREFIX)
+
 # Incluir o router de tarefas: Caminho final: /api/v1/tasks/...
-app.include_router(task.router, prefix=API_PREFIX)
\ No newline at end of file
+app.include_router(task_impl.router, prefix=API_PREFIX)
+
+# Exportação em streaming (CSV/Parquet/Arrow): Caminho final: /api/v1/tasks/export
+app.include_router(task_export.router, prefix=API_PREFIX)
+
+# Contatos, Atas e Vendas (engine CRUD): Caminhos finais: /api/v1/contacts, /api/v1/minutes, /api/v1/sales
+for module_router in modules.routers:
+    app.include_router(module_router, prefix=API_PREFIX)
+
+# Indicadores do cabeçalho do dashboard: Caminho final: /api/v1/stats
+app.include_router(stats.router, prefix=API_PREFIX)
+
+# Incluir o router de monitoramento: Caminho final: /api/v1/monitor/...
+app.include_router(monitor.router, prefix=API_PREFIX)
+
+# Métricas no formato do Prometheus: Caminho final: /api/v1/metrics
+app.include_router(monitor.metrics_router, prefix=API_PREFIX)
\ No newline at end of file
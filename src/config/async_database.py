@@ -0,0 +1,162 @@
+import os
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import HTTPException, Request
+
+from .database import DATABASE_URL, DB_HOST, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT, DB_POOL_MAX_LIFETIME, DB_POOL_CHECK_IDLE
+from .replicas import replica_router, request_min_lsn, READ_ROUTING, DB_REPLICA_POOL_MIN_SIZE, DB_REPLICA_POOL_MAX_SIZE
+from ..services.metrics import record_query, timed
+
+# psycopg 3 is only needed when DB_DRIVER=async
+try:
+    from psycopg import AsyncCursor
+    from psycopg.pq import TransactionStatus
+    from psycopg.rows import dict_row
+    from psycopg_pool import AsyncConnectionPool, PoolTimeout
+
+    class TimedAsyncCursor(AsyncCursor):
+        """Cursor psycopg 3 que mede cada comando (mesmas métricas do InstrumentedConnection do psycopg2)."""
+
+        async def execute(self, query, params=None, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await super().execute(query, params, **kwargs)
+            finally:
+                record_query(query, time.perf_counter() - start, self.connection)
+
+        async def executemany(self, query, params_seq, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await super().executemany(query, params_seq, **kwargs)
+            finally:
+                record_query(query, time.perf_counter() - start, self.connection)
+except ImportError:
+    AsyncConnectionPool = None
+    PoolTimeout = None
+
+# Idle connections above min_size are closed after this many seconds
+DB_ASYNC_POOL_MAX_IDLE = float(os.getenv("DB_ASYNC_POOL_MAX_IDLE", "600"))
+
+_async_pool = None
+_async_pool_pid = None
+_async_pool_lock = asyncio.Lock()
+
+def _new_async_pool(conninfo, min_size, max_size):
+    return AsyncConnectionPool(
+        conninfo,
+        min_size=min_size,
+        max_size=max_size,
+        timeout=DB_POOL_TIMEOUT,
+        max_lifetime=DB_POOL_MAX_LIFETIME,
+        max_idle=DB_ASYNC_POOL_MAX_IDLE,
+        # Health check on checkout (DB_POOL_CHECK_IDLE=0 disables it)
+        check=AsyncConnectionPool.check_connection if DB_POOL_CHECK_IDLE > 0 else None,
+        kwargs={"row_factory": dict_row, "cursor_factory": TimedAsyncCursor},
+        open=False,
+    )
+
+async def get_async_pool():
+    """Retorna o pool assíncrono (psycopg 3) do processo atual, abrindo-o na primeira chamada."""
+    global _async_pool, _async_pool_pid
+    if _async_pool is not None and _async_pool_pid == os.getpid():
+        return _async_pool
+    if AsyncConnectionPool is None:
+        raise RuntimeError("DB_DRIVER=async requer os pacotes 'psycopg' e 'psycopg_pool'.")
+    async with _async_pool_lock:
+        if _async_pool is None or _async_pool_pid != os.getpid():
+            pool = _new_async_pool(DATABASE_URL, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE)
+            await pool.open(wait=False)
+            _async_pool, _async_pool_pid = pool, os.getpid()
+    return _async_pool
+
+async def get_replica_async_pool(replica):
+    """Pool assíncrono da réplica no processo atual (aberto na primeira leitura roteada para ela)."""
+    if replica.async_pool is not None and replica.async_pool_pid == os.getpid():
+        return replica.async_pool
+    async with _async_pool_lock:
+        if replica.async_pool is None or replica.async_pool_pid != os.getpid():
+            pool = _new_async_pool(replica.dsn, DB_REPLICA_POOL_MIN_SIZE, DB_REPLICA_POOL_MAX_SIZE)
+            await pool.open(wait=False)
+            replica.async_pool, replica.async_pool_pid = pool, os.getpid()
+    return replica.async_pool
+
+async def close_async_pool():
+    """Fecha o pool assíncrono (e os das réplicas), se tiverem sido abertos neste processo."""
+    global _async_pool
+    if _async_pool is not None:
+        await _async_pool.close()
+        _async_pool = None
+    for replica in replica_router.replicas:
+        if replica.async_pool is not None:
+            await replica.async_pool.close()
+            replica.async_pool = None
+
+def get_async_pool_stats():
+    """Estatísticas do pool assíncrono (vazio se o driver assíncrono não estiver em uso)."""
+    if _async_pool is None:
+        return {}
+    return {"pid": _async_pool_pid, **_async_pool.get_stats()}
+
+async def _release(pool, conn):
+    # End read-only transactions here so the pool does not warn about them
+    if not conn.closed and conn.info.transaction_status != TransactionStatus.IDLE:
+        try:
+            await conn.rollback()
+        except Exception:
+            pass
+    await pool.putconn(conn)
+
+async def get_async_db():
+    """Dependência FastAPI assíncrona: empresta uma conexão psycopg 3 e a devolve ao pool no final."""
+    try:
+        pool = await get_async_pool()
+        with timed("db_checkout"):
+            conn = await pool.getconn()
+    except Exception as e:
+        if PoolTimeout is not None and isinstance(e, PoolTimeout):
+            print(f"Pool assíncrono de conexões esgotado. Host: {DB_HOST}.")
+            raise HTTPException(status_code=503, detail="Serviço de Banco de Dados Sobrecarregado (503)")
+        print(f"Erro Crítico de Conexão com o Banco de Dados. Host: {DB_HOST}.")
+        raise HTTPException(status_code=503, detail="Serviço de Banco de Dados Indisponível (503)")
+    try:
+        yield conn
+    finally:
+        await _release(pool, conn)
+
+@asynccontextmanager
+async def async_read_connection(min_lsn=0):
+    """Conexão de leitura assíncrona só pelo bloco: réplica em dia com ``min_lsn`` ou o primário (ver config/replicas.py)."""
+    replica, reason = replica_router.choose(min_lsn)
+    if replica is not None:
+        try:
+            pool = await get_replica_async_pool(replica)
+            with timed("db_checkout"):
+                conn = await pool.getconn()
+        except Exception as e:
+            if PoolTimeout is not None and isinstance(e, PoolTimeout):
+                reason = "replica_busy"
+            else:
+                print(f"Réplica {replica.name} indisponível; lendo do primário: {e}")
+                replica.mark_failed(e)
+                reason = "replica_error"
+        else:
+            READ_ROUTING.inc(replica.name, "replica")
+            try:
+                yield conn
+            finally:
+                await _release(pool, conn)
+            return
+
+    READ_ROUTING.inc("primary", reason)
+    primary = get_async_db()
+    conn = await primary.__anext__()
+    try:
+        yield conn
+    finally:
+        await primary.aclose()
+
+async def get_async_read_db(request: Request):
+    """Dependência assíncrona para GETs: réplica em dia com o cliente ou o primário (ver config/replicas.py)."""
+    async with async_read_connection(request_min_lsn(request)) as conn:
+        yield conn
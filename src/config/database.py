@@ -1,8 +1,13 @@
 import os
+import threading
 from dotenv import load_dotenv
 import psycopg2
+from psycopg2.extras import register_uuid
 from fastapi import HTTPException
 
+from .pool import ConnectionPool, PoolTimeout
+from ..services.metrics import InstrumentedConnection, timed
+
 # Load environment variables from .env file
 load_dotenv(dotenv_path="../../config/.env") 
 
@@ -18,12 +23,74 @@ N8N_WEBHOOK_URL = os.getenv("N8N_WEBHOOK_URL")
 # Ltring connection postgresql
 DATABASE_URL = f"dbname={DB_NAME} user={DB_USER} password={DB_PASS} host={DB_HOST} port={DB_PORT}"
 
+# Adapt uuid.UUID parameters (e.g. task_id path params) on every connection
+register_uuid()
+
+# Data-access implementation for /tasks: "sync" (psycopg2 + threadpool) or "async" (psycopg 3)
+DB_DRIVER = os.getenv("DB_DRIVER", "sync").lower()
+
+# Connection pool (one per gunicorn worker)
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))
+DB_POOL_CHECK_IDLE = float(os.getenv("DB_POOL_CHECK_IDLE", "30"))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Retorna o pool do processo atual, criando-o na primeira chamada (após o fork do gunicorn)."""
+    global _pool
+    if _pool is None or _pool.pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool.pid != os.getpid():
+                _pool = ConnectionPool(
+                    DATABASE_URL,
+                    min_size=DB_POOL_MIN_SIZE,
+                    max_size=DB_POOL_MAX_SIZE,
+                    timeout=DB_POOL_TIMEOUT,
+                    max_lifetime=DB_POOL_MAX_LIFETIME,
+                    check_idle=DB_POOL_CHECK_IDLE,
+                    # Every statement is timed (Server-Timing, /metrics, slow-query log)
+                    connection_factory=InstrumentedConnection,
+                )
+                try:
+                    _pool.open()
+                except Exception:
+                    print(f"Aviso: não foi possível pré-abrir o pool de conexões. Host: {DB_HOST}.")
+    return _pool
+
+def close_pool():
+    """Fecha o pool do processo (usado no shutdown da API)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
 def get_db_connection():
-    """Tenta conectar ao DB usando a URL segura do .env."""
+    """Retira uma conexão do pool (conectando ao DB usando a URL segura do .env, se preciso)."""
     try:
-        conn = psycopg2.connect(DATABASE_URL)
-        return conn
+        with timed("db_checkout"):
+            return get_pool().getconn()
+    except PoolTimeout:
+        print(f"Pool de conexões esgotado. Host: {DB_HOST}.")
+        raise HTTPException(status_code=503, detail="Serviço de Banco de Dados Sobrecarregado (503)")
     except Exception as e:
         # For not exposed details in production
         print(f"Erro Crítico de Conexão com o Banco de Dados. Host: {DB_HOST}.")
-        raise HTTPException(status_code=503, detail="Serviço de Banco de Dados Indisponível (503)")
\ No newline at end of file
+        raise HTTPException(status_code=503, detail="Serviço de Banco de Dados Indisponível (503)")
+
+def release_db_connection(conn):
+    """Devolve a conexão ao pool em vez de fechá-la."""
+    if conn is not None:
+        get_pool().putconn(conn)
+
+def get_db():
+    """Dependência FastAPI: empresta uma conexão do pool durante a requisição e a devolve no final."""
+    conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        release_db_connection(conn)
\ No newline at end of file
@@ -0,0 +1,206 @@
+import os
+import time
+import threading
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolTimeout(Exception):
+    """Nenhuma conexão ficou livre dentro do tempo de espera configurado."""
+
+
+class ConnectionPool:
+    """Pool de conexões psycopg2 limitado e thread-safe (um por worker do gunicorn).
+
+    - ``min_size``/``max_size``: conexões mantidas abertas / limite máximo por processo.
+    - ``timeout``: segundos que uma requisição espera por uma conexão livre.
+    - ``max_lifetime``: conexões mais antigas que isso são recicladas na devolução/retirada.
+    - ``check_idle``: conexões ociosas há mais que isso recebem um ``SELECT 1`` antes do uso.
+    - ``connection_factory``: classe de conexão psycopg2 (ex.: a instrumentada de services/metrics.py).
+    """
+
+    def __init__(self, dsn, min_size=1, max_size=10, timeout=10.0, max_lifetime=1800.0, check_idle=30.0,
+                 connection_factory=None):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError("Configuração de pool inválida: exige 1 <= max_size e min_size <= max_size.")
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_idle = check_idle
+        self.connection_factory = connection_factory
+        self.pid = os.getpid()
+
+        self._cond = threading.Condition(threading.RLock())
+        self._idle = deque()  # (conn, last_used), LIFO para manter as conexões "quentes"
+        self._created_at = {}  # id(conn) -> instante de criação
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        # Counters exposed by stats()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._discarded = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # --- Connection lifecycle ---
+
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn, connection_factory=self.connection_factory)
+        with self._cond:
+            self._created_at[id(conn)] = time.monotonic()
+            self._created += 1
+        return conn
+
+    def _discard(self, conn):
+        with self._cond:
+            self._created_at.pop(id(conn), None)
+            self._discarded += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _expired(self, conn, now):
+        created = self._created_at.get(id(conn), now)
+        return self.max_lifetime > 0 and now - created >= self.max_lifetime
+
+    def _healthy(self, conn, last_used, now):
+        if conn.closed:
+            return False
+        if now - last_used < self.check_idle:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def open(self):
+        """Abre as ``min_size`` conexões iniciais (melhor esforço: o DB pode ainda não estar no ar)."""
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                raise
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def getconn(self):
+        """Retira uma conexão saudável do pool, esperando até ``timeout`` segundos se estiver cheio."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        conn, last_used = None, None
+
+        with self._cond:
+            if self._closed:
+                raise PoolTimeout("Pool de conexões encerrado.")
+            while True:
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(f"Nenhuma conexão livre após {self.timeout}s (max_size={self.max_size}).")
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            self._in_use += 1
+            waited = time.monotonic() - start
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        # Health check and reconnect happen outside the lock
+        try:
+            now = time.monotonic()
+            if conn is not None and (self._expired(conn, now) or not self._healthy(conn, last_used, now)):
+                self._discard(conn)
+                conn = None
+            if conn is None:
+                conn = self._connect()
+            return conn
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def putconn(self, conn, close=False):
+        """Devolve a conexão ao pool, desfazendo transações abertas; conexões quebradas são descartadas."""
+        if not close:
+            if conn.closed or self._expired(conn, time.monotonic()):
+                close = True
+            else:
+                status = conn.info.transaction_status
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    close = True
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    try:
+                        conn.rollback()
+                    except Exception:
+                        close = True
+
+        with self._cond:
+            self._in_use -= 1
+            if close or self._closed:
+                self._size -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+        if close or self._closed:
+            self._discard(conn)
+
+    def close(self):
+        """Fecha as conexões ociosas; as emprestadas são fechadas ao serem devolvidas."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        """Retorna um retrato do uso do pool (para o endpoint de monitoramento)."""
+        with self._cond:
+            return {
+                "pid": self.pid,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "connections_created": self._created,
+                "connections_discarded": self._discarded,
+                "wait_time_total_ms": round(self._wait_total * 1000, 3),
+                "wait_time_avg_ms": round(self._wait_total * 1000 / self._checkouts, 3) if self._checkouts else 0.0,
+                "wait_time_max_ms": round(self._wait_max * 1000, 3),
+            }
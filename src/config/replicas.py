@@ -0,0 +1,305 @@
+import os
+import time
+import threading
+import itertools
+import contextvars
+from contextlib import contextmanager
+from fastapi import Request
+
+from .pool import ConnectionPool, PoolTimeout
+from .database import get_pool, get_db_connection, release_db_connection, DB_POOL_TIMEOUT, DB_POOL_MAX_LIFETIME, DB_POOL_CHECK_IDLE
+from ..services.metrics import registry, Counter, InstrumentedConnection, timed
+
+# Read replicas for GET endpoints. A background thread per worker polls every replica's replay position
+# against the primary's WAL position; reads go round-robin to replicas that are streaming, within the lag
+# limits and already past the client's last write (read-your-writes: the write's LSN comes back in a
+# cookie / header). Anything else — no replicas, all lagging or down, checkout error — reads the primary.
+
+# libpq DSNs separated by ";" (e.g. "host=10.0.0.2 port=5432 dbname=... user=... password=...")
+DB_REPLICA_DSNS = [dsn.strip() for dsn in os.getenv("DB_REPLICA_DSNS", "").split(";") if dsn.strip()]
+DB_REPLICA_MAX_LAG_BYTES = int(os.getenv("DB_REPLICA_MAX_LAG_BYTES", str(16 * 1024 * 1024)))
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "10"))
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "2"))
+DB_REPLICA_POOL_MIN_SIZE = int(os.getenv("DB_REPLICA_POOL_MIN_SIZE", "0"))
+DB_REPLICA_POOL_MAX_SIZE = int(os.getenv("DB_REPLICA_POOL_MAX_SIZE", "10"))
+# How long after a write the client's reads stay pinned to "replicas at least at this LSN"
+DB_REPLICA_STICKY_SECONDS = int(os.getenv("DB_REPLICA_STICKY_SECONDS", "300"))
+
+# Set on responses to writes; read back from either one on the next requests
+LSN_COOKIE = "abz_last_write_lsn"
+LSN_HEADER = "X-Last-Write-LSN"
+
+PRIMARY_LSN_SQL = "SELECT pg_current_wal_lsn()::text AS lsn;"
+# Replay age only means lag while there is WAL left to replay (an idle primary writes no new commits)
+REPLICA_STATUS_SQL = """
+    SELECT pg_is_in_recovery() AS in_recovery, pg_last_wal_replay_lsn()::text AS replay_lsn,
+           extract(epoch FROM now() - pg_last_xact_replay_timestamp())::float8 AS replay_age;
+"""
+
+READ_ROUTING = registry.register(Counter(
+    "db_read_routing", "Leituras por destino (réplica ou primário) e motivo do desvio para o primário.", ("target", "reason"),
+))
+
+
+def parse_lsn(text) -> int:
+    """``'16/B374D848'`` -> posição no WAL em bytes; 0 se vazio ou inválido."""
+    try:
+        high, low = text.strip().split("/")
+        return (int(high, 16) << 32) | int(low, 16)
+    except (AttributeError, ValueError):
+        return 0
+
+def format_lsn(value: int) -> str:
+    return f"{value >> 32:X}/{value & 0xFFFFFFFF:X}"
+
+# Per-request flag shared with the threadpool (mutable dict, like metrics.RequestTiming): set by the
+# read-your-writes middleware, flipped by the modules after a commit. Login/register and failed writes
+# never flip it, so they cost no extra round-trip to the primary.
+_write_tracker = contextvars.ContextVar("committed_write", default=None)
+
+
+def track_committed_writes():
+    """Inicia o rastreio da requisição atual; ``tracker["committed"]`` fica True após um commit de dados."""
+    tracker = {"committed": False}
+    _write_tracker.set(tracker)
+    return tracker
+
+def note_committed_write():
+    """Marca a requisição atual como escrita confirmada (sem efeito fora de uma requisição rastreada)."""
+    tracker = _write_tracker.get()
+    if tracker is not None:
+        tracker["committed"] = True
+
+
+def request_min_lsn(request: Request) -> int:
+    """LSN da última escrita do cliente (cabeçalho ou cookie); 0 quando não há."""
+    return parse_lsn(request.headers.get(LSN_HEADER) or request.cookies.get(LSN_COOKIE) or "")
+
+
+class Replica:
+    """Uma réplica: pool próprio (por processo) e o último estado medido pelo verificador."""
+
+    def __init__(self, name, dsn):
+        self.name = name
+        self.dsn = dsn
+        self.healthy = False
+        self.replay_lsn = 0
+        self.lag_bytes = None
+        self.lag_seconds = None
+        self.checked_at = None
+        self.error = None
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        # Async (psycopg 3) pool, created by config/async_database.py when DB_DRIVER=async
+        self.async_pool = None
+        self.async_pool_pid = None
+
+    def get_pool(self):
+        if self._pool is None or self._pool.pid != os.getpid():
+            with self._pool_lock:
+                if self._pool is None or self._pool.pid != os.getpid():
+                    self._pool = ConnectionPool(
+                        self.dsn,
+                        min_size=DB_REPLICA_POOL_MIN_SIZE,
+                        max_size=DB_REPLICA_POOL_MAX_SIZE,
+                        timeout=DB_POOL_TIMEOUT,
+                        max_lifetime=DB_POOL_MAX_LIFETIME,
+                        check_idle=DB_POOL_CHECK_IDLE,
+                        connection_factory=InstrumentedConnection,
+                    )
+        return self._pool
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+
+    def check(self, primary_lsn):
+        """Mede a réplica e atualiza ``healthy`` (streaming, dentro dos limites de atraso)."""
+        pool = self.get_pool()
+        conn = pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(REPLICA_STATUS_SQL)
+                in_recovery, replay_lsn, replay_age = cur.fetchone()
+            conn.rollback()
+        finally:
+            pool.putconn(conn)
+
+        self.checked_at = time.time()
+        if not in_recovery:
+            # A promoted or unrelated server is not a copy of this primary anymore
+            self.healthy, self.error = False, "pg_is_in_recovery() = false"
+            return
+        self.replay_lsn = parse_lsn(replay_lsn)
+        self.lag_bytes = max(0, primary_lsn - self.replay_lsn) if primary_lsn else None
+        self.lag_seconds = (replay_age or 0.0) if self.lag_bytes else 0.0
+        self.healthy = (self.lag_bytes is not None and self.lag_bytes <= DB_REPLICA_MAX_LAG_BYTES
+                        and self.lag_seconds <= DB_REPLICA_MAX_LAG_SECONDS)
+        self.error = None if self.healthy else "atraso acima do limite"
+
+    def mark_failed(self, error):
+        self.healthy = False
+        self.lag_bytes = self.lag_seconds = None
+        self.error = str(error)
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "replay_lsn": format_lsn(self.replay_lsn) if self.replay_lsn else None,
+            "lag_bytes": self.lag_bytes,
+            "lag_seconds": self.lag_seconds,
+            "checked_at": self.checked_at,
+            "error": self.error,
+            "pool": self._pool.stats() if self._pool is not None else None,
+        }
+
+
+class ReplicaRouter:
+    """Escolhe a conexão de leitura e mantém o estado das réplicas atualizado em uma thread do worker."""
+
+    def __init__(self, dsns=DB_REPLICA_DSNS, interval=DB_REPLICA_CHECK_INTERVAL):
+        self.replicas = [Replica(f"replica{i + 1}", dsn) for i, dsn in enumerate(dsns)]
+        self.interval = interval
+        self._next = itertools.count()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return bool(self.replicas)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if not self.enabled or self.running:
+            return
+        self._stop.clear()
+        self.check_all()
+        self._thread = threading.Thread(target=self._run, name="replica-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        for replica in self.replicas:
+            replica.close()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check_all()
+
+    def check_all(self):
+        try:
+            primary_lsn = parse_lsn(primary_lsn_text())
+        except Exception as e:
+            print(f"Réplicas: não foi possível ler a posição do WAL no primário: {e}")
+            primary_lsn = 0
+        for replica in self.replicas:
+            try:
+                replica.check(primary_lsn)
+            except Exception as e:
+                if replica.healthy:
+                    print(f"Réplica {replica.name} indisponível; leituras voltam para o primário: {e}")
+                replica.mark_failed(e)
+
+    def choose(self, min_lsn=0):
+        """(réplica, None) ou (None, motivo de ler do primário)."""
+        if not self.replicas:
+            return None, "no_replicas"
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None, "unhealthy"
+        eligible = [replica for replica in healthy if replica.replay_lsn >= min_lsn]
+        if not eligible:
+            return None, "read_your_writes"
+        return eligible[next(self._next) % len(eligible)], None
+
+    def metrics(self):
+        """Valores planos por réplica para o coletor do /metrics."""
+        values = {"healthy": sum(replica.healthy for replica in self.replicas)}
+        for replica in self.replicas:
+            values[f"{replica.name}_healthy"] = int(replica.healthy)
+            if replica.lag_bytes is not None:
+                values[f"{replica.name}_lag_bytes"] = replica.lag_bytes
+                values[f"{replica.name}_lag_seconds"] = replica.lag_seconds
+        return values
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "running": self.running,
+            "max_lag_bytes": DB_REPLICA_MAX_LAG_BYTES,
+            "max_lag_seconds": DB_REPLICA_MAX_LAG_SECONDS,
+            "replicas": [replica.stats() for replica in self.replicas],
+        }
+
+
+replica_router = ReplicaRouter()
+
+
+def primary_lsn_text():
+    """Posição atual do WAL no primário (após o commit de uma escrita, cobre essa escrita)."""
+    pool = get_pool()
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(PRIMARY_LSN_SQL)
+            lsn = cur.fetchone()[0]
+        conn.rollback()
+        return lsn
+    finally:
+        pool.putconn(conn)
+
+
+def get_read_connection(min_lsn=0):
+    """(réplica ou None, conexão): réplica elegível quando houver, senão o primário."""
+    replica, reason = replica_router.choose(min_lsn)
+    if replica is not None:
+        try:
+            with timed("db_checkout"):
+                conn = replica.get_pool().getconn()
+            READ_ROUTING.inc(replica.name, "replica")
+            return replica, conn
+        except PoolTimeout:
+            reason = "replica_busy"
+        except Exception as e:
+            print(f"Réplica {replica.name} indisponível; lendo do primário: {e}")
+            replica.mark_failed(e)
+            reason = "replica_error"
+    conn = get_db_connection()
+    READ_ROUTING.inc("primary", reason)
+    return None, conn
+
+def release_read_connection(replica, conn):
+    if replica is None:
+        release_db_connection(conn)
+    elif conn is not None:
+        replica.get_pool().putconn(conn)
+
+@contextmanager
+def read_connection(min_lsn=0):
+    """Conexão de leitura só pelo bloco (o pool encerra a transação na devolução).
+
+    Para rotas com single-flight: checagens curtas antes de esperar a leitura de outra requisição,
+    sem segurar conexão durante a espera; só quem executa a consulta faz um novo empréstimo.
+    """
+    replica, conn = get_read_connection(min_lsn)
+    try:
+        yield conn
+    finally:
+        release_read_connection(replica, conn)
+
+def get_read_db(request: Request):
+    """Dependência FastAPI para GETs: conexão de leitura (réplica em dia com o cliente ou o primário)."""
+    replica, conn = get_read_connection(request_min_lsn(request))
+    try:
+        yield conn
+    finally:
+        release_read_connection(replica, conn)
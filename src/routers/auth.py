@@ -1,21 +1,83 @@
 import os
-from fastapi import APIRouter, HTTPException, Body
-from typing import Dict
+from fastapi import APIRouter, HTTPException, Body, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import Any, Dict, Optional
 
-from ..config.database import N8N_WEBHOOK_URL
+from ..services.auth import (
+    AuthError, authenticate_user, create_user, issue_token, verify_token, JWT_EXPIRE_MINUTES, PASSWORD_MIN_LENGTH,
+)
 
 router = APIRouter(
     prefix="/auth",
     tags=["Autenticação"],
 )
 
+# Self-service sign-up (front-end "Criar Conta"): off by default, and only ever for the company e-mail
+# domains in AUTH_REGISTRATION_DOMAINS (enabling it without domains keeps it off)
+AUTH_REGISTRATION_DOMAINS = [d.strip().lower() for d in os.getenv("AUTH_REGISTRATION_DOMAINS", "").split(",") if d.strip()]
+AUTH_ALLOW_REGISTRATION = os.getenv("AUTH_ALLOW_REGISTRATION", "false").lower() == "true" and bool(AUTH_REGISTRATION_DOMAINS)
+if os.getenv("AUTH_ALLOW_REGISTRATION", "false").lower() == "true" and not AUTH_REGISTRATION_DOMAINS:
+    print("Aviso: AUTH_ALLOW_REGISTRATION=true ignorado: defina AUTH_REGISTRATION_DOMAINS para liberar o cadastro.")
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+# async on purpose: verification is pure CPU (microseconds), so it runs on the event loop without a threadpool hop
+async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> Dict[str, Any]:
+    """Dependência das rotas protegidas: valida o Bearer token e retorna o usuário autenticado."""
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="Não autenticado.", headers={"WWW-Authenticate": "Bearer"})
+    try:
+        claims = verify_token(credentials.credentials)
+    except AuthError as e:
+        raise HTTPException(status_code=401, detail=str(e), headers={"WWW-Authenticate": "Bearer"})
+    return {"user_id": claims["sub"], "email": claims.get("email"), "nome": claims.get("name")}
+
+
+def login_response(user):
+    return {
+        "access_token": issue_token(user),
+        "token_type": "bearer",
+        "expires_in": JWT_EXPIRE_MINUTES * 60,
+        "user": user,
+    }
+
+
 # Authentication endpoint
 @router.post("/login")
-def login_user(email: str = Body(..., embed=True), password: str = Body(..., embed=True)) -> Dict[str, str]:
-    if email and password:
-        secret = os.getenv("SECRET_KEY", "fallback_secret_key")
-        return {"access_token": f"jwt_token_for_{email}_{secret[:10]}", "token_type": "bearer"}
-    raise HTTPException(status_code=400, detail="Credenciais inválidas")
+async def login_user(email: str = Body(..., embed=True), password: str = Body(..., embed=True)) -> Dict[str, Any]:
+    if not email or not password:
+        raise HTTPException(status_code=400, detail="Credenciais inválidas")
+    # Password hashing is deliberately slow: keep it off the event loop
+    user = await run_in_threadpool(authenticate_user, email, password)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Credenciais inválidas", headers={"WWW-Authenticate": "Bearer"})
+    return login_response(user)
 
 
-                
\ No newline at end of file
+@router.post("/register", status_code=201)
+async def register_user(
+    nome: str = Body(..., embed=True),
+    email: str = Body(..., embed=True),
+    password: str = Body(..., embed=True),
+) -> Dict[str, Any]:
+    if not AUTH_ALLOW_REGISTRATION:
+        raise HTTPException(status_code=403, detail="Cadastro desativado. Solicite o acesso ao administrador.")
+    domain = email.strip().rsplit("@", 1)[-1].lower() if "@" in email else ""
+    if not nome.strip() or not domain:
+        raise HTTPException(status_code=400, detail="Informe nome e e-mail válidos.")
+    if domain not in AUTH_REGISTRATION_DOMAINS:
+        raise HTTPException(status_code=403, detail="Cadastro permitido apenas com e-mail corporativo.")
+    if len(password) < PASSWORD_MIN_LENGTH:
+        raise HTTPException(status_code=400, detail=f"A senha deve ter no mínimo {PASSWORD_MIN_LENGTH} caracteres.")
+    try:
+        user = await run_in_threadpool(create_user, nome, email, password)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Erro ao cadastrar usuário: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno ao cadastrar usuário.")
+    if user is None:
+        raise HTTPException(status_code=409, detail="E-mail já cadastrado.")
+    return login_response(user)
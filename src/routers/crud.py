@@ -0,0 +1,505 @@
+import os
+import uuid
+import base64
+import inspect
+from fastapi import APIRouter, HTTPException, Depends, Header, Path, Query, Request, Response
+from pydantic import create_model
+from datetime import date, datetime
+from psycopg2.extras import RealDictCursor
+from typing import List, Literal, Optional
+
+from ..config.database import get_db, DB_DRIVER
+from ..config.replicas import read_connection, request_min_lsn, note_committed_write
+from ..services.response_cache import response_cache, CachedResponse, make_etag, http_date, etag_matches
+from ..services.metrics import timed
+from ..services.serialization import dumps, json_response
+from ..services.single_flight import single_flight
+from ..services.compression import encode_entry
+from ..services import outbox, history
+from .auth import get_current_user
+
+# Schema-driven CRUD: one ModuleSpec per module generates the Pydantic models, the prepared SQL,
+# the list query (filters, fields=, keyset pagination) and the GET/POST/PUT handlers.
+
+CRUD_MAX_PAGE_SIZE = int(os.getenv("CRUD_MAX_PAGE_SIZE", "1000"))
+
+# Version slots bumped by a statement trigger on every write to the table (see database_schema.sql); their
+# sum is the table version. Always one row: change_cursor is the change-feed position taken before the list is read.
+TABLE_VERSION_SQL = """
+    SELECT sum(version)::bigint AS version, max(updated_at) AS updated_at,
+           pg_snapshot_xmin(pg_current_snapshot())::text AS change_cursor
+    FROM table_versions WHERE table_name = %s;
+"""
+
+
+class Field:
+    """Coluna de um módulo.
+
+    ``filter``: "in" (query param repetível, coluna = ANY) ou "range" (``<param>_de`` / ``<param>_ate``).
+    Campos não graváveis (chave, data de criação) só aparecem no modelo de resposta.
+    """
+
+    def __init__(self, name, type, required=True, writable=True, filter=None, param=None):
+        self.name = name
+        self.type = type
+        self.required = required
+        self.writable = writable
+        self.filter = filter
+        self.param = param or name
+
+
+class ModuleSpec:
+    """Declaração de um módulo: tabela, colunas, ordem da listagem, eventos da outbox e textos das mensagens.
+
+    ``version_column``: coluna incrementada a cada UPDATE (trigger); habilita o PATCH "/{pk}" com If-Match.
+    ``history``: a tabela tem trigger de histórico; as escritas da API registram o usuário como autor.
+    """
+
+    def __init__(self, name, table, pk, fields, order_by, label, plural, not_found, prefix=None, tag=None,
+                 event_prefix=None, change_feed=False, max_page_size=CRUD_MAX_PAGE_SIZE, version_column=None, history=False):
+        self.name = name
+        self.table = table
+        self.pk = pk
+        self.fields = fields
+        self.by_name = {field.name: field for field in fields}
+        self.order_by = order_by
+        self.label = label
+        self.plural = plural
+        self.not_found = not_found
+        self.prefix = prefix or f"/{table}"
+        self.tag = tag
+        self.event_prefix = event_prefix
+        self.change_feed = change_feed
+        self.max_page_size = max_page_size
+        self.version_column = version_column
+        self.history = history
+
+        # Whitelisted identifiers: only these are ever interpolated into SQL
+        self.columns = tuple(field.name for field in fields)
+        self.writable = tuple(field.name for field in fields if field.writable)
+        # Keyset columns, always selected so the next cursor can be built
+        self.key_columns = (order_by, pk)
+
+        self.base_model = create_model(f"{name}Base", **{
+            field.name: (field.type, ...) if field.required else (Optional[field.type], None)
+            for field in fields if field.writable
+        })
+        self.model = create_model(
+            name,
+            __base__=self.base_model,
+            __doc__="Modelo de resposta: garante que apenas os campos NÃO SENSÍVEIS sejam expostos.",
+            **{field.name: (field.type if field.required else Optional[field.type], ...) for field in fields if not field.writable},
+        )
+
+        returning = ", ".join(self.columns)
+        self.insert_sql = f"""
+            INSERT INTO {table} ({", ".join(self.writable)})
+            VALUES ({", ".join(["%s"] * len(self.writable))})
+            RETURNING {returning};
+        """
+        self.update_sql = f"""
+            UPDATE {table} SET {", ".join(f"{column}=%s" for column in self.writable)}
+            WHERE {pk} = %s
+            RETURNING {returning};
+        """
+        self.list_query = list_query_dependency(self)
+
+        # PATCH body: every writable column optional; an explicit null is only accepted where the column allows it
+        self.patch_model = create_model(f"{name}Patch", **{
+            field.name: (field.type if field.required else Optional[field.type], None)
+            for field in fields if field.writable
+        })
+        if version_column:
+            self.version_sql = f"SELECT {version_column} FROM {table} WHERE {pk} = %s;"
+
+    def params(self, item):
+        """Parâmetros posicionais de INSERT/UPDATE na ordem das colunas graváveis."""
+        return tuple(getattr(item, column) for column in self.writable)
+
+    def patch_sql(self, changes, pk_value, expected_version=None):
+        """UPDATE só das colunas enviadas; com ``expected_version`` não altera nada se a linha mudou."""
+        columns = [column for column in self.writable if column in changes]
+        assignments = ", ".join(f"{column}=%s" for column in columns)
+        sql = f"UPDATE {self.table} SET {assignments} WHERE {self.pk} = %s"
+        params = [changes[column] for column in columns] + [pk_value]
+        if expected_version is not None:
+            sql += f" AND {self.version_column} = %s"
+            params.append(expected_version)
+        returning = ", ".join(self.columns)
+        return sql + f" RETURNING {returning};", params
+
+    def row_etag(self, version) -> str:
+        return f'"{version}"'
+
+    def parse_if_match(self, if_match):
+        """Versão esperada do cabeçalho If-Match (``"<versão>"``), obrigatório no PATCH.
+
+        Ausente ou ``*`` responde 428: sem a versão lida não há como detectar a escrita concorrente.
+        """
+        if if_match is None or if_match.strip() in ("", "*"):
+            raise HTTPException(
+                status_code=428,
+                detail="Cabeçalho If-Match obrigatório: envie a versão (ETag) lida antes de editar.",
+            )
+        value = if_match.strip()
+        if value.startswith("W/"):
+            value = value[2:]
+        try:
+            return int(value.strip('"'))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Cabeçalho If-Match inválido.")
+
+    def enqueue(self, action, ids):
+        """Comandos da outbox para ``<event_prefix>.<action>`` (vazio se o módulo não emite eventos)."""
+        if not self.event_prefix:
+            return []
+        return outbox.enqueue_statements(f"{self.event_prefix}.{action}", ids, self.table, self.pk)
+
+    def audit(self, user):
+        """Comandos que identificam o autor da escrita para o histórico (vazio se o módulo não tem histórico)."""
+        if not self.history:
+            return []
+        return history.actor_statements(history.actor_name(user))
+
+    def committed(self):
+        """Efeitos pós-commit de qualquer escrita no módulo: limpa o cache de listagem, acorda a outbox
+        e marca a requisição para receber o LSN da escrita (read-your-writes)."""
+        response_cache.invalidate(self.table)
+        note_committed_write()
+        if self.event_prefix and outbox.OUTBOX_ENABLED:
+            outbox.dispatcher.notify()
+
+    # --- Keyset cursor ---
+
+    def encode_cursor(self, order_value, pk_value) -> str:
+        """Cursor opaco com a posição (coluna de ordem, chave) da última linha da página."""
+        value = order_value.isoformat() if isinstance(order_value, (date, datetime)) else str(order_value)
+        raw = f"{value}|{pk_value}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            value, pk_value = raw.split("|", 1)
+            order_type = self.by_name[self.order_by].type
+            if order_type in (date, datetime):
+                value = order_type.fromisoformat(value)
+            elif order_type is not str:
+                value = order_type(value)
+            return value, uuid.UUID(pk_value)
+        except Exception:
+            raise HTTPException(status_code=422, detail="Cursor de paginação inválido.")
+
+
+class ListQuery:
+    """Filtros, projeção (fields=) e paginação por cursor (keyset na coluna de ordem + chave) da listagem."""
+
+    def __init__(self, spec: ModuleSpec, fields=None, limit=None, cursor=None, layout="rows", **values):
+        self.spec = spec
+        self.filters = {field.name: values.get(field.name) for field in spec.fields if field.filter == "in"}
+        self.ranges = []
+        for field in spec.fields:
+            if field.filter == "range":
+                self.ranges.append((field.name, '>=', values.get(f"{field.param}_de")))
+                self.ranges.append((field.name, '<=', values.get(f"{field.param}_ate")))
+        self.limit = limit
+        self.after = spec.decode_cursor(cursor) if cursor else None
+        self.layout = layout
+        # Normalized query identity for the response cache / ETag
+        self.cache_key = (
+            tuple((k, tuple(sorted(v))) for k, v in self.filters.items() if v),
+            tuple(value for _, _, value in self.ranges), fields, limit, cursor, layout,
+        )
+
+        self.fields = None
+        if fields:
+            requested = [f.strip() for f in fields.split(",") if f.strip()]
+            unknown = [f for f in requested if f not in spec.columns]
+            if unknown:
+                raise HTTPException(status_code=422, detail=f"Campos inválidos em fields: {', '.join(unknown)}")
+            self.fields = list(dict.fromkeys(list(spec.key_columns) + requested))
+        # Rows are fetched as tuples in this column order
+        self.columns = self.fields or list(spec.columns)
+        self._index = {column: i for i, column in enumerate(self.columns)}
+
+    def to_sql(self):
+        """Monta o SELECT parametrizado (placeholders %s, válidos no psycopg2 e no psycopg 3)."""
+        spec = self.spec
+        # Explicit list: internal columns (e.g. change_xid) never reach the API payload
+        columns = ", ".join(self.columns)
+        where, params = [], []
+        for column, values in self.filters.items():
+            if values:
+                where.append(f"{column} = ANY(%s)")
+                params.append(list(values))
+        for column, op, value in self.ranges:
+            if value is not None:
+                where.append(f"{column} {op} %s")
+                params.append(value)
+        if self.after:
+            where.append(f"({spec.order_by}, {spec.pk}) < (%s, %s)")
+            params.extend(self.after)
+
+        sql = f"SELECT {columns} FROM {spec.table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {spec.order_by} DESC, {spec.pk} DESC"
+        if self.limit is not None:
+            # One extra row tells us whether there is a next page
+            sql += " LIMIT %s"
+            params.append(self.limit + 1)
+        return sql + ";", params
+
+    def page(self, rows):
+        """Corta a linha extra do keyset e retorna (linhas, próximo cursor ou None)."""
+        if self.limit is not None and len(rows) > self.limit:
+            rows = rows[:self.limit]
+            last = rows[-1]
+            return rows, self.spec.encode_cursor(last[self._index[self.spec.order_by]], last[self._index[self.spec.pk]])
+        return rows, None
+
+    def encode(self, rows):
+        """Estrutura JSON da página (linhas em tuplas, na ordem de ``self.columns``) conforme o layout pedido."""
+        if self.layout == "columns":
+            values = list(zip(*rows)) if rows else [()] * len(self.columns)
+            return {"format": "columns", "columns": {col: list(column) for col, column in zip(self.columns, values)}}
+        if self.layout == "arrays":
+            return {"format": "arrays", "columns": self.columns, "rows": rows}
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in rows]
+
+
+def list_query_dependency(spec: ModuleSpec):
+    """Dependência FastAPI com um query param por filtro declarado; retorna o ListQuery do módulo."""
+    keyword = inspect.Parameter.KEYWORD_ONLY
+    parameters = []
+    for field in spec.fields:
+        if field.filter == "in":
+            parameters.append(inspect.Parameter(field.name, keyword, default=Query(None), annotation=Optional[List[field.type]]))
+        elif field.filter == "range":
+            for suffix in ("de", "ate"):
+                parameters.append(inspect.Parameter(f"{field.param}_{suffix}", keyword, default=None, annotation=Optional[field.type]))
+    parameters += [
+        inspect.Parameter("fields", keyword, annotation=Optional[str], default=Query(
+            None, description=f"Colunas separadas por vírgula; {' e '.join(spec.key_columns)} são sempre incluídas.")),
+        inspect.Parameter("limit", keyword, annotation=Optional[int], default=Query(
+            None, ge=1, le=spec.max_page_size, description="Tamanho da página; sem limit retorna todas as linhas.")),
+        inspect.Parameter("cursor", keyword, annotation=Optional[str], default=Query(
+            None, description="Valor de X-Next-Cursor da página anterior.")),
+        inspect.Parameter("layout", keyword, annotation=Literal["rows", "columns", "arrays"], default=Query(
+            "rows", description="rows: lista de objetos; columns: {coluna: [valores]} para carga direta em DataFrame; "
+                                "arrays: {columns: [nomes], rows: [[valores]]}, o formato mais compacto.")),
+    ]
+
+    def dependency(**values):
+        return ListQuery(spec, **values)
+
+    dependency.__signature__ = inspect.Signature(parameters)
+    return dependency
+
+
+# --- Conditional GET / response cache for list endpoints ---
+
+def list_validators(query: ListQuery, version_row):
+    """(versão, ETag, Last-Modified) da listagem a partir da última alteração da tabela."""
+    version = version_row['version'] if version_row and version_row['version'] is not None else 0
+    updated_at = version_row['updated_at'] if version_row else None
+    return version, make_etag(query.spec.table, version, query.cache_key), http_date(updated_at)
+
+def cached_list_response(query: ListQuery, version_row, if_none_match, accept_encoding=None):
+    """Resposta 304 ou corpo do cache em memória; None quando é preciso consultar o banco."""
+    version, etag, last_modified = list_validators(query, version_row)
+    headers = {"ETag": etag}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    cached = response_cache.get(query.spec.table, version, query.cache_key)
+    if cached is not None:
+        return entry_response(cached, accept_encoding)
+    return None
+
+def encode_list(query: ListQuery, version_row, rows) -> CachedResponse:
+    """Serializa a página uma única vez e guarda no cache (o mesmo corpo serve às requisições coalescidas)."""
+    version, etag, last_modified = list_validators(query, version_row)
+    rows, next_cursor = query.page(rows)
+    with timed("serialization"):
+        body = dumps(query.encode(rows))
+    extra = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    if query.spec.change_feed and version_row and version_row.get('change_cursor'):
+        # Cached with the body: an older cursor only means a few rows are re-sent by /changes
+        extra["X-Change-Cursor"] = version_row['change_cursor']
+    entry = CachedResponse(body, etag, last_modified, extra)
+    response_cache.set(query.spec.table, version, query.cache_key, entry)
+    return entry
+
+def entry_response(entry: CachedResponse, accept_encoding=None) -> Response:
+    headers = {"ETag": entry.etag, **entry.headers}
+    if entry.last_modified:
+        headers["Last-Modified"] = entry.last_modified
+    # Compressed once per encoding and kept with the cached body
+    body, headers = encode_entry(entry, accept_encoding, headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def list_flight_key(query: ListQuery, version_row):
+    """Chave do single-flight: requisições com a mesma versão da tabela e a mesma consulta."""
+    return list_validators(query, version_row)[0], query.cache_key
+
+
+# --- Generated handlers (psycopg2; the psycopg 3 mirror lives in crud_async.py) ---
+
+def add_crud_routes(router: APIRouter, spec: ModuleSpec):
+    """Registra GET "" (listagem), POST "", PUT "/{pk}" e, com ``version_column``, PATCH "/{pk}" do módulo no router."""
+    Base, Model = spec.base_model, spec.model
+
+    @router.get("", response_model=List[Model], name=f"list_{spec.table}")
+    def list_items(request: Request, query: ListQuery = Depends(spec.list_query), if_none_match: Optional[str] = Header(None),
+                   accept_encoding: Optional[str] = Header(None)):
+        min_lsn = request_min_lsn(request)
+        try:
+            # Short checkout: the connection goes back to the pool before waiting on another request's flight
+            with read_connection(min_lsn) as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                cursor.execute(TABLE_VERSION_SQL, (spec.table,))
+                version_row = cursor.fetchone()
+            cached = cached_list_response(query, version_row, if_none_match, accept_encoding)
+            if cached is not None:
+                return cached
+
+            def load_page():
+                # Only the leader borrows a connection for the query. Plain cursor: tuples straight
+                # from the driver, encoded without re-validation
+                with read_connection(min_lsn) as conn, conn.cursor() as cursor:
+                    cursor.execute(*query.to_sql())
+                    return encode_list(query, version_row, cursor.fetchall())
+
+            # Concurrent identical reads in this worker share one query and one encoded body
+            entry = single_flight.do(f"list_{spec.table}", list_flight_key(query, version_row), load_page)
+            return entry_response(entry, accept_encoding)
+        except HTTPException:
+            raise
+        except Exception as e:
+            print(f"Erro ao buscar {spec.plural}: {e}")
+            raise HTTPException(status_code=500, detail="Erro interno ao buscar dados.")
+
+    @router.post("", response_model=Model, status_code=201, name=f"create_{spec.table}")
+    def create_item(item: Base, user=Depends(get_current_user), conn=Depends(get_db)):
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                for statement in spec.audit(user):
+                    cur.execute(*statement)
+                cur.execute(spec.insert_sql, spec.params(item))
+
+                new_item = cur.fetchone()
+                for statement in spec.enqueue("created", [new_item[spec.pk]]):
+                    cur.execute(*statement)
+                conn.commit()
+                spec.committed()
+
+                # Trusted DB row: response_model only documents the contract
+                return json_response(new_item, status_code=201)
+
+        except Exception as e:
+            conn.rollback()
+            print(f"Erro ao criar {spec.label}: {e}")
+            raise HTTPException(status_code=400, detail=f"Erro ao criar {spec.label}. Verifique os dados de entrada.")
+
+    @router.put(f"/{{{spec.pk}}}", response_model=Model, name=f"update_{spec.table}")
+    def update_item(item: Base, item_id: uuid.UUID = Path(..., alias=spec.pk), user=Depends(get_current_user), conn=Depends(get_db)):
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                for statement in spec.audit(user):
+                    cur.execute(*statement)
+                cur.execute(spec.update_sql, spec.params(item) + (item_id,))
+
+                updated_item = cur.fetchone()
+                if not updated_item:
+                    raise HTTPException(status_code=404, detail=spec.not_found)
+
+                for statement in spec.enqueue("updated", [item_id]):
+                    cur.execute(*statement)
+                conn.commit()
+                spec.committed()
+                return json_response(updated_item)
+
+        except HTTPException:
+            conn.rollback()
+            raise
+        except Exception as e:
+            conn.rollback()
+            print(f"Erro ao atualizar {spec.label}: {e}")
+            raise HTTPException(status_code=400, detail=f"Erro ao atualizar {spec.label}.")
+
+    if spec.version_column:
+        add_patch_route(router, spec)
+    return router
+
+
+def patch_changes(spec: ModuleSpec, item):
+    """Colunas enviadas no corpo do PATCH (ao menos uma)."""
+    changes = item.model_dump(exclude_unset=True)
+    if not changes:
+        raise HTTPException(status_code=422, detail="Nenhum campo para atualizar.")
+    return changes
+
+def patch_conflict(spec: ModuleSpec, current):
+    """404 se a linha não existe; 412 (com a ETag atual) se a versão do If-Match ficou para trás."""
+    if current is None:
+        return HTTPException(status_code=404, detail=spec.not_found)
+    return HTTPException(
+        status_code=412,
+        detail=f"{spec.label.capitalize()} alterada por outra pessoa; recarregue os dados antes de salvar.",
+        headers={"ETag": spec.row_etag(current[spec.version_column])},
+    )
+
+PATCH_RESPONSES = {
+    412: {"description": "A versão do If-Match não é mais a atual."},
+    428: {"description": "Cabeçalho If-Match ausente."},
+}
+
+
+def add_patch_route(router: APIRouter, spec: ModuleSpec):
+    """PATCH "/{pk}": atualização parcial com controle otimista de concorrência (If-Match)."""
+    Patch, Model = spec.patch_model, spec.model
+
+    @router.patch(f"/{{{spec.pk}}}", response_model=Model, responses=PATCH_RESPONSES, name=f"patch_{spec.table}")
+    def patch_item(item: Patch, item_id: uuid.UUID = Path(..., alias=spec.pk), if_match: Optional[str] = Header(None), user=Depends(get_current_user), conn=Depends(get_db)):
+        changes = patch_changes(spec, item)
+        expected = spec.parse_if_match(if_match)
+        try:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                for statement in spec.audit(user):
+                    cur.execute(*statement)
+                cur.execute(*spec.patch_sql(changes, item_id, expected))
+
+                updated_item = cur.fetchone()
+                if not updated_item:
+                    cur.execute(spec.version_sql, (item_id,))
+                    raise patch_conflict(spec, cur.fetchone())
+
+                for statement in spec.enqueue("updated", [item_id]):
+                    cur.execute(*statement)
+                conn.commit()
+                spec.committed()
+                return json_response(updated_item, headers={"ETag": spec.row_etag(updated_item[spec.version_column])})
+
+        except HTTPException:
+            conn.rollback()
+            raise
+        except Exception as e:
+            conn.rollback()
+            print(f"Erro ao atualizar {spec.label}: {e}")
+            raise HTTPException(status_code=400, detail=f"Erro ao atualizar {spec.label}.")
+
+
+def crud_router(spec: ModuleSpec):
+    """Router autenticado do módulo, com os handlers do driver configurado (DB_DRIVER)."""
+    router = APIRouter(
+        prefix=spec.prefix,
+        tags=[spec.tag or spec.name],
+        # Every module route requires a valid Bearer token
+        dependencies=[Depends(get_current_user)],
+    )
+    if DB_DRIVER == "async":
+        from .crud_async import add_async_crud_routes
+        return add_async_crud_routes(router, spec)
+    return add_crud_routes(router, spec)
@@ -0,0 +1,129 @@
+import uuid
+from fastapi import APIRouter, HTTPException, Depends, Header, Path, Request
+from psycopg.rows import tuple_row
+from typing import List, Optional
+
+from ..config.async_database import get_async_db, async_read_connection
+from ..config.replicas import request_min_lsn
+from ..services.serialization import json_response
+from ..services.single_flight import single_flight
+from .crud import ModuleSpec, ListQuery, TABLE_VERSION_SQL, cached_list_response, encode_list, entry_response, list_flight_key, patch_changes, patch_conflict, PATCH_RESPONSES
+from .auth import get_current_user
+
+# Same generated handlers as crud.add_crud_routes, served with psycopg 3 (DB_DRIVER=async)
+
+
+def add_async_crud_routes(router: APIRouter, spec: ModuleSpec):
+    """Registra GET "" (listagem), POST "" e PUT "/{pk}" assíncronos do módulo no router."""
+    Base, Model = spec.base_model, spec.model
+
+    @router.get("", response_model=List[Model], name=f"list_{spec.table}")
+    async def list_items(request: Request, query: ListQuery = Depends(spec.list_query), if_none_match: Optional[str] = Header(None),
+                         accept_encoding: Optional[str] = Header(None)):
+        min_lsn = request_min_lsn(request)
+        try:
+            # Short checkout, released before waiting on another request's flight (see crud.add_crud_routes)
+            async with async_read_connection(min_lsn) as conn, conn.cursor() as cursor:
+                await cursor.execute(TABLE_VERSION_SQL, (spec.table,))
+                version_row = await cursor.fetchone()
+            cached = cached_list_response(query, version_row, if_none_match, accept_encoding)
+            if cached is not None:
+                return cached
+
+            async def load_page():
+                async with async_read_connection(min_lsn) as conn, conn.cursor(row_factory=tuple_row) as cursor:
+                    await cursor.execute(*query.to_sql())
+                    return encode_list(query, version_row, await cursor.fetchall())
+
+            entry = await single_flight.do_async(f"list_{spec.table}", list_flight_key(query, version_row), load_page)
+            return entry_response(entry, accept_encoding)
+        except HTTPException:
+            raise
+        except Exception as e:
+            print(f"Erro ao buscar {spec.plural}: {e}")
+            raise HTTPException(status_code=500, detail="Erro interno ao buscar dados.")
+
+    @router.post("", response_model=Model, status_code=201, name=f"create_{spec.table}")
+    async def create_item(item: Base, user=Depends(get_current_user), conn=Depends(get_async_db)):
+        try:
+            async with conn.cursor() as cur:
+                for statement in spec.audit(user):
+                    await cur.execute(*statement)
+                await cur.execute(spec.insert_sql, spec.params(item))
+
+                new_item = await cur.fetchone()
+                for statement in spec.enqueue("created", [new_item[spec.pk]]):
+                    await cur.execute(*statement)
+                await conn.commit()
+                spec.committed()
+
+                return json_response(new_item, status_code=201)
+
+        except Exception as e:
+            await conn.rollback()
+            print(f"Erro ao criar {spec.label}: {e}")
+            raise HTTPException(status_code=400, detail=f"Erro ao criar {spec.label}. Verifique os dados de entrada.")
+
+    @router.put(f"/{{{spec.pk}}}", response_model=Model, name=f"update_{spec.table}")
+    async def update_item(item: Base, item_id: uuid.UUID = Path(..., alias=spec.pk), user=Depends(get_current_user), conn=Depends(get_async_db)):
+        try:
+            async with conn.cursor() as cur:
+                for statement in spec.audit(user):
+                    await cur.execute(*statement)
+                await cur.execute(spec.update_sql, spec.params(item) + (item_id,))
+
+                updated_item = await cur.fetchone()
+                if not updated_item:
+                    raise HTTPException(status_code=404, detail=spec.not_found)
+
+                for statement in spec.enqueue("updated", [item_id]):
+                    await cur.execute(*statement)
+                await conn.commit()
+                spec.committed()
+                return json_response(updated_item)
+
+        except HTTPException:
+            await conn.rollback()
+            raise
+        except Exception as e:
+            await conn.rollback()
+            print(f"Erro ao atualizar {spec.label}: {e}")
+            raise HTTPException(status_code=400, detail=f"Erro ao atualizar {spec.label}.")
+
+    if spec.version_column:
+        add_async_patch_route(router, spec)
+    return router
+
+
+def add_async_patch_route(router: APIRouter, spec: ModuleSpec):
+    """PATCH "/{pk}" assíncrono: atualização parcial com If-Match (mesmo contrato de crud.add_patch_route)."""
+    Patch, Model = spec.patch_model, spec.model
+
+    @router.patch(f"/{{{spec.pk}}}", response_model=Model, responses=PATCH_RESPONSES, name=f"patch_{spec.table}")
+    async def patch_item(item: Patch, item_id: uuid.UUID = Path(..., alias=spec.pk), if_match: Optional[str] = Header(None), user=Depends(get_current_user), conn=Depends(get_async_db)):
+        changes = patch_changes(spec, item)
+        expected = spec.parse_if_match(if_match)
+        try:
+            async with conn.cursor() as cur:
+                for statement in spec.audit(user):
+                    await cur.execute(*statement)
+                await cur.execute(*spec.patch_sql(changes, item_id, expected))
+
+                updated_item = await cur.fetchone()
+                if not updated_item:
+                    await cur.execute(spec.version_sql, (item_id,))
+                    raise patch_conflict(spec, await cur.fetchone())
+
+                for statement in spec.enqueue("updated", [item_id]):
+                    await cur.execute(*statement)
+                await conn.commit()
+                spec.committed()
+                return json_response(updated_item, headers={"ETag": spec.row_etag(updated_item[spec.version_column])})
+
+        except HTTPException:
+            await conn.rollback()
+            raise
+        except Exception as e:
+            await conn.rollback()
+            print(f"Erro ao atualizar {spec.label}: {e}")
+            raise HTTPException(status_code=400, detail=f"Erro ao atualizar {spec.label}.")
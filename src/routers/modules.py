@@ -0,0 +1,79 @@
+import uuid
+from datetime import date, datetime
+
+from .crud import Field, ModuleSpec, crud_router
+
+# Contatos, Atas e Vendas: declarations only, handlers/SQL/models come from the CRUD engine.
+# Keys: /contacts, /minutes and /sales (same names the front-end's get_endpoint uses).
+
+CONTACTS = ModuleSpec(
+    name="Contact",
+    table="contacts",
+    pk="contact_id",
+    fields=[
+        Field("contact_id", uuid.UUID, writable=False),
+        Field("pessoa_orgao", str),
+        Field("motivo", str),
+        Field("data_follow_up", date, filter="range"),
+        Field("responsavel", str, filter="in"),
+        Field("status", str, filter="in"),
+        Field("prioridade", str, filter="in"),
+        Field("observacoes", str, required=False),
+        Field("data_criacao", datetime, writable=False, filter="range", param="criado"),
+    ],
+    order_by="data_follow_up",
+    label="contato",
+    plural="contatos",
+    not_found="Contato não encontrado.",
+    tag="Contatos",
+    event_prefix="contact",
+)
+
+MINUTES = ModuleSpec(
+    name="Minute",
+    table="minutes",
+    pk="minute_id",
+    fields=[
+        Field("minute_id", uuid.UUID, writable=False),
+        Field("orgao", str),
+        Field("objeto", str),
+        Field("valor_utilizado", float),
+        Field("vigencia_final", date, filter="range"),
+        Field("status", str, filter="in"),
+        Field("prioridade", str, filter="in"),
+        Field("data_criacao", datetime, writable=False, filter="range", param="criado"),
+    ],
+    order_by="vigencia_final",
+    label="ata",
+    plural="atas",
+    not_found="Ata não encontrada.",
+    tag="Atas",
+    event_prefix="minute",
+)
+
+SALES = ModuleSpec(
+    name="Sale",
+    table="sales",
+    pk="sale_id",
+    fields=[
+        Field("sale_id", uuid.UUID, writable=False),
+        Field("tipo", str, filter="in"),
+        Field("cliente", str),
+        Field("valor_total", float),
+        Field("data_venda", date, filter="range"),
+        Field("responsavel", str, filter="in"),
+        Field("status", str, filter="in"),
+        Field("data_criacao", datetime, writable=False, filter="range", param="criado"),
+    ],
+    order_by="data_venda",
+    label="venda",
+    plural="vendas",
+    not_found="Venda não encontrada.",
+    tag="Vendas",
+    event_prefix="sale",
+)
+
+MODULE_SPECS = [CONTACTS, MINUTES, SALES]
+
+# One authenticated router per module, for the configured DB_DRIVER
+routers = [crud_router(spec) for spec in MODULE_SPECS]
@@ -0,0 +1,108 @@
+import os
+import hmac
+from fastapi import APIRouter, Depends, Response
+from fastapi.security import HTTPAuthorizationCredentials
+from typing import Any, Dict, Optional
+
+from ..config.database import get_pool
+from ..config.async_database import get_async_pool_stats
+from ..config.replicas import replica_router
+from ..services.response_cache import response_cache
+from ..services import outbox
+from ..services.auth import token_cache
+from ..services.change_feed import change_listener
+from ..services import scheduler
+from ..services.metrics import registry, render_metrics
+from ..services.profiler import profiler
+from ..services.single_flight import single_flight
+from ..services import compression
+from .auth import get_current_user, bearer_scheme
+
+# Scrapers usually cannot log in: when set, GET /metrics also accepts this value as the Bearer token
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+async def require_metrics_access(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)):
+    """Acesso ao /metrics: Bearer METRICS_TOKEN (scraper) ou um token de usuário válido."""
+    if METRICS_TOKEN and credentials is not None and hmac.compare_digest(credentials.credentials.encode(), METRICS_TOKEN.encode()):
+        return None
+    return await get_current_user(credentials)
+
+
+router = APIRouter(
+    prefix="/monitor",
+    tags=["Monitoramento"],
+    # Pool, cache, replica and profile details are internal: every /monitor route requires a valid Bearer token
+    dependencies=[Depends(get_current_user)],
+)
+
+# GET /metrics (Prometheus scrape target), outside the /monitor prefix
+metrics_router = APIRouter(tags=["Monitoramento"], dependencies=[Depends(require_metrics_access)])
+
+# Existing per-worker stats, exported as gauges next to the request/query histograms
+registry.add_collector("db_pool", "Pool psycopg2 do worker", lambda: get_pool().stats())
+registry.add_collector("db_pool_async", "Pool psycopg 3 do worker", get_async_pool_stats)
+registry.add_collector("response_cache", "Cache de respostas do worker", response_cache.stats)
+registry.add_collector("auth_token_cache", "Cache de tokens verificados", token_cache.stats)
+registry.add_collector("outbox_dispatcher", "Dispatcher da outbox", outbox.dispatcher.stats)
+registry.add_collector("change_listener", "Listener do change feed", change_listener.stats)
+registry.add_collector("single_flight", "Leituras coalescidas do worker", single_flight.stats)
+registry.add_collector("db_replicas", "Réplicas de leitura (saúde e atraso)", replica_router.metrics)
+
+# Connection pool stats for this worker
+@router.get("/pool")
+def get_pool_stats() -> Dict[str, Any]:
+    return get_pool().stats()
+
+# Async (psycopg 3) pool stats, only populated when DB_DRIVER=async
+@router.get("/pool/async")
+def get_async_pool_stats_endpoint() -> Dict[str, Any]:
+    return get_async_pool_stats()
+
+# In-process response cache stats for this worker
+@router.get("/cache")
+def get_response_cache_stats() -> Dict[str, Any]:
+    return response_cache.stats()
+
+# n8n outbox: dispatcher counters for this worker and event totals by status
+@router.get("/outbox")
+def get_outbox_stats() -> Dict[str, Any]:
+    return {"enabled": outbox.OUTBOX_ENABLED, "dispatcher": outbox.dispatcher.stats(), "events": outbox.outbox_counts()}
+
+# Verified-token LRU for this worker (hit ratio = requests authenticated without a JWT decode)
+@router.get("/auth")
+def get_auth_cache_stats() -> Dict[str, Any]:
+    return token_cache.stats()
+
+# LISTEN connection behind /tasks/changes/stream for this worker
+@router.get("/changes")
+def get_change_feed_stats() -> Dict[str, Any]:
+    return change_listener.stats()
+
+# Status scheduler: leadership/counters of this worker and the latest runs of whichever worker led
+@router.get("/scheduler")
+def get_scheduler_stats() -> Dict[str, Any]:
+    return {"enabled": scheduler.SCHEDULER_ENABLED, "worker": scheduler.scheduler.stats(), "last_runs": scheduler.last_runs()}
+
+# Single-flight: leaders/followers per route (coalescing_ratio = followers / total) for this worker
+@router.get("/single-flight")
+def get_single_flight_stats() -> Dict[str, Any]:
+    return single_flight.stats()
+
+# Read replicas as seen by this worker's monitor thread (health, replay LSN, lag, pool)
+@router.get("/replicas")
+def get_replica_stats() -> Dict[str, Any]:
+    return replica_router.stats()
+
+# Response compression: bytes saved, CPU time and cached variants reused, per encoding
+@router.get("/compression")
+def get_compression_stats() -> Dict[str, Any]:
+    return compression.stats()
+
+# Sampling profiler (PROFILER_ENABLED=true): folded stacks of the slowest requests kept on disk
+@router.get("/profiles")
+def get_profiler_stats() -> Dict[str, Any]:
+    return profiler.stats()
+
+@metrics_router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,129 @@
+from fastapi import APIRouter, HTTPException, Depends, Header, Request, Response
+from psycopg2.extras import RealDictCursor
+from typing import Optional
+
+from ..config.replicas import read_connection, request_min_lsn
+from ..services.response_cache import response_cache, CachedResponse, make_etag, http_date, etag_matches
+from ..services.metrics import timed
+from ..services.serialization import dumps
+from ..services.single_flight import single_flight
+from ..services.compression import encode_entry
+from ..services.scheduler import STATS_EXPIRY_DAYS
+from .auth import get_current_user
+
+# KPIs for the dashboard header (served for both DB drivers). Counts come from stats_counters,
+# kept up to date by statement triggers on every write; only the date-dependent KPIs are computed here.
+router = APIRouter(
+    prefix="/stats",
+    tags=["Indicadores"],
+    dependencies=[Depends(get_current_user)],
+)
+
+
+STATS_TABLES = ("tasks", "contacts", "minutes", "sales")
+# Tables whose counters also carry the sum of a value column
+STATS_AMOUNT_TABLES = {"minutes": "valor_utilizado", "sales": "valor_total"}
+# Counter dimension -> payload key
+STATS_DIMENSIONS = {"status": "by_status", "prioridade": "by_priority", "responsavel": "by_responsavel", "tipo": "by_type"}
+
+# Sum of the table versions: grows with every write to any of them, so it keys the cache and the ETag
+STATS_VERSION_SQL = """
+    SELECT coalesce(sum(version), 0) AS version, max(updated_at) AS updated_at, current_date AS today
+    FROM table_versions WHERE table_name = ANY(%s);
+"""
+
+# Each counter is the sum of its slots (writers spread over slots, see database_schema.sql)
+STATS_COUNTERS_SQL = """
+    SELECT table_name, dimension, bucket, sum(total)::bigint AS total, sum(amount) AS amount
+    FROM stats_counters
+    WHERE table_name = ANY(%s)
+    GROUP BY table_name, dimension, bucket
+    HAVING sum(total) <> 0
+    ORDER BY table_name, dimension, total DESC, bucket;
+"""
+
+# Partial index tasks_open_data_limite_idx: only open tasks past their deadline are read
+TASKS_OVERDUE_SQL = """
+    SELECT responsavel, count(*) AS total, count(*) FILTER (WHERE prioridade = 'Alta') AS alta
+    FROM tasks
+    WHERE status <> 'Concluída' AND data_limite < current_date
+    GROUP BY responsavel
+    ORDER BY total DESC, responsavel;
+"""
+
+MINUTES_EXPIRING_SQL = """
+    SELECT count(*) AS total, count(*) FILTER (WHERE vigencia_final < current_date + 30) AS em_30_dias
+    FROM minutes
+    WHERE vigencia_final BETWEEN current_date AND current_date + %s AND status <> 'Expirada';
+"""
+
+
+def build_stats(counters, overdue, expiring):
+    """Monta o payload compacto a partir dos contadores e dos indicadores calculados na leitura."""
+    payload = {table: {"total": 0} for table in STATS_TABLES}
+    for row in counters:
+        section = payload[row['table_name']]
+        amount_column = STATS_AMOUNT_TABLES.get(row['table_name'])
+        if row['dimension'] == "total":
+            section["total"] = row['total']
+            if amount_column:
+                section[amount_column] = row['amount']
+            continue
+        value = {"count": row['total'], "amount": row['amount']} if amount_column else row['total']
+        section.setdefault(STATS_DIMENSIONS[row['dimension']], {})[row['bucket']] = value
+
+    payload["tasks"]["overdue"] = sum(row['total'] for row in overdue)
+    payload["tasks"]["overdue_by_responsavel"] = {
+        row['responsavel']: {"count": row['total'], "alta": row['alta']} for row in overdue
+    }
+    payload["minutes"]["expiring"] = {"days": STATS_EXPIRY_DAYS, "count": expiring['total'], "in_30_days": expiring['em_30_dias']}
+    return payload
+
+
+@router.get("")
+def get_stats(request: Request, if_none_match: Optional[str] = Header(None), accept_encoding: Optional[str] = Header(None)):
+    min_lsn = request_min_lsn(request)
+    try:
+        # Short checkout: the connection goes back to the pool before waiting on another request's flight
+        with read_connection(min_lsn) as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(STATS_VERSION_SQL, (list(STATS_TABLES),))
+            version_row = cur.fetchone()
+        # Overdue/expiring depend on the date: a new day is a new cache entry
+        key = (version_row['today'].isoformat(), STATS_EXPIRY_DAYS)
+        etag = make_etag("stats", version_row['version'], key)
+        headers = {"ETag": etag}
+        last_modified = http_date(version_row['updated_at'])
+        if last_modified:
+            headers["Last-Modified"] = last_modified
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        cached = response_cache.get("stats", version_row['version'], key)
+        if cached is not None:
+            body, headers = encode_entry(cached, accept_encoding, headers)
+            return Response(content=body, media_type="application/json", headers=headers)
+
+        def load_stats():
+            # Only the leader borrows a connection for the KPI queries
+            with read_connection(min_lsn) as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(STATS_COUNTERS_SQL, (list(STATS_TABLES),))
+                counters = cur.fetchall()
+                cur.execute(TASKS_OVERDUE_SQL)
+                overdue = cur.fetchall()
+                cur.execute(MINUTES_EXPIRING_SQL, (STATS_EXPIRY_DAYS,))
+                expiring = cur.fetchone()
+            with timed("serialization"):
+                body = dumps(build_stats(counters, overdue, expiring))
+            entry = CachedResponse(body, etag, last_modified)
+            response_cache.set("stats", version_row['version'], key, entry)
+            return entry
+
+        # Every dashboard opened at once asks for the same KPIs: one worker-wide computation
+        entry = single_flight.do("get_stats", (version_row['version'], key), load_stats)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Erro ao calcular indicadores: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno ao calcular indicadores.")
+
+    body, headers = encode_entry(entry, accept_encoding, headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,93 +1,236 @@
 import os
 import uuid
-from fastapi import APIRouter, HTTPException, Body
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, ValidationError
 from datetime import date, datetime
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from typing import List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
-from ..config.database import get_db_connection, N8N_WEBHOOK_URL
+from ..config.database import get_db
+from .crud import Field, ModuleSpec, add_crud_routes
+from .auth import get_current_user
 
 router = APIRouter(
     prefix="/tasks",
     tags=["Tarefas"],
+    # Every /tasks route requires a valid Bearer token
+    dependencies=[Depends(get_current_user)],
+)
+
+TASKS_MAX_PAGE_SIZE = int(os.getenv("TASKS_MAX_PAGE_SIZE", "1000"))
+
+# /tasks declaration for the CRUD engine: models, SQL, filters and keyset order (data_limite, task_id)
+TASKS = ModuleSpec(
+    name="Task",
+    table="tasks",
+    pk="task_id",
+    fields=[
+        Field("task_id", uuid.UUID, writable=False),
+        Field("descricao", str),
+        Field("responsavel", str, filter="in"),
+        Field("data_limite", date, filter="range"),
+        Field("status", str, filter="in"),
+        Field("prioridade", str, filter="in"),
+        Field("observacoes", str, required=False),
+        Field("data_criacao", datetime, writable=False, filter="range", param="criado"),
+        Field("row_version", int, writable=False),
+    ],
+    order_by="data_limite",
+    label="tarefa",
+    plural="tarefas",
+    not_found="Tarefa não encontrada.",
+    event_prefix="task",
+    change_feed=True,
+    max_page_size=TASKS_MAX_PAGE_SIZE,
+    version_column="row_version",
+    history=True,
 )
 
 # Pydantic models to validate and encript data
-class TaskBase(BaseModel):
-    descricao: str
-    responsavel: str
-    data_limite: date
-    status: str
-    prioridade: str
-    observacoes: Optional[str] = None
-
-class Task(TaskBase):
-    """Modelo de resposta: garante que apenas os campos NÃO SENSÍVEIS sejam expostos."""
-    task_id: uuid.UUID
-    data_criacao: datetime
-
-@router.get("", response_model=List[Task])
-def get_all_tasks():
-    conn = get_db_connection()
-    try:
-        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
-            cursor.execute("SELECT * FROM tasks ORDER BY data_limite DESC;")
-            tasks = cursor.fetchall()
-            return tasks
-    except Exception as e:
-        print(f"Erro ao buscar tarefas: {e}")
-        raise HTTPException(status_code=500, detail="Erro interno ao buscar dados.")
-    finally:
-        if conn:
-            conn.close()
-
-@router.post("", response_model=Task, status_code=201)
-def create_task(task: TaskBase):
-    conn = get_db_connection()
-    try:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                INSERT INTO tasks (descricao, responsavel, data_limite, status, prioridade, observacoes)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                RETURNING *;
-            """, (task.descricao, task.responsavel, task.data_limite, task.status, task.prioridade, task.observacoes))
-            
-            new_task = cur.fetchone()
-            conn.commit()
+TaskBase, Task = TASKS.base_model, TASKS.model
+TASK_COLUMNS = TASKS.columns
+# FastAPI dependency building the ListQuery for /tasks (also used by the export)
+TaskListQuery = TASKS.list_query
 
-            return new_task
+# --- Change feed (GET /tasks/changes, /tasks/changes/stream) ---
 
-    except Exception as e:
-        conn.rollback()
-        raise HTTPException(status_code=400, detail="Erro ao criar tarefa. Verifique os dados de entrada.")
-    finally:
-        if conn:
-            conn.close()
-
-@router.put("/{task_id}", response_model=Task)
-def update_task(task_id: uuid.UUID, task: TaskBase):
-    conn = get_db_connection()
+# Above this many changed rows the client is told to reload the full list instead
+TASK_CHANGES_MAX_ROWS = int(os.getenv("TASK_CHANGES_MAX_ROWS", "5000"))
+
+CHANGE_CURSOR_SQL = "SELECT pg_snapshot_xmin(pg_current_snapshot())::text AS cursor;"
+
+TASK_CHANGES_SQL = f"""
+    SELECT {", ".join(TASK_COLUMNS)} FROM tasks
+    WHERE change_xid >= %s::xid8
+    ORDER BY change_xid
+    LIMIT %s;
+"""
+
+def parse_change_cursor(since: str) -> str:
+    if not since.isdigit():
+        raise HTTPException(status_code=422, detail="Cursor de alterações inválido.")
+    return since
+
+def read_changes(cur, since: str):
+    """Linhas alteradas desde o cursor e o próximo cursor (cursor RealDict/dict_row).
+
+    Entrega pelo menos uma vez: linhas de transações que ainda estavam abertas na leitura anterior
+    voltam a ser enviadas, então o cliente deve aplicá-las como upsert por task_id.
+    """
+    # The next cursor is taken first: anything committed after it is still >= it next time
+    cur.execute(CHANGE_CURSOR_SQL)
+    next_cursor = cur.fetchone()['cursor']
+    cur.execute(TASK_CHANGES_SQL, (since, TASK_CHANGES_MAX_ROWS + 1))
+    rows = cur.fetchall()
+    return changes_payload(next_cursor, rows)
+
+def changes_payload(next_cursor, rows):
+    if len(rows) > TASK_CHANGES_MAX_ROWS:
+        return {"cursor": next_cursor, "reset": True, "changes": []}
+    return {"cursor": next_cursor, "reset": False, "changes": rows}
+
+def tasks_committed():
+    """Efeitos pós-commit de qualquer escrita em tasks: limpa o cache de listagem e acorda a outbox."""
+    TASKS.committed()
+
+def batch_events(results):
+    """Eventos da outbox para um lote: (tipo, ids) de criados e atualizados."""
+    created = [r.task_id for r in results if r is not None and r.status == "created"]
+    updated = [r.task_id for r in results if r is not None and r.status == "updated"]
+    return TASKS.enqueue("created", created) + TASKS.enqueue("updated", updated)
+
+# --- Batch import (POST /tasks:batch) ---
+
+TASKS_BATCH_MAX_ITEMS = int(os.getenv("TASKS_BATCH_MAX_ITEMS", "5000"))
+# Rows per multi-row INSERT statement (7 params per row, Postgres allows 65535)
+TASKS_BATCH_CHUNK_SIZE = int(os.getenv("TASKS_BATCH_CHUNK_SIZE", "1000"))
+
+class TaskBatchRequest(BaseModel):
+    """Lote de tarefas. Itens são validados um a um: os inválidos não abortam o lote."""
+    mode: Literal["insert", "upsert"] = "insert"
+    items: List[Dict[str, Any]]
+
+class TaskBatchItemResult(BaseModel):
+    index: int
+    status: Literal["created", "updated", "error"]
+    task_id: Optional[uuid.UUID] = None
+    errors: Optional[List[Any]] = None
+
+class TaskBatchResponse(BaseModel):
+    created: int
+    updated: int
+    failed: int
+    results: List[TaskBatchItemResult]
+
+def prepare_batch(batch: TaskBatchRequest):
+    """Valida cada item e atribui o task_id (o enviado, no upsert, ou um novo UUID).
+
+    Retorna (results, entries): ``results`` indexado pela posição no lote, já com os erros de
+    validação, e ``entries`` com (index, task_id, TaskBase) dos itens válidos.
+    """
+    if len(batch.items) > TASKS_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Lote excede o limite de {TASKS_BATCH_MAX_ITEMS} itens.")
+    results = [None] * len(batch.items)
+    entries, seen = [], set()
+    for index, item in enumerate(batch.items):
+        try:
+            task = TaskBase(**item)
+        except ValidationError as e:
+            results[index] = TaskBatchItemResult(index=index, status="error", errors=jsonable_encoder(e.errors()))
+            continue
+        task_id = uuid.uuid4()
+        if batch.mode == "upsert" and item.get("task_id"):
+            try:
+                task_id = uuid.UUID(str(item["task_id"]))
+            except ValueError:
+                results[index] = TaskBatchItemResult(index=index, status="error", errors=["task_id inválido."])
+                continue
+            if task_id in seen:
+                results[index] = TaskBatchItemResult(index=index, status="error", task_id=task_id, errors=["task_id duplicado no lote."])
+                continue
+        seen.add(task_id)
+        entries.append((index, task_id, task))
+    return results, entries
+
+def batch_chunks(entries):
+    for start in range(0, len(entries), TASKS_BATCH_CHUNK_SIZE):
+        yield entries[start:start + TASKS_BATCH_CHUNK_SIZE]
+
+def batch_sql(entries, upsert: bool):
+    """Um único INSERT multi-linha (com ON CONFLICT no upsert) para o bloco de itens."""
+    values, params = [], []
+    placeholders = "(" + ", ".join(["%s"] * (len(TASKS.writable) + 1)) + ")"
+    for _, task_id, task in entries:
+        values.append(placeholders)
+        params.append(task_id)
+        params.extend(TASKS.params(task))
+    sql = f"""
+        INSERT INTO tasks (task_id, {", ".join(TASKS.writable)})
+        VALUES {", ".join(values)}
+    """
+    if upsert:
+        sql += f"""
+        ON CONFLICT (task_id) DO UPDATE SET
+            {", ".join(f"{column}=EXCLUDED.{column}" for column in TASKS.writable)}
+        """
+    # xmax = 0 only for freshly inserted rows
+    return sql + " RETURNING task_id, (xmax = 0) AS inserted;", params
+
+def record_batch_rows(results, entries, rows):
+    """Marca como created/updated os itens cujo task_id voltou no RETURNING."""
+    by_id = {row['task_id']: row['inserted'] for row in rows}
+    for index, task_id, _ in entries:
+        if task_id in by_id:
+            results[index] = TaskBatchItemResult(index=index, status="created" if by_id[task_id] else "updated", task_id=task_id)
+
+def batch_error(results, index, task_id, error):
+    print(f"Erro ao gravar item {index} do lote: {error}")
+    results[index] = TaskBatchItemResult(index=index, status="error", task_id=task_id, errors=["Erro ao gravar tarefa. Verifique os dados de entrada."])
+
+def batch_response(results):
+    counts = {"created": 0, "updated": 0, "error": 0}
+    for result in results:
+        counts[result.status] += 1
+    return TaskBatchResponse(created=counts["created"], updated=counts["updated"], failed=counts["error"], results=results)
+
+# GET "", POST "", PUT and PATCH "/{task_id}" come from the CRUD engine
+add_crud_routes(router, TASKS)
+
+@router.post(":batch", response_model=TaskBatchResponse)
+def batch_tasks(batch: TaskBatchRequest, user=Depends(get_current_user), conn=Depends(get_db)):
+    results, entries = prepare_batch(batch)
+    upsert = batch.mode == "upsert"
     try:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("""
-                UPDATE tasks SET
-                    descricao=%s, responsavel=%s, data_limite=%s, status=%s, prioridade=%s, observacoes=%s
-                WHERE task_id = %s
-                RETURNING *;
-            """, (task.descricao, task.responsavel, task.data_limite, task.status, task.prioridade, task.observacoes, task_id))
-            
-            updated_task = cur.fetchone()
-            if not updated_task:
-                raise HTTPException(status_code=404, detail="Tarefa não encontrada.")
-            
+            for statement in TASKS.audit(user):
+                cur.execute(*statement)
+            for chunk in batch_chunks(entries):
+                cur.execute("SAVEPOINT task_batch;")
+                try:
+                    cur.execute(*batch_sql(chunk, upsert))
+                    record_batch_rows(results, chunk, cur.fetchall())
+                    cur.execute("RELEASE SAVEPOINT task_batch;")
+                except (psycopg2.Error, ValueError):
+                    # A bad row (server error, or client-side ValueError such as a NUL byte) fails the whole statement: retry this chunk row by row to isolate it
+                    cur.execute("ROLLBACK TO SAVEPOINT task_batch;")
+                    for entry in chunk:
+                        cur.execute("SAVEPOINT task_batch_item;")
+                        try:
+                            cur.execute(*batch_sql([entry], upsert))
+                            record_batch_rows(results, [entry], cur.fetchall())
+                            cur.execute("RELEASE SAVEPOINT task_batch_item;")
+                        except (psycopg2.Error, ValueError) as e:
+                            cur.execute("ROLLBACK TO SAVEPOINT task_batch_item;")
+                            batch_error(results, entry[0], entry[1], e)
+            for statement in batch_events(results):
+                cur.execute(*statement)
             conn.commit()
-            return updated_task
+            tasks_committed()
+            return batch_response(results)
 
     except Exception as e:
         conn.rollback()
-        raise HTTPException(status_code=400, detail="Erro ao atualizar tarefa.")
-    finally:
-        if conn:
-            conn.close()
\ No newline at end of file
+        print(f"Erro ao gravar lote de tarefas: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno ao gravar o lote.")
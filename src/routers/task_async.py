@@ -0,0 +1,58 @@
+import psycopg
+from fastapi import APIRouter, HTTPException, Depends
+
+from ..config.async_database import get_async_db
+from .task import (
+    TASKS, tasks_committed, batch_events,
+    TaskBatchRequest, TaskBatchResponse, prepare_batch, batch_chunks, batch_sql, record_batch_rows, batch_error, batch_response,
+)
+from .crud_async import add_async_crud_routes
+from .auth import get_current_user
+
+# Same /tasks contract as routers/task.py, served with async handlers (DB_DRIVER=async)
+router = APIRouter(
+    prefix="/tasks",
+    tags=["Tarefas"],
+    # Every /tasks route requires a valid Bearer token
+    dependencies=[Depends(get_current_user)],
+)
+
+# GET "", POST "", PUT and PATCH "/{task_id}" come from the CRUD engine
+add_async_crud_routes(router, TASKS)
+
+@router.post(":batch", response_model=TaskBatchResponse)
+async def batch_tasks(batch: TaskBatchRequest, user=Depends(get_current_user), conn=Depends(get_async_db)):
+    results, entries = prepare_batch(batch)
+    upsert = batch.mode == "upsert"
+    try:
+        async with conn.cursor() as cur:
+            for statement in TASKS.audit(user):
+                await cur.execute(*statement)
+            for chunk in batch_chunks(entries):
+                await cur.execute("SAVEPOINT task_batch;")
+                try:
+                    await cur.execute(*batch_sql(chunk, upsert))
+                    record_batch_rows(results, chunk, await cur.fetchall())
+                    await cur.execute("RELEASE SAVEPOINT task_batch;")
+                except (psycopg.Error, ValueError):
+                    # A bad row (server error, or client-side ValueError from adaptation) fails the whole statement: retry this chunk row by row to isolate it
+                    await cur.execute("ROLLBACK TO SAVEPOINT task_batch;")
+                    for entry in chunk:
+                        await cur.execute("SAVEPOINT task_batch_item;")
+                        try:
+                            await cur.execute(*batch_sql([entry], upsert))
+                            record_batch_rows(results, [entry], await cur.fetchall())
+                            await cur.execute("RELEASE SAVEPOINT task_batch_item;")
+                        except (psycopg.Error, ValueError) as e:
+                            await cur.execute("ROLLBACK TO SAVEPOINT task_batch_item;")
+                            batch_error(results, entry[0], entry[1], e)
+            for statement in batch_events(results):
+                await cur.execute(*statement)
+            await conn.commit()
+            tasks_committed()
+            return batch_response(results)
+
+    except Exception as e:
+        await conn.rollback()
+        print(f"Erro ao gravar lote de tarefas: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno ao gravar o lote.")
@@ -0,0 +1,104 @@
+import os
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from psycopg2.extras import RealDictCursor
+from typing import Optional
+
+from ..config.database import get_db, get_db_connection, release_db_connection
+from ..services.change_feed import change_listener
+from ..services.metrics import timed
+from ..services.serialization import dumps
+from .task import read_changes, parse_change_cursor, CHANGE_CURSOR_SQL
+from .auth import get_current_user
+
+# Change feed for /tasks: delta polling and a server-sent events stream (served for both DB drivers)
+router = APIRouter(
+    prefix="/tasks",
+    tags=["Tarefas"],
+    # Every /tasks route requires a valid Bearer token
+    dependencies=[Depends(get_current_user)],
+)
+
+# Comment line sent when idle so proxies keep the SSE connection open
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+
+def encode_changes(payload):
+    # str: also embedded in the SSE "data:" line (compact JSON never contains a newline)
+    with timed("serialization"):
+        return dumps(payload).decode()
+
+
+@router.get("/changes")
+def get_task_changes(
+    since: str = Query(..., description="Valor de X-Change-Cursor da listagem ou 'cursor' da resposta anterior."),
+    conn=Depends(get_db),
+):
+    since = parse_change_cursor(since)
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            payload = read_changes(cur, since)
+        conn.rollback()
+    except Exception as e:
+        print(f"Erro ao buscar alterações de tarefas: {e}")
+        conn.rollback()
+        raise HTTPException(status_code=500, detail="Erro interno ao buscar alterações.")
+    return Response(content=encode_changes(payload), media_type="application/json")
+
+
+def read_changes_once(since):
+    """Uma leitura do feed com conexão do pool (chamada em threadpool pelo stream SSE)."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            if since is None:
+                # No starting point: stream only what changes from now on
+                cur.execute(CHANGE_CURSOR_SQL)
+                return {"cursor": cur.fetchone()['cursor'], "reset": False, "changes": []}
+            return read_changes(cur, since)
+    finally:
+        conn.rollback()
+        release_db_connection(conn)
+
+
+async def stream_changes(request: Request, since: Optional[str]):
+    loop = asyncio.get_running_loop()
+    wakeup = asyncio.Event()
+    # Called from the listener thread on every committed write to tasks (any worker)
+    token = change_listener.subscribe("tasks", lambda: loop.call_soon_threadsafe(wakeup.set))
+    try:
+        yield "retry: 3000\n\n"
+        while not await request.is_disconnected():
+            # Cleared before reading, so a commit landing during the read triggers another round
+            wakeup.clear()
+            payload = await run_in_threadpool(read_changes_once, since)
+            if payload["changes"] or payload["reset"]:
+                yield f"id: {payload['cursor']}\nevent: tasks\ndata: {encode_changes(payload)}\n\n"
+            since = payload["cursor"]
+            try:
+                await asyncio.wait_for(wakeup.wait(), SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+    except Exception as e:
+        print(f"Erro no stream de alterações de tarefas: {e}")
+    finally:
+        change_listener.unsubscribe(token)
+
+
+@router.get("/changes/stream")
+async def stream_task_changes(
+    request: Request,
+    since: Optional[str] = Query(None, description="Cursor inicial; sem cursor, envia só o que mudar a partir de agora."),
+    last_event_id: Optional[str] = Header(None),
+):
+    # EventSource reconnects resend the last received id: resume from it
+    since = since or last_event_id
+    if since is not None:
+        since = parse_change_cursor(since)
+    return StreamingResponse(
+        stream_changes(request, since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
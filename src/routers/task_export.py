@@ -0,0 +1,180 @@
+import io
+import os
+import csv
+import uuid
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Literal
+
+from ..config.replicas import get_read_connection, release_read_connection, request_min_lsn
+from .crud import ListQuery
+from .task import TaskListQuery
+from .auth import get_current_user
+
+# pyarrow is only needed for the Parquet / Arrow formats
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+router = APIRouter(
+    prefix="/tasks",
+    tags=["Tarefas"],
+    # Every /tasks route requires a valid Bearer token
+    dependencies=[Depends(get_current_user)],
+)
+
+# Rows fetched per server-side cursor round-trip (and per CSV chunk / Parquet row group)
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+def arrow_schema(columns):
+    types = {
+        'task_id': pa.string(),
+        'descricao': pa.string(),
+        'responsavel': pa.string(),
+        'data_limite': pa.date32(),
+        'status': pa.string(),
+        'prioridade': pa.string(),
+        'observacoes': pa.string(),
+        'data_criacao': pa.timestamp('us', tz='UTC'),
+        'row_version': pa.int64(),
+    }
+    return pa.schema([(col, types.get(col, pa.string())) for col in columns])
+
+
+class _ChunkSink(io.RawIOBase):
+    """Destino de escrita do pyarrow que acumula os bytes até o próximo ``drain()``."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+def _chunks(cursor):
+    while True:
+        rows = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+        if not rows:
+            return
+        yield rows
+
+def _columns(rows):
+    # Transpose tuples into columns; UUIDs go out as text
+    columns = [list(values) for values in zip(*rows)]
+    for values in columns:
+        if isinstance(values[0], uuid.UUID):
+            values[:] = [str(v) for v in values]
+    return columns
+
+def _encode_csv(cursor, names):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for rows in _chunks(cursor):
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+def _encode_arrow(cursor, names, parquet):
+    schema = arrow_schema(names)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema) if parquet else pa.ipc.new_stream(sink, schema)
+    try:
+        for rows in _chunks(cursor):
+            batch = pa.record_batch(_columns(rows), schema=schema)
+            if parquet:
+                writer.write_table(pa.Table.from_batches([batch]))
+            else:
+                writer.write_batch(batch)
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+def stream_export(min_lsn, sql, params, export_format):
+    """Gera o arquivo em blocos a partir de um cursor nomeado (server-side); a memória fica constante.
+
+    A conexão é emprestada aqui dentro, na primeira iteração: um gerador que nunca começa não segura
+    conexão, e um que começa sempre a devolve no ``finally`` (fim, erro, cliente desconectado ou coleta).
+    """
+    replica, conn = get_read_connection(min_lsn)
+    try:
+        # Named cursor: rows stay on the server and arrive EXPORT_CHUNK_SIZE at a time
+        with conn.cursor(name=f"tasks_export_{uuid.uuid4().hex}") as cursor:
+            cursor.itersize = EXPORT_CHUNK_SIZE
+            cursor.execute(sql, params)
+            # The first fetch populates cursor.description
+            first = cursor.fetchmany(EXPORT_CHUNK_SIZE)
+            names = [col.name for col in cursor.description]
+            source = _PrefetchedCursor(cursor, first)
+            if export_format == "csv":
+                yield from _encode_csv(source, names)
+            else:
+                yield from _encode_arrow(source, names, parquet=export_format == "parquet")
+        conn.rollback()
+    except Exception as e:
+        print(f"Erro ao exportar tarefas: {e}")
+        conn.rollback()
+        raise
+    finally:
+        release_read_connection(replica, conn)
+
+
+class _PrefetchedCursor:
+    """Devolve primeiro o bloco já lido (usado para descobrir as colunas) e depois continua no cursor."""
+
+    def __init__(self, cursor, first):
+        self._cursor = cursor
+        self._first = first
+
+    def fetchmany(self, size):
+        if self._first is not None:
+            rows, self._first = self._first, None
+            return rows
+        return self._cursor.fetchmany(size)
+
+
+@router.get("/export")
+def export_tasks(
+    request: Request,
+    format: Literal["csv", "parquet", "arrow"] = Query("csv", description="csv, parquet ou arrow (Arrow IPC stream)."),
+    query: ListQuery = Depends(TaskListQuery),
+):
+    if format != "csv" and pa is None:
+        raise HTTPException(status_code=501, detail="Exportação Parquet/Arrow requer o pacote 'pyarrow' na API.")
+    # The export always streams the whole filtered set (no page limit)
+    query.limit = None
+    sql, params = query.to_sql()
+    extension = "arrows" if format == "arrow" else format
+    return StreamingResponse(
+        stream_export(request_min_lsn(request), sql, params, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tarefas.{extension}"'},
+    )
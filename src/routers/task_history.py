@@ -0,0 +1,117 @@
+import os
+import uuid
+import base64
+from fastapi import APIRouter, HTTPException, Depends, Header, Path, Query, Response
+from pydantic import BaseModel
+from psycopg2.extras import RealDictCursor
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
+
+from ..config.replicas import get_read_db
+from ..services.response_cache import make_etag, http_date, etag_matches
+from ..services.metrics import timed
+from ..services.serialization import dumps
+from .crud import TABLE_VERSION_SQL
+from .task import TASKS
+from .auth import get_current_user
+
+# Audit trail of a task (served for both DB drivers): field-level diffs written by the task_history trigger,
+# newest first. Each monthly partition has its own (task_id, changed_at, history_id) index, so a page is a
+# few index probes however large the history grows.
+router = APIRouter(
+    prefix="/tasks",
+    tags=["Tarefas"],
+    # Every /tasks route requires a valid Bearer token
+    dependencies=[Depends(get_current_user)],
+)
+
+TASK_HISTORY_PAGE_SIZE = int(os.getenv("TASK_HISTORY_PAGE_SIZE", "50"))
+TASK_HISTORY_MAX_PAGE_SIZE = int(os.getenv("TASK_HISTORY_MAX_PAGE_SIZE", "500"))
+
+
+class TaskHistoryEntry(BaseModel):
+    """Uma escrita na tarefa: só os campos alterados, como [antes, depois]."""
+    history_id: int
+    changed_at: datetime
+    operation: Literal["created", "updated"]
+    row_version: int
+    changed_by: Optional[str] = None
+    changes: Dict[str, List[Any]]
+
+
+# changed_at <= cursor is redundant with the row comparison but lets the planner prune older-only partitions
+TASK_HISTORY_SQL = """
+    SELECT history_id, changed_at, operation, row_version, changed_by, changes
+    FROM task_history
+    WHERE task_id = %(task_id)s
+      AND (%(field)s::text IS NULL OR changes ? %(field)s)
+      AND (%(before_id)s::bigint IS NULL
+           OR (changed_at <= %(before_at)s AND (changed_at, history_id) < (%(before_at)s, %(before_id)s)))
+    ORDER BY changed_at DESC, history_id DESC
+    LIMIT %(limit)s;
+"""
+
+TASK_EXISTS_SQL = "SELECT 1 FROM tasks WHERE task_id = %s;"
+
+
+def encode_history_cursor(changed_at, history_id) -> str:
+    return base64.urlsafe_b64encode(f"{changed_at.isoformat()}|{history_id}".encode()).decode().rstrip("=")
+
+def decode_history_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        changed_at, history_id = raw.split("|", 1)
+        return datetime.fromisoformat(changed_at), int(history_id)
+    except Exception:
+        raise HTTPException(status_code=422, detail="Cursor de paginação inválido.")
+
+
+@router.get("/{task_id}/history", response_model=List[TaskHistoryEntry])
+def get_task_history(
+    task_id: uuid.UUID = Path(...),
+    field: Optional[str] = Query(None, description="Só as escritas que alteraram este campo (ex.: data_limite)."),
+    limit: int = Query(TASK_HISTORY_PAGE_SIZE, ge=1, le=TASK_HISTORY_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor da página anterior."),
+    if_none_match: Optional[str] = Header(None),
+    conn=Depends(get_read_db),
+):
+    if field is not None and field not in TASKS.writable:
+        raise HTTPException(status_code=422, detail=f"Campo inválido: {field}. Use: {', '.join(TASKS.writable)}.")
+    before_at, before_id = decode_history_cursor(cursor) if cursor else (None, None)
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            # History only grows with writes to tasks, so the tasks version identifies this page too
+            cur.execute(TABLE_VERSION_SQL, (TASKS.table,))
+            version_row = cur.fetchone()
+            etag = make_etag(TASKS.table, version_row['version'] or 0, ("history", str(task_id), field, limit, cursor))
+            headers = {"ETag": etag}
+            last_modified = http_date(version_row['updated_at'])
+            if last_modified:
+                headers["Last-Modified"] = last_modified
+            if etag_matches(if_none_match, etag):
+                conn.rollback()
+                return Response(status_code=304, headers=headers)
+
+            cur.execute(TASK_HISTORY_SQL, {
+                "task_id": task_id, "field": field, "before_at": before_at, "before_id": before_id, "limit": limit + 1,
+            })
+            rows = cur.fetchall()
+            if not rows and cursor is None:
+                cur.execute(TASK_EXISTS_SQL, (task_id,))
+                if cur.fetchone() is None:
+                    raise HTTPException(status_code=404, detail=TASKS.not_found)
+        conn.rollback()
+    except HTTPException:
+        conn.rollback()
+        raise
+    except Exception as e:
+        print(f"Erro ao buscar histórico da tarefa: {e}")
+        conn.rollback()
+        raise HTTPException(status_code=500, detail="Erro interno ao buscar o histórico.")
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_history_cursor(rows[-1]['changed_at'], rows[-1]['history_id'])
+    with timed("serialization"):
+        body = dumps(rows)
+    return Response(content=body, media_type="application/json", headers=headers)
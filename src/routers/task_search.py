@@ -0,0 +1,124 @@
+import os
+import uuid
+import base64
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
+from pydantic import create_model
+from psycopg2.extras import RealDictCursor
+from typing import List, Optional
+
+from ..config.replicas import read_connection, request_min_lsn
+from ..services.response_cache import response_cache, CachedResponse, make_etag, http_date, etag_matches
+from ..services.metrics import timed
+from ..services.serialization import dumps
+from ..services.single_flight import single_flight
+from ..services.compression import encode_entry
+from .crud import TABLE_VERSION_SQL
+from .task import TASKS, Task, TASK_COLUMNS
+from .auth import get_current_user
+
+# Ranked search over /tasks (served for both DB drivers): Portuguese full-text on the stored
+# search_vector (GIN) plus trigram word similarity on the description for misspelled names.
+router = APIRouter(
+    prefix="/tasks",
+    tags=["Tarefas"],
+    # Every /tasks route requires a valid Bearer token
+    dependencies=[Depends(get_current_user)],
+)
+
+TASK_SEARCH_PAGE_SIZE = int(os.getenv("TASK_SEARCH_PAGE_SIZE", "50"))
+TASK_SEARCH_MAX_PAGE_SIZE = int(os.getenv("TASK_SEARCH_MAX_PAGE_SIZE", "200"))
+# pg_trgm.word_similarity_threshold for the typo match (0..1; Postgres default is 0.6)
+TASK_SEARCH_SIMILARITY = float(os.getenv("TASK_SEARCH_SIMILARITY", "0.5"))
+
+TaskSearchResult = create_model("TaskSearchResult", __base__=Task, rank=(float, ...))
+
+SIMILARITY_SQL = "SELECT set_config('pg_trgm.word_similarity_threshold', %s, true);"
+
+# rank: full-text score normalized to [0, 1) (ts_rank_cd flag 32) + trigram word similarity, as float8
+# so the value in the cursor round-trips exactly. Both WHERE branches are GIN index scans (BitmapOr).
+TASK_SEARCH_SQL = f"""
+    SELECT {", ".join(TASK_COLUMNS)}, rank FROM (
+        SELECT {", ".join(f"t.{column}" for column in TASK_COLUMNS)},
+               ts_rank_cd(t.search_vector, q.query, 32)::float8 + word_similarity(q.term, search_normalize(t.descricao)) AS rank
+        FROM tasks t,
+             (SELECT websearch_to_tsquery('portuguese_unaccent', %(q)s) AS query, search_normalize(%(q)s) AS term) AS q
+        WHERE t.search_vector @@ q.query OR q.term <%% search_normalize(t.descricao)
+    ) AS found
+    WHERE %(after_rank)s::float8 IS NULL OR (rank, task_id) < (%(after_rank)s::float8, %(after_id)s::uuid)
+    ORDER BY rank DESC, task_id DESC
+    LIMIT %(limit)s;
+"""
+
+
+def encode_search_cursor(rank, task_id) -> str:
+    return base64.urlsafe_b64encode(f"{rank!r}|{task_id}".encode()).decode().rstrip("=")
+
+def decode_search_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        rank, task_id = raw.split("|", 1)
+        return float(rank), uuid.UUID(task_id)
+    except Exception:
+        raise HTTPException(status_code=422, detail="Cursor de paginação inválido.")
+
+
+@router.get("/search", response_model=List[TaskSearchResult])
+def search_tasks(
+    request: Request,
+    q: str = Query(..., min_length=2, max_length=200, description="Termos da busca (aceita \"frase exata\", OR e -exclusão)."),
+    limit: int = Query(TASK_SEARCH_PAGE_SIZE, ge=1, le=TASK_SEARCH_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor da página anterior."),
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
+    q = " ".join(q.split())
+    if len(q) < 2:
+        raise HTTPException(status_code=422, detail="Informe ao menos 2 caracteres para a busca.")
+    after_rank, after_id = decode_search_cursor(cursor) if cursor else (None, None)
+    key = ("search", q.lower(), limit, cursor, TASK_SEARCH_SIMILARITY)
+    min_lsn = request_min_lsn(request)
+    try:
+        # Short checkout: the connection goes back to the pool before waiting on another request's flight
+        with read_connection(min_lsn) as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(TABLE_VERSION_SQL, (TASKS.table,))
+            version_row = cur.fetchone()
+        version = version_row['version'] or 0
+        # Same namespace as the /tasks list: any write to tasks invalidates the cached searches too
+        etag = make_etag(TASKS.table, version, key)
+        headers = {"ETag": etag}
+        last_modified = http_date(version_row['updated_at'])
+        if last_modified:
+            headers["Last-Modified"] = last_modified
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        cached = response_cache.get(TASKS.table, version, key)
+        if cached is not None:
+            body, headers = encode_entry(cached, accept_encoding, {**headers, **cached.headers})
+            return Response(content=body, media_type="application/json", headers=headers)
+
+        def load_results():
+            # Only the leader borrows a connection for the search
+            with read_connection(min_lsn) as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+                # Transaction-local: the pooled connection keeps the server default
+                cur.execute(SIMILARITY_SQL, (str(TASK_SEARCH_SIMILARITY),))
+                cur.execute(TASK_SEARCH_SQL, {"q": q, "after_rank": after_rank, "after_id": after_id, "limit": limit + 1})
+                rows = cur.fetchall()
+            extra = {}
+            if len(rows) > limit:
+                rows = rows[:limit]
+                extra["X-Next-Cursor"] = encode_search_cursor(rows[-1]['rank'], rows[-1]['task_id'])
+            with timed("serialization"):
+                body = dumps(rows)
+            entry = CachedResponse(body, etag, last_modified, extra)
+            response_cache.set(TASKS.table, version, key, entry)
+            return entry
+
+        entry = single_flight.do("search_tasks", (version, key), load_results)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Erro ao buscar tarefas: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno ao buscar tarefas.")
+
+    body, headers = encode_entry(entry, accept_encoding, {**headers, **entry.headers})
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,214 @@
+import os
+import time
+import base64
+import hashlib
+import hmac
+import secrets
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import jwt
+
+from ..config.database import get_db_connection, release_db_connection
+
+# Signed access tokens (JWT) and password hashing for the API users
+
+# No default: with an HS* algorithm the API refuses to start without it (see check_signing_config)
+SECRET_KEY = os.getenv("SECRET_KEY")
+# HS256 signs with SECRET_KEY; RS256/ES256 sign with JWT_PRIVATE_KEY_FILE and verify with JWT_PUBLIC_KEY_FILE
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+JWT_PRIVATE_KEY_FILE = os.getenv("JWT_PRIVATE_KEY_FILE")
+JWT_PUBLIC_KEY_FILE = os.getenv("JWT_PUBLIC_KEY_FILE")
+JWT_ISSUER = os.getenv("JWT_ISSUER", "abzinho-api")
+JWT_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRE_MINUTES", "480"))
+JWT_LEEWAY_SECONDS = int(os.getenv("JWT_LEEWAY_SECONDS", "30"))
+# Recently verified tokens kept per worker (0 disables the cache)
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "1024"))
+
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", "600000"))
+PASSWORD_MIN_LENGTH = 8
+
+
+def check_signing_config():
+    """Falha se não houver chave para assinar/verificar os tokens (chamado no startup da API)."""
+    if JWT_ALGORITHM.startswith("HS"):
+        if not SECRET_KEY:
+            raise RuntimeError(f"SECRET_KEY não definida: obrigatória com JWT_ALGORITHM={JWT_ALGORITHM}.")
+    elif not JWT_PRIVATE_KEY_FILE or not JWT_PUBLIC_KEY_FILE:
+        raise RuntimeError(f"JWT_PRIVATE_KEY_FILE e JWT_PUBLIC_KEY_FILE são obrigatórios com JWT_ALGORITHM={JWT_ALGORITHM}.")
+
+USER_BY_EMAIL_SQL = "SELECT user_id, nome, email, password_hash, ativo FROM users WHERE email = lower(%s);"
+
+INSERT_USER_SQL = """
+    INSERT INTO users (nome, email, password_hash) VALUES (%s, lower(%s), %s)
+    ON CONFLICT (email) DO NOTHING
+    RETURNING user_id, nome, email;
+"""
+
+
+class AuthError(Exception):
+    """Token ausente, inválido ou expirado."""
+
+
+# --- Senhas ---
+
+def hash_password(password, iterations=PASSWORD_HASH_ITERATIONS):
+    """Hash PBKDF2-SHA256 no formato ``pbkdf2_sha256$iterações$salt$hash`` (base64)."""
+    salt = secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return "$".join(["pbkdf2_sha256", str(iterations), base64.b64encode(salt).decode(), base64.b64encode(digest).decode()])
+
+
+def verify_password(password, password_hash):
+    """Confere a senha com o hash gravado (comparação em tempo constante). Lento de propósito."""
+    try:
+        scheme, iterations, salt, expected = password_hash.split("$")
+        if scheme != "pbkdf2_sha256":
+            return False
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), base64.b64decode(salt), int(iterations))
+        return hmac.compare_digest(digest, base64.b64decode(expected))
+    except (ValueError, AttributeError):
+        return False
+
+
+# Checked when the e-mail does not exist, so both paths cost the same hashing time
+_DUMMY_HASH = hash_password(secrets.token_hex(8))
+
+
+def authenticate_user(email, password):
+    """Busca o usuário e confere a senha; retorna o usuário ou None. Bloqueante: chamar em threadpool."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(USER_BY_EMAIL_SQL, (email.strip(),))
+            row = cur.fetchone()
+        conn.rollback()
+    finally:
+        release_db_connection(conn)
+    if row is None:
+        verify_password(password, _DUMMY_HASH)
+        return None
+    user_id, nome, email, password_hash, ativo = row
+    if not verify_password(password, password_hash) or not ativo:
+        return None
+    return {"user_id": str(user_id), "nome": nome, "email": email}
+
+
+def create_user(nome, email, password):
+    """Grava um novo usuário com a senha já em hash; retorna None se o e-mail já existe. Bloqueante."""
+    password_hash = hash_password(password)
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(INSERT_USER_SQL, (nome.strip(), email.strip(), password_hash))
+            row = cur.fetchone()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        release_db_connection(conn)
+    if row is None:
+        return None
+    return {"user_id": str(row[0]), "nome": row[1], "email": row[2]}
+
+
+# --- Tokens ---
+
+def _read_key(path):
+    with open(path, "rb") as key_file:
+        return key_file.read()
+
+
+@lru_cache(maxsize=None)
+def signing_key():
+    """Chave de assinatura já carregada (PEM parseado uma única vez por worker)."""
+    check_signing_config()
+    if JWT_ALGORITHM.startswith("HS"):
+        return SECRET_KEY
+    return jwt.get_algorithm_by_name(JWT_ALGORITHM).prepare_key(_read_key(JWT_PRIVATE_KEY_FILE))
+
+
+@lru_cache(maxsize=None)
+def verification_key():
+    """Chave de verificação já carregada; o decode não precisa reparsear o PEM a cada request."""
+    check_signing_config()
+    if JWT_ALGORITHM.startswith("HS"):
+        return SECRET_KEY
+    return jwt.get_algorithm_by_name(JWT_ALGORITHM).prepare_key(_read_key(JWT_PUBLIC_KEY_FILE))
+
+
+def issue_token(user):
+    """Gera o access token assinado do usuário (expira em JWT_EXPIRE_MINUTES)."""
+    now = int(time.time())
+    claims = {
+        "sub": user["user_id"],
+        "email": user["email"],
+        "name": user["nome"],
+        "iss": JWT_ISSUER,
+        "iat": now,
+        "exp": now + JWT_EXPIRE_MINUTES * 60,
+    }
+    return jwt.encode(claims, signing_key(), algorithm=JWT_ALGORITHM)
+
+
+class TokenCache:
+    """LRU thread-safe de tokens já verificados -> claims; a entrada vale até o ``exp`` do token."""
+
+    def __init__(self, max_entries=AUTH_TOKEN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token):
+        with self._lock:
+            claims = self._entries.get(token)
+            if claims is not None and claims["exp"] + JWT_LEEWAY_SECONDS > time.time():
+                self._entries.move_to_end(token)
+                self.hits += 1
+                return claims
+            if claims is not None:
+                del self._entries[token]
+            self.misses += 1
+            return None
+
+    def set(self, token, claims):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[token] = claims
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache()
+
+
+def verify_token(token):
+    """Valida assinatura, emissor e expiração do token e retorna as claims. Só CPU, sem acesso ao banco."""
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+    try:
+        claims = jwt.decode(
+            token,
+            verification_key(),
+            algorithms=[JWT_ALGORITHM],
+            issuer=JWT_ISSUER,
+            leeway=JWT_LEEWAY_SECONDS,
+            options={"require": ["exp", "iat", "sub"]},
+        )
+    except jwt.ExpiredSignatureError:
+        raise AuthError("Token expirado.")
+    except jwt.InvalidTokenError:
+        raise AuthError("Token inválido.")
+    token_cache.set(token, claims)
+    return claims
@@ -0,0 +1,118 @@
+import os
+import select
+import threading
+
+import psycopg2
+
+from ..config.database import DATABASE_URL
+
+# Cross-worker change notifications: the table_versions trigger runs pg_notify('table_changes', <table>)
+# on every write, and one LISTEN connection per worker fans the notification out to local subscribers.
+
+CHANGE_CHANNEL = "table_changes"
+CHANGE_FEED_POLL_SECONDS = float(os.getenv("CHANGE_FEED_POLL_SECONDS", "5"))
+CHANGE_FEED_RECONNECT_SECONDS = float(os.getenv("CHANGE_FEED_RECONNECT_SECONDS", "5"))
+
+
+class ChangeListener:
+    """Escuta ``LISTEN table_changes`` em uma conexão dedicada e chama os callbacks inscritos por tabela.
+
+    Os callbacks rodam na thread do listener e devem ser rápidos (ex.: ``loop.call_soon_threadsafe``).
+    A thread só é iniciada na primeira inscrição, então workers sem clientes SSE não abrem a conexão.
+    """
+
+    def __init__(self, dsn=DATABASE_URL, channel=CHANGE_CHANNEL):
+        self.dsn = dsn
+        self.channel = channel
+        self._subscribers = {}
+        self._next_token = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {"notifications": 0, "reconnects": 0, "last_error": None}
+
+    def subscribe(self, table, callback):
+        """Inscreve ``callback()`` para as alterações de ``table``; retorna o token para cancelar."""
+        with self._lock:
+            self._next_token += 1
+            token = self._next_token
+            self._subscribers[token] = (table, callback)
+        self.start()
+        return token
+
+    def unsubscribe(self, token):
+        with self._lock:
+            self._subscribers.pop(token, None)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="change-listener", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _broadcast(self, table):
+        with self._lock:
+            callbacks = [callback for subscribed, callback in self._subscribers.values() if subscribed == table]
+            self._stats["notifications"] += 1
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Erro ao notificar inscrito do change feed: {e}")
+
+    def _listen(self):
+        conn = psycopg2.connect(self.dsn)
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {self.channel};")
+            while not self._stop.is_set():
+                # Wake up periodically to honour stop(); notifications arrive as the socket becomes readable
+                if select.select([conn], [], [], CHANGE_FEED_POLL_SECONDS) == ([], [], []):
+                    continue
+                conn.poll()
+                # Several commits between two polls collapse into one wake-up per table
+                tables = {notify.payload for notify in conn.notifies}
+                conn.notifies.clear()
+                for table in tables:
+                    self._broadcast(table)
+        finally:
+            conn.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                print(f"Erro no listener do change feed: {e}")
+                with self._lock:
+                    self._stats["reconnects"] += 1
+                    self._stats["last_error"] = f"{type(e).__name__}: {e}"[:500]
+                # Subscribers re-read from their cursor on the next wake-up, so nothing is lost meanwhile
+                self._broadcast_all()
+                self._stop.wait(CHANGE_FEED_RECONNECT_SECONDS)
+
+    def _broadcast_all(self):
+        with self._lock:
+            tables = {table for table, _ in self._subscribers.values()}
+        for table in tables:
+            self._broadcast(table)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "subscribers": len(self._subscribers),
+                **self._stats,
+            }
+
+
+change_listener = ChangeListener()
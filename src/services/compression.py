@@ -0,0 +1,218 @@
+import os
+import gzip
+import time
+import threading
+from starlette.concurrency import run_in_threadpool
+
+from .metrics import registry, Counter, timed
+
+# Content-Encoding negotiation (Accept-Encoding) for responses above COMPRESSION_MIN_SIZE. Cached bodies
+# (lists, /stats, search) keep each encoded variant next to the JSON, so a cached page is compressed once
+# per encoding, not once per request; other responses with a known length are compressed by the middleware.
+# Streaming responses (export, SSE) are sent as they are.
+
+# brotli / zstandard are optional: without them only gzip is offered
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+# Below this many bytes the headers cost more than what compression saves
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+# Server preference among the encodings the client accepts with the same q
+COMPRESSION_ENCODINGS = os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip")
+# Bodies this large are compressed in the threadpool instead of on the event loop
+COMPRESSION_OFFLOAD_SIZE = int(os.getenv("COMPRESSION_OFFLOAD_SIZE", str(256 * 1024)))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+
+COMPRESSION_RESPONSES = registry.register(Counter(
+    "compression_responses", "Respostas comprimidas por codificação; source=precompressed reaproveitou a variante do cache.",
+    ("encoding", "source"),
+))
+COMPRESSION_BYTES_SAVED = registry.register(Counter(
+    "compression_bytes_saved", "Bytes a menos enviados (corpo original - comprimido).", ("encoding",),
+))
+COMPRESSION_CPU_SECONDS = registry.register(Counter(
+    "compression_cpu_seconds", "Tempo de CPU (da thread) gasto comprimindo.", ("encoding",),
+))
+
+_zstd_local = threading.local()
+
+
+def _zstd(body):
+    # ZstdCompressor objects must not be shared between threads
+    compressor = getattr(_zstd_local, "compressor", None)
+    if compressor is None:
+        compressor = _zstd_local.compressor = zstandard.ZstdCompressor(level=COMPRESSION_ZSTD_LEVEL)
+    return compressor.compress(body)
+
+
+_compressors = {"gzip": lambda body: gzip.compress(body, COMPRESSION_GZIP_LEVEL, mtime=0)}
+if brotli is not None:
+    _compressors["br"] = lambda body: brotli.compress(body, quality=COMPRESSION_BROTLI_QUALITY)
+if zstandard is not None:
+    _compressors["zstd"] = _zstd
+
+AVAILABLE_ENCODINGS = [e.strip() for e in COMPRESSION_ENCODINGS.split(",") if e.strip() in _compressors]
+
+
+class CompressionStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._encodings = {}
+
+    def record(self, encoding, source, size_in, size_out, cpu_seconds=0.0):
+        COMPRESSION_RESPONSES.inc(encoding, source)
+        COMPRESSION_BYTES_SAVED.inc(encoding, amount=size_in - size_out)
+        with self._lock:
+            stats = self._encodings.setdefault(encoding, {"responses": 0, "precompressed": 0, "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0})
+            stats["responses"] += 1
+            stats["precompressed"] += source == "precompressed"
+            stats["bytes_in"] += size_in
+            stats["bytes_out"] += size_out
+            stats["cpu_seconds"] += cpu_seconds
+
+    def snapshot(self):
+        with self._lock:
+            encodings = {encoding: dict(values) for encoding, values in self._encodings.items()}
+        for values in encodings.values():
+            values["bytes_saved"] = values["bytes_in"] - values["bytes_out"]
+            values["ratio"] = round(values["bytes_out"] / values["bytes_in"], 4) if values["bytes_in"] else 0.0
+            values["cpu_ms"] = round(values.pop("cpu_seconds") * 1000, 1)
+        return encodings
+
+
+compression_stats = CompressionStats()
+
+
+def stats():
+    return {
+        "enabled": COMPRESSION_ENABLED,
+        "min_size": COMPRESSION_MIN_SIZE,
+        "available": AVAILABLE_ENCODINGS,
+        "levels": {"gzip": COMPRESSION_GZIP_LEVEL, "br": COMPRESSION_BROTLI_QUALITY, "zstd": COMPRESSION_ZSTD_LEVEL},
+        "encodings": compression_stats.snapshot(),
+    }
+
+
+def negotiate(accept_encoding):
+    """Codificação escolhida para o cabeçalho Accept-Encoding (maior q; empate pela preferência do servidor)."""
+    if not COMPRESSION_ENABLED or not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name.strip()] = q
+    best, best_q = None, 0.0
+    for encoding in AVAILABLE_ENCODINGS:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str):
+    """Corpo comprimido e o tempo de CPU gasto (None se a compressão não reduziu o tamanho)."""
+    start = time.thread_time()
+    with timed("compression"):
+        compressed = _compressors[encoding](body)
+    cpu_seconds = time.thread_time() - start
+    COMPRESSION_CPU_SECONDS.inc(encoding, amount=cpu_seconds)
+    return (compressed if len(compressed) < len(body) else None), cpu_seconds
+
+
+def weak_etag(etag):
+    # The compressed bytes differ from the identity ones: only weak comparison (If-None-Match) still holds
+    return etag if etag is None or etag.startswith("W/") else f"W/{etag}"
+
+
+def encode_entry(entry, accept_encoding, headers):
+    """(corpo, cabeçalhos) de uma resposta do cache na codificação negociada, a partir dos ``headers`` da resposta.
+
+    Cada variante é comprimida uma vez e guardada na própria entrada (``entry.encoded``).
+    """
+    if not COMPRESSION_ENABLED or len(entry.body) < COMPRESSION_MIN_SIZE:
+        return entry.body, headers
+    headers = {**headers, "Vary": "Accept-Encoding"}
+    encoding = negotiate(accept_encoding)
+    if encoding is None:
+        return entry.body, headers
+    if encoding in entry.encoded:
+        body, source, cpu_seconds = entry.encoded[encoding], "precompressed", 0.0
+    else:
+        # Concurrent first requests may both compress; the result is the same
+        body, cpu_seconds = compress(entry.body, encoding)
+        entry.encoded[encoding] = body
+        source = "cached"
+    if body is None:
+        return entry.body, headers
+    compression_stats.record(encoding, source, len(entry.body), len(body), cpu_seconds)
+    headers["Content-Encoding"] = encoding
+    if "ETag" in headers:
+        headers["ETag"] = weak_etag(headers["ETag"])
+    return body, headers
+
+
+def _add_vary(headers):
+    vary = headers.get("vary")
+    if vary is None:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+async def compress_response(request, response):
+    """Middleware: comprime respostas com tamanho conhecido acima do limite (as já codificadas passam direto)."""
+    headers = response.headers
+    if not COMPRESSION_ENABLED or "content-encoding" in headers or request.method == "HEAD":
+        return response
+    length = headers.get("content-length")
+    if length is None or int(length) < COMPRESSION_MIN_SIZE:
+        return response
+    if not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES):
+        return response
+    _add_vary(headers)
+    encoding = negotiate(request.headers.get("accept-encoding"))
+    if encoding is None:
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    if len(body) >= COMPRESSION_OFFLOAD_SIZE:
+        compressed, cpu_seconds = await run_in_threadpool(compress, body, encoding)
+    else:
+        compressed, cpu_seconds = compress(body, encoding)
+    if compressed is None:
+        content = body
+    else:
+        content = compressed
+        compression_stats.record(encoding, "response", len(body), len(compressed), cpu_seconds)
+        headers["Content-Encoding"] = encoding
+        headers["Content-Length"] = str(len(compressed))
+        if "etag" in headers:
+            headers["ETag"] = weak_etag(headers["etag"])
+
+    async def send_body():
+        yield content
+
+    response.body_iterator = send_body()
+    return response
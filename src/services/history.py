@@ -0,0 +1,39 @@
+import os
+
+# Task history (task_history, see database_schema.sql): the diff rows are written by a trigger on tasks in
+# the same transaction as the write; the application only says who is writing (transaction-local setting
+# read by the trigger) and keeps the monthly partitions created ahead / detached behind.
+
+# Months created ahead of the current one (writes never depend on maintenance running on the 1st)
+TASK_HISTORY_PREMAKE_MONTHS = int(os.getenv("TASK_HISTORY_PREMAKE_MONTHS", "3"))
+# Months kept attached besides the current one; older partitions are detached (0 = keep all)
+TASK_HISTORY_RETENTION_MONTHS = int(os.getenv("TASK_HISTORY_RETENTION_MONTHS", "24"))
+
+# is_local = true: ends with the transaction, so a pooled connection never carries another user's name
+ACTOR_SQL = "SELECT set_config('abz.actor', %s, true);"
+
+MAINTAIN_PARTITIONS_SQL = "SELECT action, partition_name FROM maintain_task_history_partitions(%s, %s);"
+
+SCHEDULER_ACTOR = "agendador"
+
+
+def actor_name(user) -> str:
+    """Nome gravado em ``changed_by``: e-mail do usuário autenticado (ou o id, se o token não tiver e-mail)."""
+    return user.get("email") or str(user.get("user_id"))
+
+
+def actor_statements(actor):
+    """Comando (sql, params) que identifica o autor das escritas seguintes na transação.
+
+    Deve ser executado no mesmo cursor/transação, antes da escrita.
+    """
+    return [(ACTOR_SQL, (actor,))]
+
+
+def maintain_partitions(cur, months_ahead=TASK_HISTORY_PREMAKE_MONTHS, retention_months=TASK_HISTORY_RETENTION_MONTHS):
+    """Cria as partições mensais à frente e desanexa as antigas; retorna {"created": [...], "detached": [...]}."""
+    cur.execute(MAINTAIN_PARTITIONS_SQL, (months_ahead, retention_months))
+    result = {"created": [], "detached": []}
+    for action, partition_name in cur.fetchall():
+        result[action].append(partition_name)
+    return result
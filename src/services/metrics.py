@@ -0,0 +1,280 @@
+import os
+import re
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from psycopg2 import extensions
+
+# Per-request timing (Server-Timing + histograms), query timing / slow-query log and the
+# Prometheus text exposition behind GET /metrics. Metrics are per worker: every series carries
+# a worker="<pid>" label, so rate()/sum() stay correct when the scrape hits different gunicorn workers.
+
+METRICS_PREFIX = "abzinho"
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+# Statements slower than this are printed with their SQL text (0 disables)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_MAX_CHARS = int(os.getenv("SLOW_QUERY_MAX_CHARS", "2000"))
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}" if pairs else ""
+
+def _number(value) -> str:
+    return repr(float(value)) if value != float("inf") else "+Inf"
+
+
+class Metric:
+    """Métrica com rótulos, thread-safe; ``samples()`` gera as linhas do formato texto do Prometheus."""
+
+    type = "untyped"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = f"{METRICS_PREFIX}_{name}"
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def render(self, constant):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in items:
+            lines.extend(self.samples(labelvalues, value, constant))
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labelvalues, amount=1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def samples(self, labelvalues, value, constant):
+        yield f"{self.name}_total{_labels(self.labelnames, labelvalues, constant)} {_number(value)}"
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def inc(self, *labelvalues, amount=1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def dec(self, *labelvalues, amount=1.0):
+        self.inc(*labelvalues, amount=-amount)
+
+    def samples(self, labelvalues, value, constant):
+        yield f"{self.name}{_labels(self.labelnames, labelvalues, constant)} {_number(value)}"
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, *labelvalues):
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                # [per-bucket counts..., sum, count]
+                state = self._values[labelvalues] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self, labelvalues, state, constant):
+        cumulative = 0
+        for i, bound in enumerate(self.buckets):
+            cumulative += state[i]
+            le = (("le", _number(bound) if bound != float("inf") else "+Inf"),)
+            yield f"{self.name}_bucket{_labels(self.labelnames, labelvalues, tuple(constant) + le)} {cumulative}"
+        yield f"{self.name}_sum{_labels(self.labelnames, labelvalues, constant)} {_number(state[-2])}"
+        yield f"{self.name}_count{_labels(self.labelnames, labelvalues, constant)} {state[-1]}"
+
+
+class Registry:
+    """Métricas do worker e coletores de estatísticas já existentes (pool, cache, ...)."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, name, help, fn):
+        """``fn()`` -> dict de valores numéricos, exportados como gauges ``<name>_<chave>``."""
+        self._collectors.append((f"{METRICS_PREFIX}_{name}", help, fn))
+
+    def render(self) -> str:
+        constant = (("worker", os.getpid()),)
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render(constant))
+        for prefix, help, fn in self._collectors:
+            try:
+                values = fn() or {}
+            except Exception as e:
+                print(f"Erro ao coletar métricas de {prefix}: {e}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"{prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', key)}"
+                lines += [f"# HELP {name} {help} ({key})", f"# TYPE {name} gauge", f"{name}{_labels((), (), constant)} {_number(value)}"]
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUESTS = registry.register(Counter("http_requests", "Requisições HTTP por rota e status.", ("method", "route", "status")))
+REQUEST_DURATION = registry.register(Histogram("http_request_duration_seconds", "Duração das requisições HTTP.", ("method", "route", "status")))
+REQUESTS_IN_PROGRESS = registry.register(Gauge("http_requests_in_progress", "Requisições em andamento.", ("method",)))
+# Per-request totals of each phase (db_checkout, db_query, serialization)
+REQUEST_PHASE = registry.register(Histogram("http_request_phase_seconds", "Tempo por fase dentro da requisição.", ("route", "phase")))
+QUERY_DURATION = registry.register(Histogram("db_query_duration_seconds", "Duração de cada comando SQL."))
+SLOW_QUERIES = registry.register(Counter("db_slow_queries", "Comandos SQL acima de SLOW_QUERY_MS."))
+
+
+# --- Request timing context ---
+
+class RequestTiming:
+    """Tempos acumulados por fase de uma requisição (compartilhado com a threadpool via contextvars)."""
+
+    __slots__ = ("method", "path", "route", "start", "phases", "queries", "threads")
+
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.route = None
+        self.start = time.perf_counter()
+        self.phases = {}
+        self.queries = 0
+        # Threads that did work for this request (used by the sampling profiler)
+        self.threads = {threading.get_ident()}
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+        self.threads.add(threading.get_ident())
+
+    def server_timing(self, total) -> str:
+        """Valor do cabeçalho Server-Timing (durações em ms)."""
+        parts = [f"total;dur={total * 1000:.2f}"]
+        for phase, seconds in self.phases.items():
+            entry = f"{phase.replace('_', '-')};dur={seconds * 1000:.2f}"
+            if phase == "db_query":
+                entry += f';desc="{self.queries} consulta(s)"'
+            parts.append(entry)
+        return ", ".join(parts)
+
+
+_current = contextvars.ContextVar("request_timing", default=None)
+
+
+def start_request(method, path) -> RequestTiming:
+    timing = RequestTiming(method, path)
+    _current.set(timing)
+    REQUESTS_IN_PROGRESS.inc(method)
+    return timing
+
+def finish_request(timing: RequestTiming, route, status):
+    """Registra a requisição nos histogramas; retorna a duração total (s)."""
+    total = time.perf_counter() - timing.start
+    timing.route = route
+    REQUESTS_IN_PROGRESS.dec(timing.method)
+    REQUESTS.inc(timing.method, route, str(status))
+    REQUEST_DURATION.observe(total, timing.method, route, str(status))
+    for phase, seconds in timing.phases.items():
+        REQUEST_PHASE.observe(seconds, route, phase)
+    return total
+
+@contextmanager
+def timed(phase):
+    """Soma o bloco à fase ``phase`` da requisição atual (sem efeito fora de uma requisição)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing = _current.get()
+        if timing is not None:
+            timing.add(phase, time.perf_counter() - start)
+
+
+def statement_text(query, conn=None) -> str:
+    """SQL sem os parâmetros (os valores podem ser sensíveis), em uma linha."""
+    if hasattr(query, "as_string"):
+        try:
+            query = query.as_string(conn)
+        except Exception:
+            query = repr(query)
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    return " ".join(str(query).split())[:SLOW_QUERY_MAX_CHARS]
+
+def record_query(query, seconds, conn=None):
+    """Tempo de um comando SQL: fase db_query da requisição, histograma e log de consulta lenta."""
+    QUERY_DURATION.observe(seconds)
+    timing = _current.get()
+    if timing is not None:
+        timing.add("db_query", seconds)
+        timing.queries += 1
+    if SLOW_QUERY_MS > 0 and seconds * 1000 >= SLOW_QUERY_MS:
+        SLOW_QUERIES.inc()
+        origin = f"{timing.method} {timing.path}" if timing is not None else "background"
+        print(f"Consulta lenta ({seconds * 1000:.1f} ms) [{origin}]: {statement_text(query, conn)}")
+
+
+# --- psycopg2: every cursor of pooled connections is timed ---
+
+class TimedCursorMixin:
+    def execute(self, query, vars=None):
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            record_query(query, time.perf_counter() - start, self.connection)
+
+    def executemany(self, query, vars_list):
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            record_query(query, time.perf_counter() - start, self.connection)
+
+
+_timed_cursor_classes = {}
+
+def timed_cursor_class(factory):
+    cls = _timed_cursor_classes.get(factory)
+    if cls is None:
+        cls = _timed_cursor_classes[factory] = type(f"Timed{factory.__name__}", (TimedCursorMixin, factory), {})
+    return cls
+
+
+class InstrumentedConnection(extensions.connection):
+    """Conexão psycopg2 cujos cursores (inclusive com ``cursor_factory=RealDictCursor``) medem cada comando."""
+
+    def cursor(self, *args, **kwargs):
+        factory = kwargs.get("cursor_factory") or self.cursor_factory or extensions.cursor
+        kwargs["cursor_factory"] = timed_cursor_class(factory)
+        return super().cursor(*args, **kwargs)
+
+
+def render_metrics() -> str:
+    return registry.render()
@@ -0,0 +1,263 @@
+import os
+import json
+import time
+import hashlib
+import random
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from ..config.database import N8N_WEBHOOK_URL, get_db_connection, release_db_connection
+
+# Transactional outbox: module writes (tasks, contacts, ...) insert their n8n event in the same transaction,
+# and a background dispatcher delivers the events to N8N_WEBHOOK_URL in batches.
+
+OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "true" if N8N_WEBHOOK_URL else "false").lower() == "true"
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "2"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "50"))
+OUTBOX_MAX_BATCHES = int(os.getenv("OUTBOX_MAX_BATCHES", "4"))
+OUTBOX_MAX_CONCURRENCY = int(os.getenv("OUTBOX_MAX_CONCURRENCY", "2"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", "5"))
+OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", "900"))
+OUTBOX_HTTP_TIMEOUT = float(os.getenv("OUTBOX_HTTP_TIMEOUT", "10"))
+# Claimed events are invisible to other workers for this long (must exceed a delivery round)
+OUTBOX_LEASE_SECONDS = float(os.getenv("OUTBOX_LEASE_SECONDS", "60"))
+
+# The event payload is the row as stored (minus internal columns), built by Postgres in the same statement.
+# {table}/{key} come from the module declarations (never from the request).
+ENQUEUE_SQL = """
+    INSERT INTO outbox_events (event_type, aggregate_id, payload)
+    SELECT %s, t.{key}, to_jsonb(t) - 'change_xid' - 'search_vector' FROM {table} t WHERE t.{key} = ANY(%s);
+"""
+
+CLAIM_SQL = """
+    WITH claimed AS (
+        SELECT event_id FROM outbox_events
+        WHERE status = 'pending' AND next_attempt_at <= now()
+        ORDER BY event_id
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE outbox_events o
+    SET attempts = o.attempts + 1, next_attempt_at = now() + make_interval(secs => %s)
+    FROM claimed
+    WHERE o.event_id = claimed.event_id
+    RETURNING o.event_id, o.event_key, o.event_type, o.aggregate_id, o.payload, o.attempts, o.created_at;
+"""
+
+MARK_DELIVERED_SQL = "UPDATE outbox_events SET status = 'delivered', delivered_at = now(), last_error = NULL WHERE event_id = ANY(%s);"
+
+MARK_SUPERSEDED_SQL = "UPDATE outbox_events SET status = 'superseded', delivered_at = now() WHERE event_id = ANY(%s);"
+
+MARK_FAILED_SQL = """
+    UPDATE outbox_events SET
+        status = CASE WHEN attempts >= %s THEN 'dead' ELSE 'pending' END,
+        next_attempt_at = now() + make_interval(secs => %s),
+        last_error = %s
+    WHERE event_id = ANY(%s);
+"""
+
+COUNTS_SQL = "SELECT status, count(*) AS total FROM outbox_events GROUP BY status;"
+
+
+def enqueue_statements(event_type, ids, table="tasks", key="task_id"):
+    """Comandos (sql, params) que registram o evento na outbox; vazio se a outbox estiver desligada.
+
+    Devem ser executados no mesmo cursor/transação da escrita do registro.
+    """
+    if not OUTBOX_ENABLED or not ids:
+        return []
+    return [(ENQUEUE_SQL.format(table=table, key=key), (event_type, list(ids)))]
+
+
+def backoff_seconds(attempts):
+    """Backoff exponencial com jitter: base * 2^(tentativas-1), limitado a OUTBOX_BACKOFF_MAX."""
+    delay = min(OUTBOX_BACKOFF_MAX, OUTBOX_BACKOFF_BASE * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def deduplicate(events):
+    """Mantém só o evento mais recente de cada (tipo, tarefa) do lote; retorna (a enviar, substituídos)."""
+    latest = {}
+    for event in events:
+        key = (event['event_type'], event['aggregate_id'])
+        if key not in latest or event['event_id'] > latest[key]['event_id']:
+            latest[key] = event
+    keep = sorted(latest.values(), key=lambda e: e['event_id'])
+    kept_ids = {e['event_id'] for e in keep}
+    return keep, [e['event_id'] for e in events if e['event_id'] not in kept_ids]
+
+
+class OutboxDispatcher:
+    """Entrega os eventos pendentes ao webhook em lotes, com concorrência limitada, retry e dead-letter.
+
+    Vários workers podem rodar o dispatcher ao mesmo tempo: o claim usa ``FOR UPDATE SKIP LOCKED``
+    e um lease em ``next_attempt_at``, então cada evento é enviado por um único processo por vez.
+    """
+
+    def __init__(self, webhook_url=N8N_WEBHOOK_URL, poll_interval=OUTBOX_POLL_INTERVAL, batch_size=OUTBOX_BATCH_SIZE,
+                 max_concurrency=OUTBOX_MAX_CONCURRENCY, timeout=OUTBOX_HTTP_TIMEOUT):
+        self.webhook_url = webhook_url
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {"rounds": 0, "delivered": 0, "superseded": 0, "failed": 0, "batches": 0, "last_error": None, "last_round_ms": 0.0}
+
+    # --- Lifecycle ---
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def notify(self):
+        """Acorda o dispatcher logo após um commit com eventos novos (sem esperar o polling)."""
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                claimed = self.run_once()
+            except Exception as e:
+                print(f"Erro no dispatcher da outbox: {e}")
+                claimed = 0
+            # A full round means there may be more work: loop right away
+            if claimed < self.batch_size * OUTBOX_MAX_BATCHES:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    # --- Delivery ---
+
+    def _post(self, events):
+        body = json.dumps({"events": events}, default=str).encode("utf-8")
+        request = urllib.request.Request(
+            self.webhook_url,
+            data=body,
+            method="POST",
+            headers={
+                "Content-Type": "application/json",
+                # Same batch => same key on retries; receivers can also dedupe on each event_id
+                "Idempotency-Key": hashlib.sha256(",".join(e['event_id'] for e in events).encode()).hexdigest(),
+            },
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def _deliver(self, batch):
+        try:
+            self._post([{
+                "event_id": str(e['event_key']),
+                "type": e['event_type'],
+                "aggregate_id": str(e['aggregate_id']),
+                "attempt": e['attempts'],
+                "created_at": e['created_at'],
+                "data": e['payload'],
+            } for e in batch])
+            return batch, None
+        except Exception as e:
+            return batch, f"{type(e).__name__}: {e}"[:500]
+
+    def _claim(self):
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(CLAIM_SQL, (self.batch_size * OUTBOX_MAX_BATCHES, OUTBOX_LEASE_SECONDS))
+                columns = [col.name for col in cur.description]
+                events = [dict(zip(columns, row)) for row in cur.fetchall()]
+            conn.commit()
+            return events
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            release_db_connection(conn)
+
+    def _record(self, outcomes, superseded):
+        """Grava o resultado dos lotes; retorna (entregues, falhos). Se falhar, o lease expira e os eventos voltam."""
+        delivered, failed = [], []
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                if superseded:
+                    cur.execute(MARK_SUPERSEDED_SQL, (superseded,))
+                for batch, error in outcomes:
+                    ids = [e['event_id'] for e in batch]
+                    if error is None:
+                        delivered.extend(ids)
+                        continue
+                    failed.extend(ids)
+                    # Events in one batch share their attempt count, so one backoff fits the batch
+                    attempts = max(e['attempts'] for e in batch)
+                    cur.execute(MARK_FAILED_SQL, (OUTBOX_MAX_ATTEMPTS, backoff_seconds(attempts), error, ids))
+                if delivered:
+                    cur.execute(MARK_DELIVERED_SQL, (delivered,))
+            conn.commit()
+            return delivered, failed
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            release_db_connection(conn)
+
+    def run_once(self):
+        """Uma rodada: reivindica eventos, envia em lotes e grava o resultado. Retorna quantos reivindicou.
+
+        A conexão do pool só é usada no claim e na gravação do resultado, nunca durante as chamadas HTTP.
+        """
+        if not self.webhook_url:
+            return 0
+        start = time.perf_counter()
+        events = self._claim()
+        if not events:
+            return 0
+
+        to_send, superseded = deduplicate(events)
+        batches = [to_send[i:i + self.batch_size] for i in range(0, len(to_send), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=max(1, self.max_concurrency)) as executor:
+            outcomes = list(executor.map(self._deliver, batches))
+        delivered, failed = self._record(outcomes, superseded)
+
+        with self._lock:
+            self._stats["rounds"] += 1
+            self._stats["batches"] += len(batches)
+            self._stats["delivered"] += len(delivered)
+            self._stats["superseded"] += len(superseded)
+            self._stats["failed"] += len(failed)
+            errors = [error for _, error in outcomes if error]
+            if errors:
+                self._stats["last_error"] = errors[-1]
+            self._stats["last_round_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        return len(events)
+
+    def stats(self):
+        with self._lock:
+            return {"running": self._thread is not None and self._thread.is_alive(), **self._stats}
+
+
+dispatcher = OutboxDispatcher()
+
+
+def outbox_counts():
+    """Eventos na outbox por status (pending, delivered, superseded, dead)."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(COUNTS_SQL)
+            return {status: total for status, total in cur.fetchall()}
+    finally:
+        release_db_connection(conn)
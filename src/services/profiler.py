@@ -0,0 +1,141 @@
+import os
+import re
+import sys
+import time
+import heapq
+import threading
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Opt-in wall-clock sampling profiler: a thread samples every thread's Python stack at a fixed interval,
+# and requests slower than PROFILER_SLOW_MS get the samples of their threads dumped in the "folded"
+# format (flamegraph.pl / speedscope / inferno). Only the PROFILER_KEEP slowest dumps are kept.
+
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "false").lower() == "true"
+PROFILER_INTERVAL_MS = float(os.getenv("PROFILER_INTERVAL_MS", "5"))
+PROFILER_SLOW_MS = float(os.getenv("PROFILER_SLOW_MS", "500"))
+PROFILER_KEEP = int(os.getenv("PROFILER_KEEP", "20"))
+PROFILER_DIR = os.getenv("PROFILER_DIR", "/tmp/abzinho-profiles")
+# Ring buffer of samples; must cover the slowest request worth profiling
+PROFILER_MAX_SAMPLES = int(os.getenv("PROFILER_MAX_SAMPLES", "200000"))
+
+# Leaf frames of threads that are just waiting for work (event loop select, idle threadpool workers)
+IDLE_LEAVES = ("selectors.py", "threading.py", "queue.py")
+
+
+def frame_stack(frame):
+    """Pilha da raiz até a folha, no formato do folded: ``arquivo:função;...``."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    """Amostra as pilhas de todas as threads e grava o flamegraph (folded) das requisições mais lentas."""
+
+    def __init__(self, interval_ms=PROFILER_INTERVAL_MS, slow_ms=PROFILER_SLOW_MS, keep=PROFILER_KEEP,
+                 out_dir=PROFILER_DIR, max_samples=PROFILER_MAX_SAMPLES):
+        self.interval = interval_ms / 1000
+        self.slow_ms = slow_ms
+        self.keep = keep
+        self.out_dir = out_dir
+        self._samples = deque(maxlen=max_samples)  # (instante, thread, pilha)
+        self._kept = []  # min-heap (ms, caminho): the fastest kept dump is replaced first
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        # Collecting the samples and writing the file run here, never on the event loop
+        self._dumper = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profiler-dump")
+        self._stats = {"samples": 0, "dumps": 0}
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        os.makedirs(self.out_dir, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or os.path.basename(frame.f_code.co_filename) in IDLE_LEAVES:
+                    continue
+                self._samples.append((now, thread_id, frame_stack(frame)))
+                self._stats["samples"] += 1
+
+    def _collect(self, threads, start, end):
+        return Counter(stack for at, thread_id, stack in list(self._samples) if start <= at <= end and thread_id in threads)
+
+    def _is_slowest(self, elapsed_ms):
+        with self._lock:
+            return len(self._kept) < self.keep or elapsed_ms > self._kept[0][0]
+
+    def request_finished(self, timing, total):
+        """Chamado pelo middleware: só compara com o limite; a gravação do flamegraph fica para a thread de dump."""
+        elapsed_ms = total * 1000
+        if not self.running or elapsed_ms < self.slow_ms or not self._is_slowest(elapsed_ms):
+            return None
+        return self._dumper.submit(self._dump, timing, total)
+
+    def _dump(self, timing, total):
+        """Grava o flamegraph se a requisição ainda estiver entre as mais lentas; retorna o caminho."""
+        elapsed_ms = total * 1000
+        if not self._is_slowest(elapsed_ms):
+            return None
+        # The event loop thread is shared by concurrent async requests: its samples are an approximation
+        stacks = self._collect(timing.threads, timing.start, timing.start + total)
+        if not stacks:
+            return None
+
+        route = re.sub(r"[^a-zA-Z0-9]+", "_", timing.route or timing.path).strip("_") or "root"
+        name = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{int(elapsed_ms)}ms-{timing.method}-{route}.folded"
+        path = os.path.join(self.out_dir, name)
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        except OSError as e:
+            print(f"Erro ao gravar o perfil da requisição: {e}")
+            return None
+
+        with self._lock:
+            heapq.heappush(self._kept, (elapsed_ms, path))
+            self._stats["dumps"] += 1
+            while len(self._kept) > self.keep:
+                _, evicted = heapq.heappop(self._kept)
+                try:
+                    os.remove(evicted)
+                except OSError:
+                    pass
+        return path
+
+    def stats(self):
+        with self._lock:
+            kept = sorted(self._kept, reverse=True)
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "slow_ms": self.slow_ms,
+            **self._stats,
+            "profiles": [{"ms": round(ms, 1), "path": path} for ms, path in kept],
+        }
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,88 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import timezone
+from email.utils import format_datetime
+
+# Max encoded responses kept per worker (LRU)
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+
+
+class CachedResponse:
+    """Corpo já serializado de uma listagem e seus validadores HTTP.
+
+    ``encoded``: variantes comprimidas do corpo por Content-Encoding (preenchidas sob demanda).
+    """
+
+    __slots__ = ("body", "etag", "last_modified", "headers", "encoded")
+
+    def __init__(self, body: bytes, etag: str, last_modified, headers=None):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.headers = headers or {}
+        self.encoded = {}
+
+
+class ResponseCache:
+    """Cache LRU em memória de respostas, por namespace (tabela) e chave de consulta.
+
+    As chaves incluem a versão da tabela (``table_versions``): uma escrita feita por outro
+    worker muda a versão e torna as entradas antigas inalcançáveis, sem coordenação entre processos.
+    """
+
+    def __init__(self, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, namespace, version, key):
+        with self._lock:
+            entry = self._entries.get((namespace, version, key))
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((namespace, version, key))
+            self.hits += 1
+            return entry
+
+    def set(self, namespace, version, key, entry: CachedResponse):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[(namespace, version, key)] = entry
+            self._entries.move_to_end((namespace, version, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, namespace):
+        """Descarta todas as respostas de um namespace (chamado após escritas neste worker)."""
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[0] == namespace]:
+                del self._entries[cache_key]
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+
+response_cache = ResponseCache()
+
+
+def make_etag(namespace, version, key) -> str:
+    """ETag forte: mesma versão da tabela + mesma consulta => mesmo corpo."""
+    digest = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+    return f'"{namespace}-{version}-{digest}"'
+
+def http_date(value) -> str:
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True) if value is not None else None
+
+def etag_matches(if_none_match, etag) -> bool:
+    """Compara o cabeçalho If-None-Match (lista ou '*') com a ETag atual."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
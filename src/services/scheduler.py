@@ -0,0 +1,257 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime, timezone
+
+import psycopg2
+
+from ..config.database import DATABASE_URL, get_db_connection, release_db_connection
+from . import outbox, history
+
+# Periodic set-based maintenance of date-driven statuses ("Atrasada", "Atrasado", "Expirada", ...)
+# and of the monthly task_history partitions.
+# Every worker runs the thread, but only the holder of a Postgres advisory lock executes the jobs:
+# if the leader dies its session ends, the lock is released and another worker takes over.
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+SCHEDULER_INTERVAL_SECONDS = float(os.getenv("SCHEDULER_INTERVAL_SECONDS", "300"))
+SCHEDULER_LOCK_KEY = int(os.getenv("SCHEDULER_LOCK_KEY", "4242016"))
+# Runs history kept in scheduler_runs
+SCHEDULER_RUNS_RETENTION_DAYS = int(os.getenv("SCHEDULER_RUNS_RETENTION_DAYS", "30"))
+
+
+# Window of the 'Vencendo (60d)' status, shared with the "Atas vencendo" KPI of /stats
+STATS_EXPIRY_DAYS = int(os.getenv("STATS_EXPIRY_DAYS", "60"))
+
+
+class StatusRule:
+    """Regra de status por data: um único UPDATE marca ``status`` em todas as linhas que atendem ``condition``.
+
+    ``condition`` é SQL fixo declarado aqui (nunca vem de requisição), com ``params`` para os seus
+    ``%s``; ``value``, quando informado, é a expressão SQL do novo status (``%s`` = ``status``, o
+    valor padrão). Cada linha alterada gera o evento ``<event_prefix>.updated`` na outbox, na mesma transação.
+    """
+
+    def __init__(self, name, table, key, status, condition, event_prefix, params=(), value="%s"):
+        self.name = name
+        self.table = table
+        self.key = key
+        self.status = status
+        self.event_prefix = event_prefix
+        self.params = (status, *params)
+        self.sql = f"UPDATE {table} SET status = {value} WHERE {condition} RETURNING {key};"
+
+
+# Status a task had before being marked 'Atrasada', from its history (detached/pruned history: 'Pendente')
+TASK_STATUS_BEFORE_OVERDUE_SQL = """coalesce((
+    SELECT h.changes -> 'status' ->> 0 FROM task_history h
+    WHERE h.task_id = tasks.task_id AND h.changes -> 'status' ->> 1 = 'Atrasada'
+    ORDER BY h.changed_at DESC, h.history_id DESC LIMIT 1
+), %s)"""
+
+# Conditions match the partial indexes *_open_* in database_schema.sql. Rules that clear a date status
+# (the date was moved forward) run before the ones that set it, so each run converges in one pass.
+STATUS_RULES = [
+    StatusRule(
+        "tasks_overdue_cleared", "tasks", "task_id", "Pendente",
+        "status = 'Atrasada' AND data_limite >= current_date", "task",
+        value=TASK_STATUS_BEFORE_OVERDUE_SQL,
+    ),
+    StatusRule(
+        "tasks_overdue", "tasks", "task_id", "Atrasada",
+        "data_limite < current_date AND status NOT IN ('Concluída', 'Atrasada')", "task",
+    ),
+    StatusRule(
+        "contacts_overdue_cleared", "contacts", "contact_id", "Aberto",
+        "status = 'Atrasado' AND data_follow_up >= current_date", "contact",
+    ),
+    # Only open contacts: 'Follow-up Pendente' is set by hand and stays as it is
+    StatusRule(
+        "contacts_overdue", "contacts", "contact_id", "Atrasado",
+        "data_follow_up < current_date AND status = 'Aberto'", "contact",
+    ),
+    StatusRule(
+        "minutes_renewed", "minutes", "minute_id", "Vigente",
+        "status IN ('Expirada', 'Vencendo (60d)') AND vigencia_final > current_date + %s", "minute",
+        params=(STATS_EXPIRY_DAYS,),
+    ),
+    StatusRule(
+        "minutes_expired", "minutes", "minute_id", "Expirada",
+        "vigencia_final < current_date AND status <> 'Expirada'", "minute",
+    ),
+    StatusRule(
+        "minutes_expiring", "minutes", "minute_id", "Vencendo (60d)",
+        "vigencia_final BETWEEN current_date AND current_date + %s AND status IN ('Vigente', 'Expirada')", "minute",
+        params=(STATS_EXPIRY_DAYS,),
+    ),
+]
+
+RECORD_RUN_SQL = """
+    INSERT INTO scheduler_runs (worker_pid, started_at, duration_ms, rows_touched)
+    VALUES (%s, %s, %s, %s);
+"""
+
+PRUNE_RUNS_SQL = "DELETE FROM scheduler_runs WHERE started_at < now() - make_interval(days => %s);"
+
+LAST_RUNS_SQL = """
+    SELECT worker_pid, started_at, duration_ms, rows_touched
+    FROM scheduler_runs ORDER BY started_at DESC LIMIT %s;
+"""
+
+
+class StatusScheduler:
+    """Thread que, enquanto for líder (``pg_try_advisory_lock``), aplica as ``STATUS_RULES`` a cada intervalo.
+
+    A conexão que segura o lock é a mesma que executa os UPDATEs: se ela cair, o job falha
+    junto com a liderança, e nunca há dois workers atualizando ao mesmo tempo.
+    """
+
+    def __init__(self, dsn=DATABASE_URL, rules=STATUS_RULES, interval=SCHEDULER_INTERVAL_SECONDS, lock_key=SCHEDULER_LOCK_KEY):
+        self.dsn = dsn
+        self.rules = rules
+        self.interval = interval
+        self.lock_key = lock_key
+        self._conn = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {"leader": False, "runs": 0, "rows_touched": 0, "last_run_at": None, "last_run_ms": 0.0,
+                       "last_rows": {}, "last_partitions": {}, "last_error": None}
+
+    # --- Lifecycle ---
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="status-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self._acquire_leadership():
+                    self.run_once()
+            except Exception as e:
+                print(f"Erro no agendador de status: {e}")
+                with self._lock:
+                    self._stats["last_error"] = f"{type(e).__name__}: {e}"[:500]
+                self._drop_connection()
+            self._stop.wait(self.interval)
+        self._drop_connection()
+
+    # --- Leader election ---
+
+    def _acquire_leadership(self):
+        """True se este worker segura o lock (já segurava ou acabou de obter)."""
+        if self._conn is None or self._conn.closed:
+            self._conn = psycopg2.connect(self.dsn)
+            self._set_leader(False)
+        if self._stats["leader"]:
+            return True
+        with self._conn.cursor() as cur:
+            # Session-level lock: survives the job transactions, released when the connection ends
+            cur.execute("SELECT pg_try_advisory_lock(%s);", (self.lock_key,))
+            acquired = cur.fetchone()[0]
+        self._conn.commit()
+        self._set_leader(acquired)
+        return acquired
+
+    def _set_leader(self, leader):
+        with self._lock:
+            self._stats["leader"] = leader
+
+    def _drop_connection(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+        self._set_leader(False)
+
+    # --- Jobs ---
+
+    def maintain_partitions(self):
+        """Partições do histórico em transação própria: uma falha aqui não desfaz nem bloqueia os status."""
+        conn = self._conn
+        try:
+            with conn.cursor() as cur:
+                partitions = history.maintain_partitions(cur)
+            conn.commit()
+        except psycopg2.Error as e:
+            conn.rollback()
+            print(f"Erro na manutenção das partições do histórico: {e}")
+            with self._lock:
+                self._stats["last_error"] = f"{type(e).__name__}: {e}"[:500]
+            return {"created": [], "detached": []}
+        return partitions
+
+    def run_once(self):
+        """Mantém as partições do histórico e aplica todas as regras em uma transação; retorna {regra: linhas alteradas}."""
+        # Partitions first (own transaction): the status UPDATEs below write task_history too
+        partitions = self.maintain_partitions()
+        conn = self._conn
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        rows = {}
+        try:
+            with conn.cursor() as cur:
+                for statement in history.actor_statements(history.SCHEDULER_ACTOR):
+                    cur.execute(*statement)
+                for rule in self.rules:
+                    cur.execute(rule.sql, rule.params)
+                    ids = [row[0] for row in cur.fetchall()]
+                    rows[rule.name] = len(ids)
+                    for statement in outbox.enqueue_statements(f"{rule.event_prefix}.updated", ids, table=rule.table, key=rule.key):
+                        cur.execute(*statement)
+                elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+                cur.execute(RECORD_RUN_SQL, (os.getpid(), started_at, elapsed_ms, json.dumps(rows)))
+                cur.execute(PRUNE_RUNS_SQL, (SCHEDULER_RUNS_RETENTION_DAYS,))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        if partitions["created"] or partitions["detached"]:
+            print(f"Histórico de tarefas: partições criadas {partitions['created']}, desanexadas {partitions['detached']}")
+        touched = sum(rows.values())
+        if touched:
+            outbox.dispatcher.notify()
+            print(f"Agendador de status: {touched} linha(s) atualizada(s) em {elapsed_ms} ms {rows}")
+        with self._lock:
+            self._stats["runs"] += 1
+            self._stats["rows_touched"] += touched
+            self._stats["last_run_at"] = started_at.isoformat()
+            self._stats["last_run_ms"] = elapsed_ms
+            self._stats["last_rows"] = rows
+            if partitions["created"] or partitions["detached"]:
+                self._stats["last_partitions"] = partitions
+        return rows
+
+    def stats(self):
+        with self._lock:
+            return {"running": self._thread is not None and self._thread.is_alive(), "interval_seconds": self.interval, **self._stats}
+
+
+scheduler = StatusScheduler()
+
+
+def last_runs(limit=10):
+    """Últimas execuções registradas por qualquer worker (só o líder executa)."""
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(LAST_RUNS_SQL, (limit,))
+            columns = [col.name for col in cur.description]
+            return [dict(zip(columns, row)) for row in cur.fetchall()]
+    finally:
+        conn.rollback()
+        release_db_connection(conn)
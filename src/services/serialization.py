@@ -0,0 +1,30 @@
+import json
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder, decimal_encoder
+
+# Fast JSON for rows that come straight from Postgres: no Pydantic re-validation, and orjson
+# (UUID/date/datetime natively, output already UTF-8 bytes) when it is installed.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_ENGINE = "orjson" if orjson is not None else "json"
+
+
+def _default(value):
+    # NUMERIC columns (valor_total, ...) -> same int/float choice as FastAPI's encoder
+    return decimal_encoder(value) if hasattr(value, "as_tuple") else jsonable_encoder(value)
+
+
+def dumps(content) -> bytes:
+    """Serializa ``content`` em JSON UTF-8 (mesmo resultado do jsonable_encoder + json.dumps)."""
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False).encode()
+
+
+def json_response(content, status_code=200, headers=None) -> Response:
+    """Resposta JSON já serializada; o response_model da rota continua só documentando o contrato."""
+    return Response(content=dumps(content), status_code=status_code, media_type="application/json", headers=headers)
@@ -0,0 +1,127 @@
+import os
+import asyncio
+import threading
+
+from .metrics import registry, Counter
+
+# Single-flight for read endpoints: concurrent identical requests in a worker (same route, table
+# version and query) share one DB query and one encoded body. The first caller (leader) does the work;
+# the others (followers) wait for its result. Only successful results are shared: if the leader fails or
+# is cancelled, each follower runs the work itself, with its own connection.
+
+# Routes (FastAPI route names, e.g. list_tasks,get_stats) with coalescing; "*" = all, "" = none
+SINGLE_FLIGHT_ROUTES = os.getenv("SINGLE_FLIGHT_ROUTES", "*")
+# A follower gives up waiting after this and runs the query itself
+SINGLE_FLIGHT_WAIT_SECONDS = float(os.getenv("SINGLE_FLIGHT_WAIT_SECONDS", "30"))
+
+SINGLE_FLIGHT_CALLS = registry.register(Counter(
+    "single_flight_calls", "Leituras por rota: leader executou a consulta, follower reaproveitou a de outra requisição.",
+    ("route", "role"),
+))
+
+_routes = {route.strip() for route in SINGLE_FLIGHT_ROUTES.split(",") if route.strip()}
+
+
+def enabled(route) -> bool:
+    return "*" in _routes or route in _routes
+
+
+class _Call:
+    __slots__ = ("done", "ok", "result")
+
+    def __init__(self, done):
+        self.done = done
+        self.ok = False
+        self.result = None
+
+
+class SingleFlight:
+    """Coalesce chamadas concorrentes com a mesma chave (threads da threadpool e corrotinas do event loop)."""
+
+    def __init__(self, wait_seconds=SINGLE_FLIGHT_WAIT_SECONDS):
+        self.wait_seconds = wait_seconds
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def _count(self, route, role):
+        SINGLE_FLIGHT_CALLS.inc(route, role)
+        with self._lock:
+            counts = self._counts.setdefault(route, {"leader": 0, "follower": 0})
+            counts[role] += 1
+
+    def do(self, route, key, fn):
+        """Executa ``fn()`` uma vez por chave entre as threads concorrentes e devolve o mesmo resultado a todas."""
+        if not enabled(route):
+            return fn()
+        with self._lock:
+            call = self._calls.get((route, key))
+            leader = call is None
+            if leader:
+                call = self._calls[(route, key)] = _Call(threading.Event())
+        if not leader:
+            if call.done.wait(self.wait_seconds) and call.ok:
+                self._count(route, "follower")
+                return call.result
+            self._count(route, "leader")
+            return fn()
+
+        self._count(route, "leader")
+        try:
+            call.result = fn()
+            call.ok = True
+            return call.result
+        finally:
+            with self._lock:
+                del self._calls[(route, key)]
+            call.done.set()
+
+    async def do_async(self, route, key, fn):
+        """Versão asyncio de ``do``: ``fn`` é uma função assíncrona sem argumentos."""
+        if not enabled(route):
+            return await fn()
+        call = self._async_calls.get((route, key))
+        if call is not None:
+            try:
+                # shield: a follower that times out or disconnects must not cancel the leader's wait
+                await asyncio.wait_for(asyncio.shield(call.done.wait()), self.wait_seconds)
+            except asyncio.TimeoutError:
+                pass
+            if call.ok:
+                self._count(route, "follower")
+                return call.result
+            self._count(route, "leader")
+            return await fn()
+
+        call = self._async_calls[(route, key)] = _Call(asyncio.Event())
+        self._count(route, "leader")
+        try:
+            call.result = await fn()
+            call.ok = True
+            return call.result
+        finally:
+            del self._async_calls[(route, key)]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            counts = {route: dict(values) for route, values in self._counts.items()}
+            in_flight = len(self._calls)
+        routes = {}
+        for route, values in counts.items():
+            total = values["leader"] + values["follower"]
+            routes[route] = {**values, "coalescing_ratio": round(values["follower"] / total, 4) if total else 0.0}
+        leaders = sum(values["leader"] for values in counts.values())
+        followers = sum(values["follower"] for values in counts.values())
+        return {
+            "routes_enabled": sorted(_routes),
+            "in_flight": in_flight + len(self._async_calls),
+            "leaders": leaders,
+            "followers": followers,
+            "coalescing_ratio": round(followers / (leaders + followers), 4) if leaders + followers else 0.0,
+            "routes": routes,
+        }
+
+
+single_flight = SingleFlight()
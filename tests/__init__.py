@@ -0,0 +1,36 @@
+"""Testes de integração contra o Postgres configurado em DB_* (os mesmos valores da API).
+
+Uso (a partir da raiz do repositório):
+
+    python -m unittest discover tests -v
+
+Use um banco local ou de homologação: os testes criam e removem linhas 'test-*' em tasks e outbox_events.
+Os testes de réplica só rodam com DB_REPLICA_DSNS definido (ver docker-compose.replicas.yml).
+"""
+import psycopg2
+
+from src.config.database import DATABASE_URL
+
+# Every test row starts with this prefix, so cleanup never touches real data
+TEST_PREFIX = "test-"
+
+
+def database_unavailable(dsn=DATABASE_URL):
+    """Motivo para pular os testes de banco, ou None se o Postgres de DB_* responde."""
+    try:
+        psycopg2.connect(dsn, connect_timeout=3).close()
+    except psycopg2.Error as e:
+        return f"Postgres de DB_* indisponível: {e}".strip()
+    return None
+
+
+def execute(sql, params=None, dsn=DATABASE_URL):
+    """Executa um comando numa conexão própria (autocommit) e retorna as linhas, se houver."""
+    conn = psycopg2.connect(dsn)
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            return cur.fetchall() if cur.description else []
+    finally:
+        conn.close()
@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import threading
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import psycopg2
+
+from src.config.database import DATABASE_URL
+from src.services import outbox
+from tests import TEST_PREFIX, database_unavailable, execute
+
+OUTBOX_TEST_PREFIX = TEST_PREFIX + "outbox-"
+
+
+class StubWebhook:
+    """Webhook n8n falso em localhost: guarda cada POST e responde com os status de ``responses`` (depois 200)."""
+
+    def __init__(self):
+        self.requests = []
+        self.responses = []
+        self.default_status = 200
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                with stub._lock:
+                    stub.requests.append({"headers": dict(self.headers), "body": body})
+                    status = stub.responses.pop(0) if stub.responses else stub.default_status
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_port}/webhook"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+            self.responses.clear()
+            self.default_status = 200
+
+    def events(self):
+        with self._lock:
+            return [event for request in self.requests for event in request["body"]["events"]]
+
+
+class OutboxDispatcherTest(unittest.TestCase):
+    """Entrega em lotes, retry com backoff num 5xx, dedup e dead-letter após OUTBOX_MAX_ATTEMPTS."""
+
+    @classmethod
+    def setUpClass(cls):
+        reason = database_unavailable()
+        if reason:
+            raise unittest.SkipTest(reason)
+        cls.stub = StubWebhook()
+        cls.stub.start()
+        # N8N_WEBHOOK_URL is read once at import, so the dispatcher also gets the stub URL explicitly
+        cls.env = mock.patch.dict(os.environ, {"N8N_WEBHOOK_URL": cls.stub.url})
+        cls.env.start()
+        rows = execute(
+            """
+            INSERT INTO tasks (descricao, responsavel, data_limite, status, prioridade)
+            SELECT %s || g, 'Teste', current_date, 'Pendente', 'Baixa' FROM generate_series(1, 3) AS g
+            RETURNING task_id;
+            """,
+            (OUTBOX_TEST_PREFIX,),
+        )
+        cls.task_ids = sorted(row[0] for row in rows)
+
+    @classmethod
+    def tearDownClass(cls):
+        execute("DELETE FROM outbox_events WHERE aggregate_id = ANY(%s);", (cls.task_ids,))
+        execute("DELETE FROM tasks WHERE task_id = ANY(%s);", (cls.task_ids,))
+        cls.env.stop()
+        cls.stub.stop()
+
+    def setUp(self):
+        # The dispatcher claims every due event: never deliver (or dead-letter) someone else's
+        others = execute(
+            "SELECT count(*) FROM outbox_events WHERE status = 'pending' AND NOT aggregate_id = ANY(%s);",
+            (self.task_ids,),
+        )[0][0]
+        if others:
+            self.skipTest(f"outbox_events tem {others} eventos pendentes de outras tarefas; use um banco de teste")
+        self.stub.reset()
+        for name, value in {"OUTBOX_ENABLED": True, "OUTBOX_MAX_ATTEMPTS": 3, "OUTBOX_BACKOFF_BASE": 0.5}.items():
+            patcher = mock.patch.object(outbox, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.dispatcher = outbox.OutboxDispatcher(webhook_url=os.environ["N8N_WEBHOOK_URL"], batch_size=2, timeout=5)
+
+    def tearDown(self):
+        execute("DELETE FROM outbox_events WHERE aggregate_id = ANY(%s);", (self.task_ids,))
+
+    def enqueue(self, event_type, ids):
+        """Registra os eventos como a API faz: os comandos de enqueue_statements na transação da escrita."""
+        conn = psycopg2.connect(DATABASE_URL)
+        try:
+            with conn.cursor() as cur:
+                for sql, params in outbox.enqueue_statements(event_type, ids):
+                    cur.execute(sql, params)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def outbox_rows(self):
+        return execute(
+            """
+            SELECT event_id, event_key::text, aggregate_id, status, attempts, last_error,
+                   extract(epoch FROM next_attempt_at - now())::float
+            FROM outbox_events WHERE aggregate_id = ANY(%s) ORDER BY event_id;
+            """,
+            (self.task_ids,),
+        )
+
+    def run_until_claimed(self, timeout=10):
+        """Roda o dispatcher até ele reivindicar algo (os eventos em backoff só voltam quando vencem)."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            claimed = self.dispatcher.run_once()
+            if claimed:
+                return claimed
+            time.sleep(0.05)
+        self.fail("nenhum evento ficou disponível para o dispatcher")
+
+    def test_delivers_in_batches(self):
+        self.enqueue("task.test_created", self.task_ids)
+
+        self.assertEqual(self.dispatcher.run_once(), 3)
+
+        # batch_size=2: three events go out as two POSTs
+        self.assertEqual(sorted(len(r["body"]["events"]) for r in self.stub.requests), [1, 2])
+        self.assertTrue(all(r["headers"].get("Idempotency-Key") for r in self.stub.requests))
+        events = self.stub.events()
+        self.assertEqual(sorted(e["aggregate_id"] for e in events), [str(task_id) for task_id in self.task_ids])
+        self.assertTrue(all(e["type"] == "task.test_created" and e["attempt"] == 1 for e in events))
+        self.assertEqual(events[0]["data"]["descricao"][:len(OUTBOX_TEST_PREFIX)], OUTBOX_TEST_PREFIX)
+        rows = self.outbox_rows()
+        self.assertEqual({row[3] for row in rows}, {"delivered"})
+        self.assertEqual({e["event_id"] for e in events}, {row[1] for row in rows})
+
+    def test_retries_with_backoff_after_5xx(self):
+        self.stub.responses = [503]
+        self.enqueue("task.test_updated", self.task_ids[:1])
+
+        self.assertEqual(self.dispatcher.run_once(), 1)
+
+        [(_, _, _, status, attempts, last_error, delay)] = self.outbox_rows()
+        self.assertEqual((status, attempts), ("pending", 1))
+        self.assertIn("503", last_error)
+        # First retry: OUTBOX_BACKOFF_BASE (0.5 s) with ±20% jitter
+        self.assertTrue(0.2 < delay <= 0.6, delay)
+        self.assertEqual(self.dispatcher.run_once(), 0)
+
+        self.run_until_claimed()
+
+        [(_, _, _, status, attempts, last_error, _)] = self.outbox_rows()
+        self.assertEqual((status, attempts, last_error), ("delivered", 2, None))
+        self.assertEqual([e["attempt"] for e in self.stub.events()], [1, 2])
+        # Same event on the retry, so the receiver can dedupe on event_id / Idempotency-Key
+        first, retry = self.stub.requests
+        self.assertEqual(first["body"]["events"][0]["event_id"], retry["body"]["events"][0]["event_id"])
+        self.assertEqual(first["headers"]["Idempotency-Key"], retry["headers"]["Idempotency-Key"])
+
+    def test_deduplicates_events_of_the_same_task(self):
+        self.enqueue("task.test_updated", self.task_ids[:1])
+        self.enqueue("task.test_updated", self.task_ids[:1])
+
+        self.assertEqual(self.dispatcher.run_once(), 2)
+
+        older, newer = self.outbox_rows()
+        self.assertEqual((older[3], newer[3]), ("superseded", "delivered"))
+        self.assertEqual([e["event_id"] for e in self.stub.events()], [newer[1]])
+
+    def test_dead_letters_after_max_attempts(self):
+        self.stub.default_status = 500
+        self.enqueue("task.test_updated", self.task_ids[:1])
+
+        for attempt in range(1, outbox.OUTBOX_MAX_ATTEMPTS + 1):
+            self.run_until_claimed()
+            [(_, _, _, status, attempts, last_error, _)] = self.outbox_rows()
+            self.assertEqual(attempts, attempt)
+            self.assertIn("500", last_error)
+            self.assertEqual(status, "dead" if attempt == outbox.OUTBOX_MAX_ATTEMPTS else "pending")
+
+        self.assertEqual(len(self.stub.requests), outbox.OUTBOX_MAX_ATTEMPTS)
+        # Dead events are never claimed again
+        time.sleep(outbox.backoff_seconds(outbox.OUTBOX_MAX_ATTEMPTS) * 1.5)
+        self.assertEqual(self.dispatcher.run_once(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
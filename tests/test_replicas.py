@@ -0,0 +1,248 @@
+import time
+import socket
+import threading
+import unittest
+from unittest import mock
+
+import psycopg2
+from psycopg2.extensions import parse_dsn, make_dsn
+
+from src.config import replicas
+from tests import TEST_PREFIX, database_unavailable, execute
+
+REPLICA_TEST_PREFIX = TEST_PREFIX + "replica-"
+
+
+class TcpProxy:
+    """Proxy TCP local na frente da réplica: ``stop()`` derruba o "servidor" (e as conexões abertas), ``start()`` o traz de volta."""
+
+    def __init__(self, dsn):
+        params = parse_dsn(dsn)
+        host, port = params.get("host", "localhost"), int(params.get("port", 5432))
+        if host.startswith("/"):
+            self.target = (socket.AF_UNIX, f"{host}/.s.PGSQL.{port}")
+        else:
+            self.target = (socket.AF_INET, (host, port))
+        self.dsn = dsn
+        self.port = 0
+        self._listener = None
+        self._sockets = set()
+        self._lock = threading.Lock()
+
+    @property
+    def proxied_dsn(self):
+        return make_dsn(self.dsn, host="127.0.0.1", port=self.port)
+
+    def start(self):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # Same port on restart, so the DSN given to the router stays valid
+        listener.bind(("127.0.0.1", self.port))
+        listener.listen()
+        self.port = listener.getsockname()[1]
+        self._listener = listener
+        threading.Thread(target=self._accept, args=(listener,), daemon=True).start()
+
+    def stop(self):
+        with self._lock:
+            sockets = [self._listener, *self._sockets]
+            self._sockets.clear()
+            self._listener = None
+        for sock in sockets:
+            if sock is None:
+                continue
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            sock.close()
+
+    def _accept(self, listener):
+        while True:
+            try:
+                client, _ = listener.accept()
+            except OSError:
+                return
+            family, address = self.target
+            upstream = socket.socket(family, socket.SOCK_STREAM)
+            try:
+                upstream.connect(address)
+            except OSError:
+                client.close()
+                upstream.close()
+                continue
+            with self._lock:
+                self._sockets.update((client, upstream))
+            threading.Thread(target=self._pipe, args=(client, upstream), daemon=True).start()
+            threading.Thread(target=self._pipe, args=(upstream, client), daemon=True).start()
+
+    def _pipe(self, source, target):
+        try:
+            while data := source.recv(65536):
+                target.sendall(data)
+        except OSError:
+            pass
+        finally:
+            for sock in (source, target):
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+
+class ReplicaRoutingTest(unittest.TestCase):
+    """Roteamento de leituras com um primário (DB_*) e uma réplica por streaming (DB_REPLICA_DSNS).
+
+    Ver docker-compose.replicas.yml. A réplica fica atrás de um proxy local para simular a queda.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        if not replicas.DB_REPLICA_DSNS:
+            raise unittest.SkipTest("DB_REPLICA_DSNS não definido (ver docker-compose.replicas.yml)")
+        reason = database_unavailable()
+        if reason:
+            raise unittest.SkipTest(reason)
+        cls.replica_dsn = replicas.DB_REPLICA_DSNS[0]
+        try:
+            in_recovery = execute("SELECT pg_is_in_recovery();", dsn=cls.replica_dsn)[0][0]
+        except psycopg2.Error as e:
+            raise unittest.SkipTest(f"réplica indisponível: {e}".strip())
+        if not in_recovery:
+            raise unittest.SkipTest("DB_REPLICA_DSNS[0] não é uma réplica (pg_is_in_recovery() = false)")
+
+    @classmethod
+    def tearDownClass(cls):
+        execute("DELETE FROM tasks WHERE descricao LIKE %s;", (REPLICA_TEST_PREFIX + "%",))
+
+    def setUp(self):
+        # Idle connections are pinged on every checkout, so a dead replica shows up at the next checkout
+        self.patch(replicas, "DB_POOL_CHECK_IDLE", 0)
+        self.proxy = TcpProxy(self.replica_dsn)
+        self.proxy.start()
+        self.addCleanup(self.proxy.stop)
+        self.router = replicas.ReplicaRouter([self.proxy.proxied_dsn])
+        self.addCleanup(self.router.stop)
+        # get_read_connection() reads through the module router, as the API does
+        self.patch(replicas, "replica_router", self.router)
+        [self.replica] = self.router.replicas
+
+    def patch(self, target, name, value):
+        patcher = mock.patch.object(target, name, value)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def pause_replay(self):
+        execute("SELECT pg_wal_replay_pause();", dsn=self.replica_dsn)
+        self.addCleanup(execute, "SELECT pg_wal_replay_resume();", dsn=self.replica_dsn)
+
+    def resume_replay(self):
+        execute("SELECT pg_wal_replay_resume();", dsn=self.replica_dsn)
+
+    def write_tasks(self, rows=1):
+        """Escrita no primário; retorna (ids, LSN após o commit), como a API devolve no cookie/cabeçalho."""
+        ids = [row[0] for row in execute(
+            """
+            INSERT INTO tasks (descricao, responsavel, data_limite, status, prioridade)
+            SELECT %s || g, 'Teste', current_date, 'Pendente', 'Baixa' FROM generate_series(1, %s) AS g
+            RETURNING task_id;
+            """,
+            (REPLICA_TEST_PREFIX, rows),
+        )]
+        return ids, replicas.parse_lsn(replicas.primary_lsn_text())
+
+    def wait_until_chosen(self, min_lsn=0, timeout=15):
+        """Roda o verificador até a réplica voltar a ser escolhida (replay em dia / réplica de volta)."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            self.router.check_all()
+            replica, _ = self.router.choose(min_lsn)
+            if replica is not None:
+                return replica
+            time.sleep(0.1)
+        self.fail(f"réplica não voltou a ser elegível: {self.replica.stats()}")
+
+    def read_target(self, min_lsn=0):
+        """Onde get_read_connection() leu: 'replica' ou 'primary' (pelo próprio servidor)."""
+        replica, conn = replicas.get_read_connection(min_lsn)
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_is_in_recovery();")
+                in_recovery = cur.fetchone()[0]
+        finally:
+            replicas.release_read_connection(replica, conn)
+        self.assertEqual(replica is not None, in_recovery)
+        return "replica" if in_recovery else "primary"
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        self.patch(replicas, "DB_REPLICA_MAX_LAG_BYTES", 64 * 1024)
+        self.patch(replicas, "DB_REPLICA_MAX_LAG_SECONDS", 3600)
+        self.wait_until_chosen()
+        self.assertEqual(self.read_target(), "replica")
+
+        self.pause_replay()
+        self.write_tasks(rows=500)
+        self.router.check_all()
+
+        self.assertFalse(self.replica.healthy)
+        self.assertGreater(self.replica.lag_bytes, replicas.DB_REPLICA_MAX_LAG_BYTES)
+        self.assertEqual(self.router.choose(), (None, "unhealthy"))
+        self.assertEqual(self.read_target(), "primary")
+
+        self.resume_replay()
+        self.wait_until_chosen()
+        self.assertEqual(self.read_target(), "replica")
+
+    def test_reads_stick_to_primary_until_replica_replays_the_write(self):
+        # Lag limits out of the way: only the client's write LSN decides
+        self.patch(replicas, "DB_REPLICA_MAX_LAG_BYTES", 1 << 40)
+        self.patch(replicas, "DB_REPLICA_MAX_LAG_SECONDS", 1e9)
+        self.wait_until_chosen()
+
+        self.pause_replay()
+        [task_id], write_lsn = self.write_tasks()
+        self.router.check_all()
+
+        self.assertTrue(self.replica.healthy)
+        self.assertLess(self.replica.replay_lsn, write_lsn)
+        self.assertEqual(self.router.choose(write_lsn), (None, "read_your_writes"))
+        self.assertEqual(self.read_target(write_lsn), "primary")
+        # Clients without that write keep reading from the replica
+        self.assertEqual(self.read_target(), "replica")
+
+        self.resume_replay()
+        self.wait_until_chosen(write_lsn)
+        replica, conn = replicas.get_read_connection(write_lsn)
+        try:
+            self.assertIs(replica, self.replica)
+            with conn.cursor() as cur:
+                cur.execute("SELECT count(*) FROM tasks WHERE task_id = %s;", (task_id,))
+                self.assertEqual(cur.fetchone()[0], 1)
+        finally:
+            replicas.release_read_connection(replica, conn)
+
+    def test_replica_down_falls_back_to_primary(self):
+        self.wait_until_chosen()
+        self.assertEqual(self.read_target(), "replica")
+
+        self.proxy.stop()
+
+        # Before the monitor notices: the checkout fails and that read goes to the primary
+        self.assertTrue(self.replica.healthy)
+        self.assertEqual(self.read_target(), "primary")
+        self.assertFalse(self.replica.healthy)
+        # The monitor keeps it out while it is down
+        self.router.check_all()
+        self.assertFalse(self.replica.healthy)
+        self.assertIsNotNone(self.replica.error)
+        self.assertEqual(self.router.choose(), (None, "unhealthy"))
+        self.assertEqual(self.read_target(), "primary")
+
+        # And brings it back once it answers again
+        self.proxy.start()
+        self.wait_until_chosen()
+        self.assertEqual(self.read_target(), "replica")
+
+
+if __name__ == "__main__":
+    unittest.main()